@@ -1,4 +1,9 @@
-
+import asyncio
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
 
 from redis.asyncio import Redis
 from fastapi import Request
@@ -12,3 +17,142 @@ def create_redis() -> Redis:
 
 async def get_redis(request: Request) -> Redis:
     return request.app.state.redis
+
+
+class SingleFlight:
+    """Coalesce concurrent loads of the same key within one process.
+
+    The first caller for a key runs the loader; callers that arrive while it
+    is in flight await the same result instead of starting their own.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        async def load(_keys):
+            return {key: await fn()}
+
+        return (await self.do_many([key], load))[key]
+
+    async def do_many(
+        self,
+        keys: list[Hashable],
+        fn: Callable[[list[Hashable]], Awaitable[dict]],
+    ) -> dict:
+        loop = asyncio.get_running_loop()
+        owned: list[Hashable] = []
+        waiting: dict[Hashable, asyncio.Future] = {}
+        for key in dict.fromkeys(keys):
+            fut = self._inflight.get(key)
+            if fut is None:
+                self._inflight[key] = loop.create_future()
+                owned.append(key)
+            else:
+                waiting[key] = fut
+
+        results: dict = {}
+        if owned:
+            try:
+                loaded = await fn(owned)
+            except asyncio.CancelledError:
+                for key in owned:
+                    self._inflight.pop(key).cancel()
+                raise
+            except BaseException as exc:
+                for key in owned:
+                    fut = self._inflight.pop(key)
+                    fut.set_exception(exc)
+                    fut.exception()  # waiters re-raise; don't warn if there are none
+                raise
+            for key in owned:
+                results[key] = loaded.get(key)
+                self._inflight.pop(key).set_result(results[key])
+
+        for key, fut in waiting.items():
+            try:
+                results[key] = await asyncio.shield(fut)
+            except asyncio.CancelledError:
+                if not fut.cancelled():
+                    raise
+                # The owning caller was cancelled; load it ourselves.
+                results.update(await self.do_many([key], fn))
+        return results
+
+
+class LRUCache:
+    """Bounded in-process cache with a per-entry TTL and size-based eviction.
+
+    Values are shared between callers and must be treated as read-only.
+    Thread-safe so writers running in ``asyncio.to_thread`` can invalidate.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl: float,
+        sizeof: Callable[[Any], int] = sys.getsizeof,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sizeof = sizeof
+        self._data: OrderedDict[Hashable, tuple[float, int, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    self._pop(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[2]
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            self.discard(key)
+            return
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            self._data[key] = (expires, size, value)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._pop(oldest)
+                self.evictions += 1
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key satisfies ``predicate``; returns the
+        number dropped."""
+        with self._lock:
+            stale = [key for key in self._data if predicate(key)]
+            for key in stale:
+                self._pop(key)
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+
+    def _pop(self, key: Hashable) -> None:
+        _, size, _ = self._data.pop(key)
+        self.nbytes -= size
@@ -0,0 +1,83 @@
+"""Binary columnar responses for numeric endpoints.
+
+Clients that send ``Accept: application/vnd.apache.arrow.stream`` get an
+Arrow IPC stream (one table, non-tabular fields JSON-encoded under the
+``meta`` schema metadata key). ``Accept: application/msgpack`` gets
+``{"columns": {name: [...]}, "meta": {...}}`` with dates as ISO strings.
+Anything else falls through to the endpoint's JSON response.
+"""
+
+import json
+from typing import Any
+
+import msgpack
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from fastapi import Request, Response
+
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+_MEDIA_TYPES = {
+    ARROW_STREAM: ARROW_STREAM,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+}
+
+
+def negotiate(request: Request) -> str | None:
+    """Return the columnar media type the client asked for, if any."""
+    accept = request.headers.get("accept", "")
+    for part in accept.split(","):
+        media_type = part.split(";", 1)[0].strip().lower()
+        if media_type in _MEDIA_TYPES:
+            return _MEDIA_TYPES[media_type]
+    return None
+
+
+def columnar_response(
+    media_type: str, columns: dict[str, Any], meta: dict | None = None
+) -> Response:
+    if media_type == ARROW_STREAM:
+        body = _arrow_stream(columns, meta)
+    else:
+        body = msgpack.packb(
+            {
+                "columns": {name: _to_list(values) for name, values in columns.items()},
+                "meta": meta or {},
+            }
+        )
+    return Response(content=body, media_type=media_type)
+
+
+def _arrow_stream(columns: dict[str, Any], meta: dict | None) -> bytes:
+    table = pa.table({name: _to_arrow(values) for name, values in columns.items()})
+    if meta:
+        table = table.replace_schema_metadata({"meta": json.dumps(meta, default=str)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _to_arrow(values: Any) -> pa.Array:
+    if isinstance(values, pd.Series) and not pd.api.types.is_datetime64_any_dtype(values):
+        return pa.Array.from_pandas(values)
+    if isinstance(values, pd.Series):
+        values = values.to_numpy()
+    if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.datetime64):
+        return pa.array(values.astype("datetime64[D]"))
+    return pa.array(values)
+
+
+def _to_list(values: Any) -> list:
+    if isinstance(values, pd.Series):
+        values = values.to_numpy()
+    if isinstance(values, np.ndarray):
+        if np.issubdtype(values.dtype, np.datetime64):
+            return np.datetime_as_string(values, unit="D").tolist()
+        if values.dtype == object:
+            return [None if v is None or v is pd.NA else v for v in values.tolist()]
+        return values.tolist()
+    return [v.isoformat() if hasattr(v, "isoformat") else v for v in values]
@@ -13,6 +13,29 @@ class Settings(BaseSettings):
     NIM_OCR_MODEL: str = "nvidia/nemotron-ocr-v1"
     DEMO_PORTFOLIO_ID: str = ""
     SECRET_KEY: str = "dev-secret-change-me"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800  # seconds; -1 disables
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a pooled connection
+    DB_STATEMENT_TIMEOUT_MS: int = 30_000  # 0 disables
+    DB_ASYNC_POOL_SIZE: int = 20
+    DB_ASYNC_MAX_OVERFLOW: int = 10
+    # Serve prices/fundamentals from a directory of <TICKER>.parquet|.csv
+    # files instead of yfinance (offline load tests and benchmarks).
+    MARKET_DATA_DIR: str = ""
+    # Per-ticker/per-year Parquet archive for long-lookback reads; empty
+    # disables it.
+    PRICE_ARCHIVE_DIR: str = ""
+    # Serialize provider fetches across uvicorn workers with Redis locks.
+    DISTRIBUTED_FETCH_LOCKS: bool = False
+    # /api/ready thresholds: past these a replica reports "degraded".
+    READY_PROBE_TIMEOUT: float = 2.0  # seconds per Redis/Postgres probe
+    READY_REDIS_MAX_MS: float = 50.0
+    READY_DB_MAX_MS: float = 200.0
+    READY_JOB_MAX_LAG_S: float = 600.0  # overdue scheduler job
+    READY_PRICE_SYNC_MAX_AGE_S: float = 7200.0
+    # Status code for "degraded"; 200 keeps degraded replicas in rotation.
+    READY_DEGRADED_STATUS_CODE: int = 503
 
     @property
     def cors_origins_list(self) -> list[str]:
@@ -1,12 +1,158 @@
-from sqlalchemy import create_engine
+import threading
+import time
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
 
 from app.config import settings
 
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True, future=True)
+class PoolMetrics:
+    """Checkout-wait counters for one engine's pool."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+
+    def record(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def snapshot(self, pool: Pool) -> dict:
+        with self._lock:
+            checkouts, timeouts = self.checkouts, self.timeouts
+            wait_total, wait_max = self.wait_total, self.wait_max
+        attempts = checkouts + timeouts
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_ms_avg": 1000 * wait_total / attempts if attempts else 0.0,
+            "wait_ms_max": 1000 * wait_max,
+        }
+
+
+def timed_pool(base: type[Pool], metrics: PoolMetrics) -> type[Pool]:
+    # Pool.recreate() instantiates type(self), so the metrics live on the
+    # class and survive pool invalidation.
+    class TimedPool(base):
+        _metrics = metrics
+
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                conn = super().connect()
+            except exc.TimeoutError:
+                self._metrics.record(time.perf_counter() - start, timed_out=True)
+                raise
+            self._metrics.record(time.perf_counter() - start)
+            return conn
+
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    return TimedPool
+
+
+def _pool_kwargs(pool_size: int, max_overflow: int) -> dict:
+    return {
+        "pool_pre_ping": True,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+
+
+# libpq connection parameters psycopg2 understands but asyncpg.connect()
+# rejects as unexpected keywords.
+_LIBPQ_ONLY_PARAMS = frozenset(
+    {
+        "application_name",
+        "channel_binding",
+        "client_encoding",
+        "connect_timeout",
+        "gssencmode",
+        "keepalives",
+        "keepalives_count",
+        "keepalives_idle",
+        "keepalives_interval",
+        "options",
+        "sslcert",
+        "sslcrl",
+        "sslkey",
+        "sslpassword",
+        "sslrootcert",
+        "target_session_attrs",
+    }
+)
+
+
+def _async_url(url: str) -> URL:
+    """DATABASE_URL re-targeted at asyncpg: ``sslmode`` becomes asyncpg's
+    ``ssl`` (which takes the same mode names) and libpq-only parameters are
+    dropped."""
+    parsed = make_url(url)
+    query = {k: v for k, v in parsed.query.items() if k not in _LIBPQ_ONLY_PARAMS}
+    sslmode = query.pop("sslmode", None)
+    if sslmode is not None:
+        query.setdefault("ssl", sslmode)
+    return parsed.set(drivername="postgresql+asyncpg", query=query)
+
+
+_timeout_ms = settings.DB_STATEMENT_TIMEOUT_MS
+
+sync_pool_metrics = PoolMetrics()
+engine = create_engine(
+    settings.DATABASE_URL,
+    future=True,
+    poolclass=timed_pool(QueuePool, sync_pool_metrics),
+    connect_args=(
+        {"options": f"-c statement_timeout={_timeout_ms}"} if _timeout_ms else {}
+    ),
+    **_pool_kwargs(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW),
+)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+# Read-heavy paths (DataService, OCR lookups, snapshots, regime router) run on
+# the event loop through asyncpg instead of hopping to the default thread pool.
+async_pool_metrics = PoolMetrics()
+async_engine = create_async_engine(
+    _async_url(settings.DATABASE_URL),
+    poolclass=timed_pool(AsyncAdaptedQueuePool, async_pool_metrics),
+    connect_args=(
+        {"server_settings": {"statement_timeout": str(_timeout_ms)}}
+        if _timeout_ms
+        else {}
+    ),
+    **_pool_kwargs(settings.DB_ASYNC_POOL_SIZE, settings.DB_ASYNC_MAX_OVERFLOW),
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+def pool_stats() -> dict:
+    return {
+        "sync": sync_pool_metrics.snapshot(engine.pool),
+        "async": async_pool_metrics.snapshot(async_engine.sync_engine.pool),
+    }
+
 
 class Base(DeclarativeBase):
     pass
@@ -18,3 +164,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,9 +1,11 @@
 import asyncio
+import json
 from contextlib import asynccontextmanager
 from datetime import datetime
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
@@ -11,8 +13,9 @@ from slowapi.middleware import SlowAPIMiddleware
 
 from app.cache import create_redis
 from app.config import settings
-from app.database import SessionLocal
+from app.database import AsyncSessionLocal, SessionLocal, async_engine, pool_stats
 from app.limiter import limiter
+from app.readiness import check_readiness
 from app.routers import agent as agent_router
 from app.routers import analyzer as analyzer_router
 from app.routers import backtest as backtest_router
@@ -27,12 +30,15 @@ from app.services.analyzer_service import AnalyzerService
 from app.services.backtester import VectorizedBacktester
 from app.services.data_service import DataService
 from app.services.llm_client import get_llm
+from app.services.market_data import LocalFileProvider
 from app.services.ocr_service import OCRService
 from app.services.optimizer import PortfolioOptimizer
+from app.services.price_archive import PriceArchive
 from app.services.regime_service import MODEL_PATH, RegimeService
 from app.services.risk_service import RiskService
 from app.services.snapshot_service import SnapshotService
-from app.tasks.price_sync import sync_prices
+from app.tasks.cache_warmup import WarmupState, sync_and_warm, warm_caches
+from app.tasks.price_sync import LAST_RUN_KEY
 from app.tasks.regime_update import update_regime
 from app.tasks.snapshot_cleanup import cleanup_snapshots
 
@@ -43,7 +49,22 @@ scheduler = AsyncIOScheduler()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     app.state.redis = create_redis()
-    app.state.data_service = DataService(app.state.redis, SessionLocal)
+    app.state.data_service = DataService(
+        app.state.redis,
+        SessionLocal,
+        distributed_locks=settings.DISTRIBUTED_FETCH_LOCKS,
+        async_session_factory=AsyncSessionLocal,
+        provider=(
+            LocalFileProvider(settings.MARKET_DATA_DIR)
+            if settings.MARKET_DATA_DIR
+            else None
+        ),
+        archive=(
+            PriceArchive(settings.PRICE_ARCHIVE_DIR)
+            if settings.PRICE_ARCHIVE_DIR
+            else None
+        ),
+    )
     app.state.regime_service = RegimeService(app.state.data_service, SessionLocal)
 
     risk_svc = RiskService()
@@ -55,6 +76,7 @@ async def lifespan(app: FastAPI):
         llm_factory=get_llm,
         session_factory=SessionLocal,
         redis=app.state.redis,
+        async_session_factory=AsyncSessionLocal,
     )
     app.state.ocr_service = ocr_svc
 
@@ -86,13 +108,22 @@ async def lifespan(app: FastAPI):
         agent=agent,
         ocr=ocr_svc,
     )
-    app.state.snapshot_service = SnapshotService(SessionLocal)
+    app.state.snapshot_service = SnapshotService(
+        SessionLocal, async_session_factory=AsyncSessionLocal
+    )
+
+    app.state.warmup = WarmupState()
+    app.state.warmup_task = asyncio.create_task(
+        warm_caches(data_svc, regime_svc, SessionLocal, app.state.warmup)
+    )
 
+    # warm_caches only reads what is stored; the first sync runs at startup
+    # so a deploy does not serve prices up to an hour stale.
     scheduler.add_job(
-        sync_prices,
+        sync_and_warm,
         "interval",
         hours=1,
-        args=[app.state.data_service],
+        args=[data_svc, regime_svc, SessionLocal, app.state.warmup],
         next_run_time=datetime.utcnow(),
         id="price_sync",
         replace_existing=True,
@@ -121,8 +152,10 @@ async def lifespan(app: FastAPI):
     try:
         yield
     finally:
+        app.state.warmup_task.cancel()
         scheduler.shutdown(wait=False)
         await app.state.redis.aclose()
+        await async_engine.dispose()
 
 
 app = FastAPI(title="QuantFusion API", lifespan=lifespan)
@@ -152,3 +185,20 @@ app.include_router(document_router.router, prefix="/api/documents", tags=["docum
 @app.api_route("/api/health", methods=["GET", "HEAD"])
 def health() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@app.api_route("/api/ready", methods=["GET", "HEAD"])
+async def ready() -> JSONResponse:
+    status_code, body = await check_readiness(app.state, async_engine, scheduler)
+    return JSONResponse(body, status_code=status_code)
+
+
+@app.get("/api/health/db-pool")
+def db_pool_health() -> dict[str, dict]:
+    return pool_stats()
+
+
+@app.get("/api/health/price-sync")
+async def price_sync_health() -> dict:
+    raw = await app.state.redis.get(LAST_RUN_KEY)
+    return json.loads(raw) if raw else {"status": "never_run"}
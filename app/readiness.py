@@ -0,0 +1,133 @@
+"""Readiness checks behind ``/api/ready``.
+
+Unlike ``/api/health`` (process is up), readiness measures round-trip latency
+to Redis and Postgres and inspects the regime model, cache warmup and
+scheduler so an orchestrator can stop routing to a slow or cold replica.
+A failed dependency or unfinished warmup is ``unavailable``; latency or lag
+past the READY_* thresholds is ``degraded``.
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+
+from apscheduler.schedulers.base import BaseScheduler
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+from app.tasks.price_sync import LAST_RUN_KEY
+
+
+READY = "ready"
+DEGRADED = "degraded"
+UNAVAILABLE = "unavailable"
+
+
+async def check_readiness(
+    state: Any, engine: AsyncEngine, scheduler: BaseScheduler | None
+) -> tuple[int, dict]:
+    """Return ``(http_status, body)`` for the app state of one replica."""
+    redis = getattr(state, "redis", None)
+    redis_probe, db_probe = await asyncio.gather(
+        _probe(redis.ping if redis is not None else None),
+        _probe(lambda: _db_ping(engine)),
+    )
+    checks = {
+        "redis": _latency_check(redis_probe, settings.READY_REDIS_MAX_MS),
+        "postgres": _latency_check(db_probe, settings.READY_DB_MAX_MS),
+        "cache": _cache_check(state),
+        "regime_model": _model_check(state),
+        "scheduler": _scheduler_check(scheduler),
+    }
+    if redis is not None and redis_probe["ok"]:
+        checks["price_sync"] = await _price_sync_check(redis)
+
+    statuses = {check["status"] for check in checks.values()}
+    if UNAVAILABLE in statuses:
+        status, code = UNAVAILABLE, 503
+    elif DEGRADED in statuses:
+        status, code = DEGRADED, settings.READY_DEGRADED_STATUS_CODE
+    else:
+        status, code = READY, 200
+    return code, {"status": status, "checks": checks}
+
+
+async def _probe(fn: Callable[[], Awaitable[Any]] | None) -> dict:
+    if fn is None:
+        return {"ok": False, "error": "not configured"}
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(fn(), timeout=settings.READY_PROBE_TIMEOUT)
+    except asyncio.TimeoutError:
+        return {"ok": False, "error": f"timed out after {settings.READY_PROBE_TIMEOUT}s"}
+    except Exception as exc:
+        return {"ok": False, "error": repr(exc)}
+    return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+
+async def _db_ping(engine: AsyncEngine) -> None:
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+def _latency_check(probe: dict, max_ms: float) -> dict:
+    if not probe["ok"]:
+        return {"status": UNAVAILABLE, "error": probe["error"]}
+    status = DEGRADED if probe["latency_ms"] > max_ms else READY
+    return {"status": status, "latency_ms": probe["latency_ms"], "max_ms": max_ms}
+
+
+def _cache_check(state: Any) -> dict:
+    warmup = getattr(state, "warmup", None)
+    data_service = getattr(state, "data_service", None)
+    check: dict = {
+        "status": READY if warmup is not None and warmup.ready else UNAVAILABLE,
+        "warmup": warmup.as_dict() if warmup is not None else None,
+    }
+    if data_service is not None:
+        check.update(data_service.cache_stats())
+    return check
+
+
+def _model_check(state: Any) -> dict:
+    regime_service = getattr(state, "regime_service", None)
+    loaded = regime_service is not None and regime_service.model_loaded
+    return {"status": READY if loaded else DEGRADED, "loaded": loaded}
+
+
+def _scheduler_check(scheduler: BaseScheduler | None) -> dict:
+    if scheduler is None or not scheduler.running:
+        return {"status": DEGRADED, "running": False}
+    now = datetime.now(tz=timezone.utc)
+    jobs = {}
+    status = READY
+    for job in scheduler.get_jobs():
+        next_run = job.next_run_time
+        lag = max(0.0, (now - next_run).total_seconds()) if next_run else None
+        jobs[job.id] = {
+            "next_run": next_run.isoformat() if next_run else None,
+            "lag_s": round(lag, 1) if lag is not None else None,
+        }
+        if lag is not None and lag > settings.READY_JOB_MAX_LAG_S:
+            status = DEGRADED
+    return {"status": status, "running": True, "jobs": jobs}
+
+
+async def _price_sync_check(redis) -> dict:
+    raw = await redis.get(LAST_RUN_KEY)
+    if not raw:
+        # Nothing to compare yet on a fresh deployment.
+        return {"status": READY, "last_run": None}
+    run = json.loads(raw)
+    finished = datetime.fromisoformat(run["finished_at"])
+    age = (datetime.now(tz=timezone.utc) - finished).total_seconds()
+    status = DEGRADED if age > settings.READY_PRICE_SYNC_MAX_AGE_S else READY
+    return {
+        "status": status,
+        "age_s": round(age, 1),
+        "failed": len(run.get("failed", [])),
+        "lagging": len(run.get("lagging", {})),
+    }
@@ -3,9 +3,10 @@
 import asyncio
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 
+from app.columnar import columnar_response, negotiate
 from app.database import get_db
 from app.limiter import limiter
 from app.schemas.backtest import (
@@ -48,20 +49,22 @@ async def _fetch_returns_with_benchmark(
 
 @router.post("/run/{portfolio_id}", response_model=BacktestResult)
 async def backtest_run_demo(
+    request: Request,
     portfolio_id: uuid.UUID,
     body: BacktestRunRequest | None = None,
     db: Session = Depends(get_db),
     data: DataService = Depends(get_data_service),
-) -> BacktestResult:
+) -> BacktestResult | Response:
     body = body or BacktestRunRequest(portfolio_id=portfolio_id)
     weights = load_holdings(db, portfolio_id)
     returns, benchmark = await _fetch_returns_with_benchmark(
         data, list(weights.keys()), _trading_days(body.lookback_years)
     )
-    return await asyncio.to_thread(
+    result = await asyncio.to_thread(
         _run_sync, weights, returns, 10_000.0,
         body.rebalance_freq, body.transaction_cost_bps, benchmark,
     )
+    return _respond(request, result)
 
 
 @router.post("/run", response_model=BacktestResult)
@@ -70,15 +73,16 @@ async def backtest_run_stateless(
     request: Request,
     body: BacktestStatelessRequest,
     data: DataService = Depends(get_data_service),
-) -> BacktestResult:
+) -> BacktestResult | Response:
     weights = {h.ticker: h.weight for h in body.holdings}
     returns, benchmark = await _fetch_returns_with_benchmark(
         data, list(weights.keys()), _trading_days(body.lookback_years)
     )
-    return await asyncio.to_thread(
+    result = await asyncio.to_thread(
         _run_sync, weights, returns, 10_000.0,
         body.rebalance_freq, body.transaction_cost_bps, benchmark,
     )
+    return _respond(request, result)
 
 
 @router.post("/compare", response_model=CompareResult)
@@ -87,7 +91,7 @@ async def backtest_compare(
     request: Request,
     body: CompareRequest,
     data: DataService = Depends(get_data_service),
-) -> CompareResult:
+) -> CompareResult | Response:
     all_tickers = {h.ticker for p in body.portfolios for h in p.holdings}
     returns_full, benchmark = await _fetch_returns_with_benchmark(
         data, list(all_tickers), _trading_days(body.lookback_years)
@@ -116,4 +120,37 @@ async def backtest_compare(
         10_000.0, body.rebalance_freq, 0.0, benchmark,
     )
 
-    return CompareResult(results=results, benchmark_metrics=benchmark_only.metrics)
+    compare = CompareResult(results=results, benchmark_metrics=benchmark_only.metrics)
+    media_type = negotiate(request)
+    if media_type is not None:
+        return columnar_response(
+            media_type,
+            _equity_columns(results),
+            {
+                "results": [_result_meta(r) for r in results],
+                "benchmark_metrics": compare.benchmark_metrics.model_dump(mode="json"),
+            },
+        )
+    return compare
+
+
+def _respond(request: Request, result: BacktestResult):
+    media_type = negotiate(request)
+    if media_type is None:
+        return result
+    return columnar_response(media_type, _equity_columns([result]), _result_meta(result))
+
+
+def _equity_columns(results: list[BacktestResult]) -> dict:
+    # Long format: one row per (portfolio, date); portfolio indexes `results`.
+    curves = [r.equity_curve for r in results]
+    return {
+        "portfolio": [i for i, curve in enumerate(curves) for _ in curve],
+        "date": [p.date for curve in curves for p in curve],
+        "value": [p.value for curve in curves for p in curve],
+        "benchmark_value": [p.benchmark_value for curve in curves for p in curve],
+    }
+
+
+def _result_meta(result: BacktestResult) -> dict:
+    return result.model_dump(mode="json", exclude={"equity_curve"})
@@ -1,10 +1,15 @@
 
 
+import json
 from datetime import date
+from typing import AsyncIterator, Literal
 
+import numpy as np
 import pandas as pd
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 
+from app.columnar import columnar_response, negotiate
 from app.schemas.market import (
     FundamentalsResponse,
     PricePoint,
@@ -17,6 +22,10 @@ from app.services.data_service import DataService, LOOKBACK_DEFAULT
 
 router = APIRouter()
 
+# Tickers fetched per round-trip when streaming, so the first series goes
+# out before the whole universe is loaded.
+STREAM_BATCH_TICKERS = 20
+
 
 def get_data_service(request: Request) -> DataService:
     return request.app.state.data_service
@@ -31,12 +40,35 @@ def _parse_tickers(raw: str) -> list[str]:
 
 @router.get("/prices", response_model=list[PriceSeriesResponse])
 async def get_prices(
+    request: Request,
     tickers: str = Query(..., description="Comma-separated ticker list, e.g. JEPI,VOO"),
     lookback_days: int = Query(LOOKBACK_DEFAULT, ge=1, le=2520),
+    response_format: Literal["rows", "columnar", "ndjson"] = Query(
+        "rows",
+        alias="format",
+        description=(
+            "rows: list of per-day points (default). columnar: one "
+            '{"ticker", "ts": [...], "close": [...], ...} object per ticker. '
+            "ndjson: the columnar objects streamed one per line."
+        ),
+    ),
     data: DataService = Depends(get_data_service),
-) -> list[PriceSeriesResponse]:
+):
     ticker_list = _parse_tickers(tickers)
+    if response_format == "ndjson":
+        return StreamingResponse(
+            _stream_columnar(data, ticker_list, lookback_days),
+            media_type="application/x-ndjson",
+        )
+
     detail = await data.get_prices_detail(ticker_list, lookback_days=lookback_days)
+    media_type = negotiate(request)
+    if media_type is not None:
+        return columnar_response(media_type, _price_columns(detail, ticker_list))
+    if response_format == "columnar":
+        return JSONResponse(
+            [_columnar(t, detail[t]) for t in ticker_list if t in detail]
+        )
     if not detail:
         return []
 
@@ -77,6 +109,51 @@ async def get_fundamentals(
     return FundamentalsResponse(ticker=ticker.upper(), **info)
 
 
+async def _stream_columnar(
+    data: DataService, tickers: list[str], lookback_days: int
+) -> AsyncIterator[bytes]:
+    for i in range(0, len(tickers), STREAM_BATCH_TICKERS):
+        batch = tickers[i : i + STREAM_BATCH_TICKERS]
+        detail = await data.get_prices_detail(batch, lookback_days=lookback_days)
+        for ticker in batch:
+            if ticker in detail:
+                line = json.dumps(_columnar(ticker, detail[ticker]), separators=(",", ":"))
+                yield line.encode() + b"\n"
+
+
+def _price_columns(detail: dict[str, pd.DataFrame], tickers: list[str]) -> dict:
+    present = [t for t in tickers if t in detail]
+    if not present:
+        return {
+            "ticker": pd.Series([], dtype=str),
+            "ts": np.array([], dtype="datetime64[D]"),
+            "close": np.array([], dtype=float),
+            "adj_close": np.array([], dtype=float),
+            "volume": pd.Series([], dtype="Int64"),
+        }
+    df = pd.concat([detail[t] for t in present], ignore_index=True)
+    close = df["close"].astype(float)
+    return {
+        "ticker": pd.Series(np.repeat(present, [len(detail[t]) for t in present])),
+        "ts": pd.to_datetime(df["ts"]).to_numpy(),
+        "close": close.to_numpy(),
+        "adj_close": df["adj_close"].astype(float).fillna(close).to_numpy(),
+        "volume": pd.to_numeric(df["volume"], errors="coerce").astype("Int64"),
+    }
+
+
+def _columnar(ticker: str, df: pd.DataFrame) -> dict:
+    close = df["close"].astype(float)
+    volume = pd.to_numeric(df["volume"], errors="coerce").astype("Int64")
+    return {
+        "ticker": ticker,
+        "ts": pd.to_datetime(df["ts"]).dt.strftime("%Y-%m-%d").tolist(),
+        "close": close.tolist(),
+        "adj_close": df["adj_close"].astype(float).fillna(close).tolist(),
+        "volume": volume.astype(object).where(volume.notna(), None).tolist(),
+    }
+
+
 def _to_date(idx) -> date:
     if isinstance(idx, pd.Timestamp):
         return idx.date()
@@ -17,7 +17,7 @@ from app.schemas.optimization import (
 )
 from app.services.data_service import DataService, LOOKBACK_DEFAULT
 from app.services.ocr_service import OCRService
-from app.services.optimizer import PortfolioOptimizer
+from app.services.optimizer import OptimizerInputError, PortfolioOptimizer
 from app.services.portfolio_loader import load_holdings
 from app.services.regime_service import RegimeService
 
@@ -68,27 +68,32 @@ async def _run_optimization(
     risk_aversion: float = 2.5,
     regime_probabilities: dict[str, float] | None = None,
     earnings: dict | None = None,
+    solver: str = "auto",
 ) -> OptimizationResult:
-    returns = await data.get_returns(tickers, lookback_days=LOOKBACK_DEFAULT)
+    stats = await data.get_return_stats(tickers, lookback_days=LOOKBACK_DEFAULT)
+    returns, cov = stats.returns, stats.cov
     if returns.empty or len(returns.columns) < 2:
         raise HTTPException(status_code=422, detail="Insufficient return data")
-    cov = returns.cov().values * 252
     rf = await data.get_risk_free_rate()
 
     def _solve() -> OptimizationResult:
         if method == "mvo":
             return optimizer.mvo(
                 returns, cov, target=target or "max_sharpe",
-                constraints=constraints_dict, rf=rf,
+                constraints=constraints_dict, rf=rf, solver=solver,
             )
         if method == "risk_parity":
-            return optimizer.risk_parity(cov, list(returns.columns), returns=returns, rf=rf)
+            return optimizer.risk_parity(
+                cov, list(returns.columns), returns=returns, rf=rf,
+                risk_budgets=(constraints_dict or {}).get("risk_budgets"),
+                portfolio=tickers,
+            )
         if method == "black_litterman":
             caps = {}
             return optimizer.black_litterman(
                 caps, cov, list(returns.columns),
                 views=views, risk_aversion=risk_aversion,
-                returns=returns, rf=rf,
+                returns=returns, rf=rf, solver=solver,
             )
         if method == "regime_blended":
             if not regime_probabilities:
@@ -101,6 +106,7 @@ async def _run_optimization(
                 regime_probabilities=regime_probabilities,
                 rf=rf,
                 constraints=constraints_dict,
+                solver=solver,
             )
         if method == "earnings_tilt":
             if not regime_probabilities:
@@ -114,16 +120,15 @@ async def _run_optimization(
                 earnings=earnings,
                 rf=rf,
                 constraints=constraints_dict,
+                solver=solver,
             )
         raise HTTPException(status_code=400, detail=f"Unknown method: {method}")
 
     if method == "black_litterman":
-        fundamentals = await asyncio.gather(
-            *[data.get_fundamentals(t) for t in returns.columns]
-        )
+        fundamentals = await data.get_fundamentals_many(list(returns.columns))
         caps = {
             t: f.get("market_cap")
-            for t, f in zip(returns.columns, fundamentals)
+            for t, f in fundamentals.items()
             if f.get("market_cap")
         }
 
@@ -131,12 +136,16 @@ async def _run_optimization(
             return optimizer.black_litterman(
                 caps, cov, list(returns.columns),
                 views=views, risk_aversion=risk_aversion,
-                returns=returns, rf=rf,
+                returns=returns, rf=rf, solver=solver,
             )
 
-        return await asyncio.to_thread(_bl_solve)
-
-    return await asyncio.to_thread(_solve)
+        solve = _bl_solve
+    else:
+        solve = _solve
+    try:
+        return await asyncio.to_thread(solve)
+    except OptimizerInputError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
 
 @router.post("/run", response_model=OptimizationResult)
@@ -149,7 +158,9 @@ async def optimize_run(
 ) -> OptimizationResult:
     weights = load_holdings(db, body.portfolio_id)
     tickers = list(weights.keys())
-    constraints_dict = body.constraints.model_dump() if body.constraints else None
+    constraints_dict = (
+        body.constraints.model_dump(exclude_unset=True) if body.constraints else None
+    )
     views_dict = [v.model_dump() for v in body.views] if body.views else None
 
     regime_probs = None
@@ -172,6 +183,7 @@ async def optimize_run(
         risk_aversion=body.risk_aversion,
         regime_probabilities=regime_probs,
         earnings=earnings,
+        solver=body.solver,
     )
 
     db.add(
@@ -196,7 +208,9 @@ async def optimize_stateless(
     ocr_service: OCRService | None = Depends(get_ocr_service),
 ) -> OptimizationResult:
     tickers = [h.ticker for h in body.holdings]
-    constraints_dict = body.constraints.model_dump() if body.constraints else None
+    constraints_dict = (
+        body.constraints.model_dump(exclude_unset=True) if body.constraints else None
+    )
     views_dict = [v.model_dump() for v in body.views] if body.views else None
 
     regime_probs = None
@@ -219,6 +233,7 @@ async def optimize_stateless(
         risk_aversion=body.risk_aversion,
         regime_probabilities=regime_probs,
         earnings=earnings,
+        solver=body.solver,
     )
 
 
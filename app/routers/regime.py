@@ -5,7 +5,7 @@ from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, HTTPException, Query, Request
 from sqlalchemy import desc, select
 
-from app.database import SessionLocal
+from app.database import AsyncSessionLocal
 from app.models import RegimeSnapshot
 from app.schemas.regime import RegimeHistoryResponse, RegimeSnapshotResponse
 from app.services.regime_service import RegimeService
@@ -20,9 +20,11 @@ def get_regime_service(request: Request) -> RegimeService:
 
 @router.get("/current", response_model=RegimeSnapshotResponse)
 async def get_current(request: Request) -> RegimeSnapshotResponse:
-    with SessionLocal() as db:
-        latest = db.execute(
-            select(RegimeSnapshot).order_by(desc(RegimeSnapshot.ts)).limit(1)
+    async with AsyncSessionLocal() as db:
+        latest = (
+            await db.execute(
+                select(RegimeSnapshot).order_by(desc(RegimeSnapshot.ts)).limit(1)
+            )
         ).scalar_one_or_none()
 
     if latest is not None:
@@ -51,11 +53,13 @@ async def get_history(
     days: int = Query(730, ge=1, le=3650),
 ) -> RegimeHistoryResponse:
     cutoff = datetime.now(tz=timezone.utc) - timedelta(days=days)
-    with SessionLocal() as db:
-        rows = db.execute(
-            select(RegimeSnapshot)
-            .where(RegimeSnapshot.ts >= cutoff)
-            .order_by(desc(RegimeSnapshot.ts))
+    async with AsyncSessionLocal() as db:
+        rows = (
+            await db.execute(
+                select(RegimeSnapshot)
+                .where(RegimeSnapshot.ts >= cutoff)
+                .order_by(desc(RegimeSnapshot.ts))
+            )
         ).scalars().all()
     snapshots: list[RegimeSnapshotResponse] = []
     for r in rows:
@@ -2,9 +2,10 @@
 
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 
+from app.columnar import columnar_response, negotiate
 from app.database import get_db
 from app.limiter import limiter
 from app.schemas.common import PortfolioInput
@@ -60,20 +61,32 @@ async def get_var(
     "/{portfolio_id}/efficient_frontier", response_model=EfficientFrontierResponse
 )
 async def get_efficient_frontier(
+    request: Request,
     portfolio_id: uuid.UUID,
     db: Session = Depends(get_db),
     data: DataService = Depends(get_data_service),
-) -> EfficientFrontierResponse:
+) -> EfficientFrontierResponse | Response:
     weights = load_holdings(db, portfolio_id)
     tickers = list(weights.keys())
-    returns = await data.get_returns(tickers, lookback_days=LOOKBACK_DEFAULT)
+    stats = await data.get_return_stats(tickers, lookback_days=LOOKBACK_DEFAULT)
+    returns, cov = stats.returns, stats.cov
     if returns.empty or len(returns.columns) < 2:
         raise HTTPException(status_code=422, detail="Insufficient return data")
-    cov = returns.cov().values * 252
     rf = await data.get_risk_free_rate()
     points = optimizer.efficient_frontier(
         returns, cov, n=150, rf=rf, current_weights=weights
     )
+    media_type = negotiate(request)
+    if media_type is not None:
+        columns: dict[str, list] = {
+            "expected_return": [p.expected_return for p in points],
+            "volatility": [p.volatility for p in points],
+            "sharpe": [p.sharpe for p in points],
+            "kind": [p.kind for p in points],
+        }
+        for ticker in returns.columns:
+            columns[f"weight:{ticker}"] = [p.weights.get(ticker, 0.0) for p in points]
+        return columnar_response(media_type, columns)
     return EfficientFrontierResponse(points=points)
 
 
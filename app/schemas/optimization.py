@@ -3,13 +3,14 @@
 import uuid
 from typing import Any, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 from app.schemas.common import HoldingInput
 
 
 Method = Literal["mvo", "risk_parity", "black_litterman", "regime_blended", "earnings_tilt"]
 Target = Literal["max_sharpe", "min_vol", "target_return"]
+Solver = Literal["auto", "slsqp", "cvxpy"]
 
 
 class ViewInput(BaseModel):
@@ -23,6 +24,18 @@ class Constraints(BaseModel):
     max_weight: float = 0.60
     target_return: float | None = None
     sector_limits: dict[str, float] | None = None
+    # Relative risk contribution per ticker for risk_parity; unlisted
+    # tickers get the mean of the listed budgets.
+    risk_budgets: dict[str, float] | None = None
+
+    @field_validator("risk_budgets")
+    @classmethod
+    def _positive_budgets(cls, v: dict[str, float] | None) -> dict[str, float] | None:
+        if v is None:
+            return None
+        if any(b <= 0 for b in v.values()):
+            raise ValueError("risk_budgets must be positive")
+        return {t.strip().upper(): b for t, b in v.items()}
 
 
 class OptimizationResult(BaseModel):
@@ -36,6 +49,10 @@ class OptimizationResult(BaseModel):
     regime_weights: dict[str, float] | None = None
     components: dict[str, dict[str, float]] | None = None
     earnings_signals: dict[str, dict] | None = None
+    # Solver diagnostics for risk_parity: steps taken and the largest gap
+    # between a risk contribution and its budget.
+    iterations: int | None = None
+    residual: float | None = None
 
 
 class OptimizeRunRequest(BaseModel):
@@ -46,6 +63,7 @@ class OptimizeRunRequest(BaseModel):
     views: list[ViewInput] | None = None
     risk_aversion: float = 2.5
     regime_probabilities: dict[str, float] | None = None
+    solver: Solver = "auto"
 
 
 class OptimizeStatelessRequest(BaseModel):
@@ -56,6 +74,7 @@ class OptimizeStatelessRequest(BaseModel):
     views: list[ViewInput] | None = None
     risk_aversion: float = 2.5
     regime_probabilities: dict[str, float] | None = None
+    solver: Solver = "auto"
 
 
 class FrontierPoint(BaseModel):
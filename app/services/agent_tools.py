@@ -61,10 +61,10 @@ async def optimize_tool(
 ) -> dict[str, Any]:
     weights = await asyncio.to_thread(_load_holdings, session_factory, portfolio_id)
     tickers = list(weights.keys())
-    returns = await data.get_returns(tickers, lookback_days=LOOKBACK_DEFAULT)
+    stats = await data.get_return_stats(tickers, lookback_days=LOOKBACK_DEFAULT)
+    returns, cov = stats.returns, stats.cov
     if returns.empty or len(returns.columns) < 2:
         return {"error": "insufficient return data"}
-    cov = returns.cov().values * 252
     rf = await data.get_risk_free_rate()
 
     def _solve():
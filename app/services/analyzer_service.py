@@ -46,22 +46,22 @@ class AnalyzerService:
         tickers = [h.ticker for h in holdings]
         weights = {h.ticker: h.weight for h in holdings}
 
-        returns_full, fundamentals_list, rf = await asyncio.gather(
-            self.data.get_returns([*tickers, "SPY"], lookback_days=756),
-            asyncio.gather(*[self.data.get_fundamentals(t) for t in tickers]),
+        stats_full, fundamentals, rf = await asyncio.gather(
+            self.data.get_return_stats([*tickers, "SPY"], lookback_days=756),
+            self.data.get_fundamentals_many(tickers),
             self.data.get_risk_free_rate(),
         )
-        fundamentals = dict(zip(tickers, fundamentals_list))
+        returns_full = stats_full.returns
 
         if returns_full.empty:
             raise ValueError("No return data available for the requested tickers")
 
         user_cols = [t for t in tickers if t in returns_full.columns]
-        returns = returns_full[user_cols]
+        user_stats = stats_full.subset(user_cols)
+        returns, cov = user_stats.returns, user_stats.cov
         benchmark = (
             returns_full["SPY"] if "SPY" in returns_full.columns else None
         )
-        cov = returns.cov().values * 252
 
         regime_task = (
             self.regime.predict_current() if self.regime is not None else _none_async()
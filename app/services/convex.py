@@ -0,0 +1,163 @@
+"""cvxpy backend for mean-variance optimization.
+
+Problems are built once per (target, universe size) with mu, the covariance
+factor and the weight bounds as cvxpy Parameters, so later solves only
+re-bind parameter values and skip canonicalization. Variance enters as
+``sum_squares(F @ w)`` with ``F'F = Σ``, which keeps the problems DPP. The
+n x n factor parameter makes DPP compilation grow quickly with n, so above
+PARAMETRIC_MAX_ASSETS the problem is rebuilt per solve with the covariance as
+a constant, which is cheaper there than re-binding.
+Max-Sharpe uses the homogenized form
+
+    min ||F y||²  s.t.  (mu - rf)'y = 1,  1'y = k,  lower k <= y <= upper k,  k >= 0
+
+with w = y / k, which is exact whenever some feasible portfolio beats rf.
+"""
+
+import threading
+from collections import OrderedDict
+
+import cvxpy as cp
+import numpy as np
+
+
+SOLVER = cp.CLARABEL
+# Measured crossover where re-binding a compiled n x n factor costs more than
+# canonicalizing a fresh problem (~19 ms vs ~18 ms at 80 assets).
+PARAMETRIC_MAX_ASSETS = 64
+# Compiled problems kept per (target, n); each holds its canonicalization.
+MAX_CACHED_PROBLEMS = 32
+
+
+class _Compiled:
+    def __init__(self, problem: cp.Problem, variables: dict, params: dict):
+        self.problem = problem
+        self.variables = variables
+        self.params = params
+        self.lock = threading.Lock()
+
+
+_problems: OrderedDict[tuple[str, int], _Compiled] = OrderedDict()
+_problems_lock = threading.Lock()
+
+
+def solve_mvo(
+    target: str,
+    mu: np.ndarray,
+    sigma: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    rf: float = 0.0,
+    target_return: float | None = None,
+) -> np.ndarray | None:
+    """Optimal weights, or None when the solver does not reach optimality
+    (callers fall back to SLSQP)."""
+    n = len(mu)
+    args = (target, mu, sigma, lower, upper, rf, target_return)
+    if n > PARAMETRIC_MAX_ASSETS:
+        return _solve(_build(target, n, sigma=sigma), *args)
+    compiled = _compiled(target, n)
+    with compiled.lock:
+        return _solve(compiled, *args)
+
+
+def _solve(
+    compiled: _Compiled,
+    target: str,
+    mu: np.ndarray,
+    sigma: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    rf: float,
+    target_return: float | None,
+) -> np.ndarray | None:
+    p = compiled.params
+    if "factor" in p:
+        p["factor"].value = _cov_factor(sigma)
+    p["lower"].value = np.asarray(lower, dtype=float)
+    p["upper"].value = np.asarray(upper, dtype=float)
+    if target == "max_sharpe":
+        p["excess"].value = np.asarray(mu, dtype=float) - rf
+    elif target == "target_return":
+        p["mu"].value = np.asarray(mu, dtype=float)
+        p["target"].value = float(target_return)
+    try:
+        compiled.problem.solve(solver=SOLVER)
+    except cp.error.SolverError:
+        return None
+    if compiled.problem.status != cp.OPTIMAL:
+        return None
+    if target == "max_sharpe":
+        kappa = float(compiled.variables["kappa"].value)
+        if kappa <= 0:
+            return None
+        w = compiled.variables["y"].value / kappa
+    else:
+        w = compiled.variables["w"].value
+    w = np.clip(w, lower, upper)
+    return w / w.sum()
+
+
+def _compiled(target: str, n: int) -> _Compiled:
+    key = (target, n)
+    with _problems_lock:
+        compiled = _problems.get(key)
+        if compiled is not None:
+            _problems.move_to_end(key)
+            return compiled
+    compiled = _build(target, n)
+    with _problems_lock:
+        compiled = _problems.setdefault(key, compiled)
+        while len(_problems) > MAX_CACHED_PROBLEMS:
+            _problems.popitem(last=False)
+    return compiled
+
+
+def _build(target: str, n: int, sigma: np.ndarray | None = None) -> _Compiled:
+    lower = cp.Parameter(n, name="lower")
+    upper = cp.Parameter(n, name="upper")
+    params = {"lower": lower, "upper": upper}
+    if sigma is None:
+        factor = cp.Parameter((n, n), name="factor")
+        params["factor"] = factor
+
+        def variance(x):
+            return cp.sum_squares(factor @ x)
+
+    else:
+        sigma = cp.psd_wrap((sigma + sigma.T) / 2.0)
+
+        def variance(x):
+            return cp.quad_form(x, sigma)
+
+    if target == "max_sharpe":
+        y = cp.Variable(n, name="y")
+        kappa = cp.Variable(name="kappa", nonneg=True)
+        excess = cp.Parameter(n, name="excess")
+        params["excess"] = excess
+        problem = cp.Problem(
+            cp.Minimize(variance(y)),
+            [
+                excess @ y == 1,
+                cp.sum(y) == kappa,
+                y >= cp.multiply(lower, kappa),
+                y <= cp.multiply(upper, kappa),
+            ],
+        )
+        return _Compiled(problem, {"y": y, "kappa": kappa}, params)
+
+    w = cp.Variable(n, name="w")
+    constraints = [cp.sum(w) == 1, w >= lower, w <= upper]
+    if target == "target_return":
+        mu = cp.Parameter(n, name="mu")
+        target_return = cp.Parameter(name="target")
+        params.update({"mu": mu, "target": target_return})
+        constraints.append(mu @ w == target_return)
+    problem = cp.Problem(cp.Minimize(variance(w)), constraints)
+    return _Compiled(problem, {"w": w}, params)
+
+
+def _cov_factor(sigma: np.ndarray) -> np.ndarray:
+    # Eigen-factor rather than Cholesky so singular sample covariances work.
+    vals, vecs = np.linalg.eigh((sigma + sigma.T) / 2.0)
+    return (vecs * np.sqrt(np.clip(vals, 0.0, None))).T
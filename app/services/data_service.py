@@ -1,8 +1,15 @@
 
 
 import asyncio
+import base64
+import io
 import json
 import logging
+import struct
+import time
+import zlib
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from typing import Iterable
 
@@ -10,105 +17,779 @@ import numpy as np
 import pandas as pd
 import yfinance as yf
 from redis.asyncio import Redis
-from sqlalchemy import select
+from sqlalchemy import String, column, delete, exists, func, select, values
 from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 
+from app.cache import LRUCache, SingleFlight
 from app.models import PriceHistory
+from app.services.market_calendar import ExchangeCalendar
+from app.services.market_data import MarketDataProvider, is_rebased
+from app.services.ocr_service import CIK_CACHE_KEY
+from app.services.price_archive import PriceArchive
 
 
 logger = logging.getLogger(__name__)
 
-CACHE_TTL_PRICES = 3600
+# Price entries are cached until the next session's bar is due (see
+# ExchangeCalendar). Entries that are behind because the provider has not
+# published the bar yet are retried after PRICE_RETRY_TTL.
+PRICE_RETRY_TTL = 600
+PRICE_MIN_TTL = 60
 CACHE_TTL_FUNDAMENTALS = 86400
+# Fundamentals older than CACHE_TTL_FUNDAMENTALS are still served for up to
+# FUNDAMENTALS_STALE_TTL while a background refresh runs. Provider failures
+# are cached briefly so a bad ticker is not retried on every request.
+FUNDAMENTALS_STALE_TTL = 6 * 86400
+FUNDAMENTALS_NEGATIVE_TTL = 900
+FUNDAMENTALS_CONCURRENCY = 8
+# Ticker validation verdicts. Symbols already in price_history or the EDGAR
+# map are trusted; only unknown ones cost a provider round-trip.
+VALIDATION_TTL_VALID = 7 * 86400
+VALIDATION_TTL_INVALID = 3600
+VALIDATION_CONCURRENCY = 8
+# Decoded price entries kept in-process in front of Redis. The TTL is short
+# so other workers' writes are picked up promptly.
+MEMORY_CACHE_BYTES = 64 * 1024 * 1024
+MEMORY_TTL_PRICES = 300
+# Aligned returns + annualized moments keyed by (ticker set, lookback, last
+# bar per ticker), so a new bar for any member naturally misses.
+MATRIX_CACHE_BYTES = 64 * 1024 * 1024
+MATRIX_TTL = 3600
+TRADING_DAYS = 252
+# Lookbacks beyond this are read from the Parquet archive when one is
+# configured; Postgres and the provider only supply the recent tail.
+ARCHIVE_MIN_LOOKBACK = 1260
+# Tickers seen on the request path, scored by last request time, so the
+# price-sync job can keep them warm. Each worker re-notes a ticker at most
+# once per REQUESTED_NOTE_INTERVAL.
+REQUESTED_TICKERS_KEY = "prices:requested"
+REQUESTED_NOTE_INTERVAL = 600
+PROVIDER_LOCK_TIMEOUT = 120
+PROVIDER_LOCK_WAIT = 30
 LOOKBACK_DEFAULT = 756
 
+# Redis price blob: header + int32 epoch days, float64 close, float64 adj_close
+# and int64 volume columns. The shared client decodes responses, so the frame
+# is stored base64-encoded. Legacy JSON row lists are still readable.
+# One canonical entry per ticker holds the longest history requested so far;
+# reads slice it to the requested lookback. FULL_HISTORY marks a series that
+# already starts at the provider's first bar, so any lookback is satisfied.
+PRICE_BLOB_MAGIC = b"QFPC"
+PRICE_BLOB_VERSION = 1
+_PRICE_HEADER = struct.Struct("<4sBBHI")
+_FLAG_ZLIB = 0x01
+_FLAG_FULL_HISTORY = 0x02
+_VOLUME_MISSING = np.iinfo(np.int64).min
 
-def _prices_key(ticker: str, lookback_days: int) -> str:
-    return f"prices:{ticker}:{lookback_days}"
+
+@dataclass
+class FetchStats:
+    requested: int = 0
+    memory_hits: int = 0
+    redis_hits: int = 0
+    archive_hits: int = 0
+    db_hits: int = 0
+    provider_hits: int = 0
+    coalesced: int = 0
+    misses: int = 0
+
+    def add(self, other: "FetchStats") -> None:
+        self.requested += other.requested
+        self.memory_hits += other.memory_hits
+        self.redis_hits += other.redis_hits
+        self.archive_hits += other.archive_hits
+        self.db_hits += other.db_hits
+        self.provider_hits += other.provider_hits
+        self.coalesced += other.coalesced
+        self.misses += other.misses
+
+    def __str__(self) -> str:
+        return (
+            f"requested={self.requested} memory={self.memory_hits} "
+            f"redis={self.redis_hits} archive={self.archive_hits} "
+            f"db={self.db_hits} "
+            f"provider={self.provider_hits} coalesced={self.coalesced} "
+            f"missing={self.misses}"
+        )
+
+
+# Frames at or above BULK_UPSERT_MIN_ROWS are streamed with COPY into a
+# transaction-scoped staging table and merged into price_history with a
+# single INSERT ... SELECT ... ON CONFLICT. Smaller deltas keep the plain
+# INSERT path.
+BULK_UPSERT_MIN_ROWS = 5_000
+COPY_CHUNK_ROWS = 50_000
+
+_STAGE_CREATE_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS price_history_stage (
+    ticker TEXT NOT NULL,
+    ts DATE NOT NULL,
+    close NUMERIC(18, 4) NOT NULL,
+    adj_close NUMERIC(18, 4),
+    volume BIGINT
+) ON COMMIT DROP
+"""
+_STAGE_COPY_SQL = (
+    "COPY price_history_stage (ticker, ts, close, adj_close, volume) "
+    "FROM STDIN WITH (FORMAT csv)"
+)
+_STAGE_MERGE_SQL = """
+INSERT INTO price_history (ticker, ts, close, adj_close, volume)
+SELECT DISTINCT ON (ticker, ts) ticker, ts, close, adj_close, volume
+FROM price_history_stage
+ORDER BY ticker, ts
+ON CONFLICT (ticker, ts) DO UPDATE SET
+    close = EXCLUDED.close,
+    adj_close = EXCLUDED.adj_close,
+    volume = EXCLUDED.volume
+"""
+
+
+@dataclass(frozen=True)
+class ReturnStats:
+    returns: pd.DataFrame
+    mu: np.ndarray
+    cov: np.ndarray
+
+    @classmethod
+    def from_returns(cls, returns: pd.DataFrame) -> "ReturnStats":
+        if returns.empty:
+            return cls(returns, np.empty(0), np.empty((0, 0)))
+        return cls(
+            returns,
+            returns.mean().values * TRADING_DAYS,
+            returns.cov().values * TRADING_DAYS,
+        )
+
+    @property
+    def nbytes(self) -> int:
+        frame = int(self.returns.memory_usage(index=True).sum())
+        return frame + self.mu.nbytes + self.cov.nbytes
+
+    def subset(self, tickers: list[str]) -> "ReturnStats":
+        cols = [t for t in tickers if t in self.returns.columns]
+        if cols == list(self.returns.columns):
+            return self
+        idx = [self.returns.columns.get_loc(t) for t in cols]
+        return ReturnStats(
+            self.returns[cols], self.mu[idx], self.cov[np.ix_(idx, idx)]
+        )
+
+
+def _prices_key(ticker: str) -> str:
+    return f"prices:{ticker}"
 
 
 def _fundamentals_key(ticker: str) -> str:
     return f"fundamentals:{ticker}"
 
 
+def _validation_key(ticker: str) -> str:
+    return f"validate:{ticker}"
+
+
 class DataService:
-    def __init__(self, redis: Redis, session_factory: sessionmaker):
+    def __init__(
+        self,
+        redis: Redis,
+        session_factory: sessionmaker,
+        distributed_locks: bool = False,
+        async_session_factory: async_sessionmaker | None = None,
+        provider: MarketDataProvider | None = None,
+        archive: PriceArchive | None = None,
+        calendar: ExchangeCalendar | None = None,
+    ):
         self.redis = redis
         self.session_factory = session_factory
+        self.async_session_factory = async_session_factory
+        self.provider = provider or YFinanceProvider()
+        self.archive = archive
+        self.calendar = calendar or ExchangeCalendar()
+        self.distributed_locks = distributed_locks
+        self.fetch_stats = FetchStats()
+        self._flights = SingleFlight()
+        self._memory = LRUCache(
+            MEMORY_CACHE_BYTES, MEMORY_TTL_PRICES, sizeof=_entry_nbytes
+        )
+        self._matrices = LRUCache(
+            MATRIX_CACHE_BYTES, MATRIX_TTL, sizeof=lambda s: s.nbytes
+        )
+        self._info_slots = asyncio.Semaphore(FUNDAMENTALS_CONCURRENCY)
+        self._validate_slots = asyncio.Semaphore(VALIDATION_CONCURRENCY)
+        self._refreshes: set[asyncio.Task] = set()
+        self._noted: dict[str, float] = {}
 
     async def get_prices(
         self, tickers: list[str], lookback_days: int = LOOKBACK_DEFAULT
     ) -> pd.DataFrame:
-        series: dict[str, pd.Series] = {}
+        frames = await self._get_many_tickers(tickers, lookback_days)
+        return _align_prices(frames, tickers)
+
+    async def warm(
+        self, tickers: list[str], lookback_days: int = LOOKBACK_DEFAULT
+    ) -> int:
+        """Load tickers into Redis and memory without counting them as
+        requested, so the sync job does not keep its own universe alive."""
+        return len(await self._get_many_tickers(tickers, lookback_days, note=False))
+
+    async def _get_many_tickers(
+        self, tickers: list[str], lookback_days: int, note: bool = True
+    ) -> dict[str, pd.DataFrame]:
+        tickers = list(dict.fromkeys(tickers))
+        stats = FetchStats(requested=len(tickers))
+        result: dict[str, pd.DataFrame] = {}
+        if not tickers:
+            return result
+        if note:
+            await self._note_requested(tickers)
+
+        entries = await self._read_cached(tickers, stats)
+        for ticker, (df, complete) in entries.items():
+            if complete or _covers(df, lookback_days):
+                result[ticker] = df
+
+        pending = [t for t in tickers if t not in result]
+        if pending:
+            owned: list[str] = []
+
+            async def load(keys: list[tuple[str, int]]) -> dict:
+                owned.extend(t for t, _ in keys)
+                loaded = await self._load_uncached(
+                    [t for t, _ in keys], lookback_days, entries, stats
+                )
+                return {(t, lookback_days): df for t, df in loaded.items()}
+
+            shared = await self._flights.do_many(
+                [(t, lookback_days) for t in pending], load
+            )
+            for (ticker, _), df in shared.items():
+                if df is not None:
+                    result[ticker] = df
+            stats.coalesced = len(pending) - len(owned)
+
+        for ticker, df in result.items():
+            if len(df) > lookback_days:
+                result[ticker] = df.iloc[-lookback_days:].reset_index(drop=True)
+
+        stats.misses = len(tickers) - len(result)
+        self.fetch_stats.add(stats)
+        logger.info("prices lookback=%d %s", lookback_days, stats)
+        return result
+
+    async def _read_cached(
+        self,
+        tickers: list[str],
+        stats: FetchStats | None = None,
+        use_memory: bool = True,
+    ) -> dict[str, tuple[pd.DataFrame, bool]]:
+        entries: dict[str, tuple[pd.DataFrame, bool]] = {}
+        if use_memory:
+            for ticker in tickers:
+                entry = self._memory.get(ticker)
+                if entry is not None:
+                    entries[ticker] = entry
+        remote = [t for t in tickers if t not in entries]
+        if stats is not None:
+            stats.memory_hits += len(entries)
+        if not remote:
+            return entries
+
+        blobs = await self.redis.mget([_prices_key(t) for t in remote])
+        for ticker, blob in zip(remote, blobs):
+            if blob:
+                entry = _decode_price_entry(blob)
+                entries[ticker] = entry
+                self._memory.set(ticker, entry, ttl=self._memory_ttl(entry[0]))
+                if stats is not None:
+                    stats.redis_hits += 1
+        return entries
+
+    async def _load_uncached(
+        self,
+        tickers: list[str],
+        lookback_days: int,
+        entries: dict[str, tuple[pd.DataFrame, bool]],
+        stats: FetchStats,
+    ) -> dict[str, pd.DataFrame]:
+        result: dict[str, pd.DataFrame] = {}
+        to_cache: dict[str, tuple[pd.DataFrame, bool]] = {}
+        to_archive: dict[str, tuple[pd.DataFrame, bool]] = {}
+        use_archive = self.archive is not None and lookback_days > ARCHIVE_MIN_LOOKBACK
+
+        archived: dict[str, tuple[pd.DataFrame, bool]] = {}
+        # Tickers whose archive partitions must be rewritten, not appended to;
+        # those re-based under the archive are refetched like a cold miss.
+        rewrite: set[str] = set()
+        if use_archive:
+            archived, db_tails, archive_rebased = await self._read_archive(
+                tickers, lookback_days
+            )
+            rewrite.update(archive_rebased)
+            to_archive.update((t, (df, False)) for t, df in db_tails.items())
+        remaining = [t for t in tickers if t not in archived and t not in rewrite]
+        db_frames = (
+            await self._read_prices_from_db_many(remaining, lookback_days)
+            if remaining
+            else {}
+        )
+
+        stale: list[str] = []
+        tails: dict[str, date] = {}
+        complete_tails: set[str] = set()
         for ticker in tickers:
-            df = await self._get_one_ticker(ticker, lookback_days)
-            if df is not None and not df.empty:
-                series[ticker] = df.set_index("ts")["adj_close"].astype(float)
-
-        if not series:
-            return pd.DataFrame()
-        return pd.concat(series, axis=1).sort_index().ffill().dropna(how="all")
-
-    async def _get_one_ticker(
-        self, ticker: str, lookback_days: int
-    ) -> pd.DataFrame | None:
-        cached = await self.redis.get(_prices_key(ticker, lookback_days))
-        if cached:
-            return _deserialize_price_df(cached)
-
-        db_df = await asyncio.to_thread(self._read_prices_from_db, ticker, lookback_days)
-        if (
-            db_df is not None
-            and _is_fresh(db_df)
-            and len(db_df) >= int(lookback_days * 0.9)
-        ):
-            await self.redis.set(
-                _prices_key(ticker, lookback_days),
-                _serialize_price_df(db_df),
-                ex=CACHE_TTL_PRICES,
+            if ticker in archived:
+                df, complete = archived[ticker]
+                stats.archive_hits += 1
+                if self._is_current(df):
+                    result[ticker] = df
+                    to_cache[ticker] = (df, complete)
+                else:
+                    db_frames[ticker] = df
+                    tails[ticker] = _last_date(df)
+                    if complete:
+                        complete_tails.add(ticker)
+                continue
+            db_df = db_frames.get(ticker)
+            if db_df is None or not _covers(db_df, lookback_days):
+                stale.append(ticker)
+                continue
+            if use_archive:
+                to_archive[ticker] = (db_df, False)
+            if self._is_current(db_df):
+                result[ticker] = db_df
+                to_cache[ticker] = (db_df, False)
+                stats.db_hits += 1
+            else:
+                tails[ticker] = _last_date(db_df)
+
+        async with self._provider_locks([*stale, *tails]):
+            if self.distributed_locks and (stale or tails):
+                # Another worker may have filled the cache while we waited.
+                refreshed = await self._read_cached([*stale, *tails], use_memory=False)
+                for ticker, (df, complete) in refreshed.items():
+                    if complete or _covers(df, lookback_days):
+                        result[ticker] = df
+                        entries[ticker] = (df, complete)
+                stale = [t for t in stale if t not in result]
+                tails = {t: ts for t, ts in tails.items() if t not in result}
+
+            fetched: dict[str, pd.DataFrame] = {}
+            rebased: list[str] = []
+            if stale:
+                full = await asyncio.to_thread(
+                    self.provider.download, stale, lookback_days
+                )
+                fetched.update(
+                    {t: df for t, df in full.items() if df is not None and not df.empty}
+                )
+            if tails:
+                tail_frames, rebased = await self._fetch_tails(
+                    {t: db_frames[t] for t in tails}
+                )
+                fetched.update(tail_frames)
+            if fetched:
+                await asyncio.to_thread(self._upsert_many, fetched)
+            if rebased:
+                # Cached and stored rows carry the old adjustments; serve
+                # the re-downloaded series like a cold fetch instead.
+                fetched.update(await self._refetch_rebased(rebased, lookback_days))
+                for ticker in rebased:
+                    entries.pop(ticker, None)
+                    del tails[ticker]
+                stale.extend(rebased)
+                rewrite.update(rebased)
+
+            complete = self.provider.full_history(lookback_days)
+            for ticker in stale:
+                if ticker in fetched:
+                    result[ticker] = fetched[ticker]
+                    to_cache[ticker] = (fetched[ticker], complete)
+                    if use_archive:
+                        to_archive[ticker] = (fetched[ticker], complete)
+                elif ticker in db_frames:
+                    result[ticker] = db_frames[ticker]
+            for ticker in tails:
+                if ticker in fetched:
+                    combined = _merge_price_frames(db_frames[ticker], fetched[ticker])
+                    result[ticker] = combined
+                    to_cache[ticker] = (combined, ticker in complete_tails)
+                    if use_archive:
+                        to_archive[ticker] = (fetched[ticker], False)
+                else:
+                    # No newer bar published yet; retry after PRICE_RETRY_TTL.
+                    result[ticker] = db_frames[ticker]
+                    to_cache[ticker] = (db_frames[ticker], ticker in complete_tails)
+            stats.provider_hits += len(fetched)
+
+            if to_cache:
+                await self._write_cached(to_cache, entries)
+        if to_archive:
+            try:
+                await asyncio.to_thread(
+                    self.archive.write_many, to_archive, replace=rewrite
+                )
+            except OSError:
+                logger.warning("price archive write failed", exc_info=True)
+        return result
+
+    async def _read_archive(
+        self, tickers: list[str], lookback_days: int
+    ) -> tuple[dict[str, tuple[pd.DataFrame, bool]], dict[str, pd.DataFrame], list[str]]:
+        """Archived series covering the lookback, topped up from Postgres.
+        Also returns the Postgres tail rows so they can be archived, and the
+        tickers whose last archived bar Postgres has since re-based."""
+        try:
+            found = await asyncio.to_thread(
+                self.archive.read_many, tickers, lookback_days
             )
-            return db_df
+        except OSError:
+            logger.warning("price archive read failed", exc_info=True)
+            return {}, {}, []
+        found = {
+            t: (df, complete)
+            for t, (df, complete) in found.items()
+            if complete or _covers(df, lookback_days)
+        }
+        behind = {t: _last_date(df) for t, (df, _) in found.items() if not self._is_current(df)}
+        db_rows = await self._read_prices_from_db_since(behind) if behind else {}
+        db_tails: dict[str, pd.DataFrame] = {}
+        rebased: list[str] = []
+        for ticker, rows in db_rows.items():
+            df, complete = found[ticker]
+            days = rows["ts"].dt.date
+            if is_rebased(df, rows[days == behind[ticker]]):
+                rebased.append(ticker)
+                del found[ticker]
+                continue
+            tail = rows[days > behind[ticker]].reset_index(drop=True)
+            if not tail.empty:
+                db_tails[ticker] = tail
+                found[ticker] = (_merge_price_frames(df, tail), complete)
+        return found, db_tails, rebased
 
-        fetched = await asyncio.to_thread(_yf_download, ticker, lookback_days)
-        if fetched is None or fetched.empty:
-            return db_df
+    async def _write_cached(
+        self,
+        frames: dict[str, tuple[pd.DataFrame, bool]],
+        entries: dict[str, tuple[pd.DataFrame, bool]],
+    ) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for ticker, (df, complete) in frames.items():
+                if ticker in entries:
+                    old_df, old_complete = entries[ticker]
+                    df = _merge_price_frames(old_df, df)
+                    complete = complete or old_complete
+                self._memory.set(ticker, (df, complete), ttl=self._memory_ttl(df))
+                pipe.set(
+                    _prices_key(ticker),
+                    _serialize_price_df(df, full_history=complete),
+                    ex=self._price_ttl(df),
+                )
+            await pipe.execute()
 
-        await asyncio.to_thread(self._upsert_prices, ticker, fetched)
-        await self.redis.set(
-            _prices_key(ticker, lookback_days),
-            _serialize_price_df(fetched),
-            ex=CACHE_TTL_PRICES,
+    @asynccontextmanager
+    async def _provider_locks(self, tickers: list[str]):
+        if not self.distributed_locks or not tickers:
+            yield
+            return
+        locks = [
+            self.redis.lock(
+                f"lock:{_prices_key(ticker)}",
+                timeout=PROVIDER_LOCK_TIMEOUT,
+                blocking_timeout=PROVIDER_LOCK_WAIT,
+            )
+            for ticker in sorted(tickers)
+        ]
+        # All locks wait in parallel, so a contended batch stalls for at most
+        # PROVIDER_LOCK_WAIT overall rather than that long per ticker.
+        acquired = await asyncio.gather(
+            *(lock.acquire() for lock in locks), return_exceptions=True
+        )
+        held = [lock for lock, ok in zip(locks, acquired) if ok is True]
+        if len(held) < len(locks):
+            logger.info(
+                "provider locks held=%d of %d after %ss",
+                len(held), len(locks), PROVIDER_LOCK_WAIT,
+            )
+        try:
+            yield
+        finally:
+            await asyncio.gather(
+                *(lock.release() for lock in held), return_exceptions=True
+            )
+
+    async def _fetch_tails(
+        self, stored: dict[str, pd.DataFrame]
+    ) -> tuple[dict[str, pd.DataFrame], list[str]]:
+        """Bars after each stored series, plus the tickers the provider has
+        re-based. The download starts at the last stored bar so that bar
+        can be compared with the provider's current value."""
+        last = {t: _last_date(df) for t, df in stored.items()}
+        start = min(last.values())
+        if start + timedelta(days=1) > date.today():
+            return {}, []
+        fetched = await asyncio.to_thread(
+            self.provider.download_since, list(last), start
+        )
+        tails: dict[str, pd.DataFrame] = {}
+        rebased: list[str] = []
+        for ticker, df in fetched.items():
+            if ticker not in last:
+                continue
+            days = pd.to_datetime(df["ts"]).dt.date
+            if is_rebased(stored[ticker], df[days == last[ticker]]):
+                rebased.append(ticker)
+                continue
+            newer = df[days > last[ticker]]
+            if not newer.empty:
+                tails[ticker] = newer.reset_index(drop=True)
+        return tails, rebased
+
+    async def _refetch_rebased(
+        self, tickers: list[str], lookback_days: int
+    ) -> dict[str, pd.DataFrame]:
+        """Download the whole stored span of re-based tickers again and
+        replace their rows. Older rows are only deleted for tickers whose
+        download reaches back to the first stored bar."""
+        logger.info("price history re-based tickers=%s", tickers)
+        await self._invalidate(tickers)
+        first = await self._first_ts_many(tickers)
+        span = max(
+            [lookback_days, *((date.today() - ts).days + 1 for ts in first.values())]
         )
-        return fetched
+        full = await asyncio.to_thread(self.provider.download, tickers, span)
+        frames = {t: df for t, df in full.items() if df is not None and not df.empty}
+        covered = {
+            t for t, df in frames.items()
+            if t not in first or pd.to_datetime(df["ts"]).min().date() <= first[t]
+        }
+        if len(covered) < len(frames):
+            logger.warning(
+                "re-based download shorter than stored history, keeping older "
+                "rows tickers=%s", sorted(set(frames) - covered),
+            )
+        if frames:
+            await asyncio.to_thread(self._replace_prices, frames, covered)
+        return frames
+
+    async def _invalidate(self, tickers: list[str]) -> None:
+        for ticker in tickers:
+            self._memory.discard(ticker)
+        # Matrix keys carry last bar dates, which a re-base leaves unchanged.
+        gone = set(tickers)
+        self._matrices.discard_where(lambda key: not gone.isdisjoint(key[0]))
+        await self.redis.delete(*[_prices_key(t) for t in tickers])
+
+    async def sync(
+        self, tickers: list[str], lookback_days: int = LOOKBACK_DEFAULT
+    ) -> int:
+        tickers = list(dict.fromkeys(tickers))
+        latest = await self._latest_ts_many(tickers)
+        missing = [t for t in tickers if t not in latest]
+        stale = {t: ts for t, ts in latest.items() if not self.calendar.is_current(ts)}
+
+        fetched: dict[str, pd.DataFrame] = {}
+        rebased: dict[str, pd.DataFrame] = {}
+        if missing:
+            full = await asyncio.to_thread(self.provider.download, missing, lookback_days)
+            fetched.update({t: df for t, df in full.items() if df is not None and not df.empty})
+        if stale:
+            last_bars = await self._read_prices_from_db_many(list(stale), 1)
+            tails, moved = await self._fetch_tails(last_bars)
+            fetched.update(tails)
+            if moved:
+                rebased = await self._refetch_rebased(moved, lookback_days)
+        if fetched:
+            await asyncio.to_thread(self._upsert_many, fetched)
+            entries = await self._read_cached(list(fetched), use_memory=False)
+            full_history = self.provider.full_history(lookback_days)
+            await self._write_cached(
+                {
+                    t: (df, t in missing and full_history)
+                    for t, df in fetched.items()
+                    if t in entries or t in missing
+                },
+                entries,
+            )
+
+        rows = sum(len(df) for df in [*fetched.values(), *rebased.values()])
+        logger.info(
+            "price sync tickers=%d missing=%d stale=%d rebased=%d rows_written=%d",
+            len(tickers), len(missing), len(stale), len(rebased), rows,
+        )
+        return rows
+
+    def cache_stats(self) -> dict:
+        fetch = self.fetch_stats
+        served = fetch.memory_hits + fetch.redis_hits
+        return {
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory.nbytes,
+            "matrix_entries": len(self._matrices),
+            "requested": fetch.requested,
+            "cache_hit_ratio": round(served / fetch.requested, 4) if fetch.requested else None,
+        }
+
+    def _is_current(self, df: pd.DataFrame) -> bool:
+        return self.calendar.is_current(_last_date(df))
+
+    def _price_ttl(self, df: pd.DataFrame) -> int:
+        """Seconds a price entry stays valid: until the next bar is due, or
+        PRICE_RETRY_TTL while the provider is behind."""
+        if not self._is_current(df):
+            return PRICE_RETRY_TTL
+        return max(PRICE_MIN_TTL, int(self.calendar.seconds_until_next_bar()))
+
+    def _memory_ttl(self, df: pd.DataFrame) -> float:
+        return min(MEMORY_TTL_PRICES, self._price_ttl(df))
+
+    async def latest_dates(self, tickers: list[str]) -> dict[str, date]:
+        return await self._latest_ts_many(list(dict.fromkeys(tickers)))
+
+    async def recently_requested(self, within_seconds: float) -> list[str]:
+        cutoff = time.time() - within_seconds
+        await self.redis.zremrangebyscore(REQUESTED_TICKERS_KEY, "-inf", cutoff)
+        return list(await self.redis.zrangebyscore(REQUESTED_TICKERS_KEY, cutoff, "+inf"))
+
+    async def _note_requested(self, tickers: list[str]) -> None:
+        now = time.time()
+        due = [
+            t for t in tickers if now - self._noted.get(t, 0.0) > REQUESTED_NOTE_INTERVAL
+        ]
+        if not due:
+            return
+        try:
+            await self.redis.zadd(REQUESTED_TICKERS_KEY, {t: now for t in due})
+        except Exception:
+            logger.warning("failed to record requested tickers", exc_info=True)
+            return
+        self._noted.update((t, now) for t in due)
+
+    async def _latest_ts_many(self, tickers: list[str]) -> dict[str, date]:
+        stmt = (
+            select(PriceHistory.ticker, func.max(PriceHistory.ts))
+            .where(PriceHistory.ticker.in_(tickers))
+            .group_by(PriceHistory.ticker)
+        )
+        rows = await self._db_rows(stmt)
+        return {ticker: ts for ticker, ts in rows if ts is not None}
+
+    async def _first_ts_many(self, tickers: list[str]) -> dict[str, date]:
+        stmt = (
+            select(PriceHistory.ticker, func.min(PriceHistory.ts))
+            .where(PriceHistory.ticker.in_(tickers))
+            .group_by(PriceHistory.ticker)
+        )
+        rows = await self._db_rows(stmt)
+        return {ticker: ts for ticker, ts in rows if ts is not None}
+
+    async def _read_prices_from_db_many(
+        self, tickers: list[str], lookback_days: int
+    ) -> dict[str, pd.DataFrame]:
+        ranked = (
+            select(
+                PriceHistory.ticker,
+                PriceHistory.ts,
+                PriceHistory.close,
+                PriceHistory.adj_close,
+                PriceHistory.volume,
+                func.row_number()
+                .over(partition_by=PriceHistory.ticker, order_by=PriceHistory.ts.desc())
+                .label("rn"),
+            )
+            .where(PriceHistory.ticker.in_(tickers))
+            .subquery()
+        )
+        stmt = select(
+            ranked.c.ticker,
+            ranked.c.ts,
+            ranked.c.close,
+            ranked.c.adj_close,
+            ranked.c.volume,
+        ).where(ranked.c.rn <= lookback_days)
+        return _frames_from_rows(await self._db_rows(stmt))
+
+    async def _read_prices_from_db_since(
+        self, last: dict[str, date]
+    ) -> dict[str, pd.DataFrame]:
+        """Rows from each ticker's ``last`` date on, that bar included."""
+        stmt = select(
+            PriceHistory.ticker,
+            PriceHistory.ts,
+            PriceHistory.close,
+            PriceHistory.adj_close,
+            PriceHistory.volume,
+        ).where(
+            PriceHistory.ticker.in_(list(last)),
+            PriceHistory.ts >= min(last.values()),
+        )
+        frames = _frames_from_rows(await self._db_rows(stmt))
+        out: dict[str, pd.DataFrame] = {}
+        for ticker, df in frames.items():
+            rows = df[df["ts"].dt.date >= last[ticker]].reset_index(drop=True)
+            if not rows.empty:
+                out[ticker] = rows
+        return out
+
+    async def _db_rows(self, stmt) -> list:
+        if self.async_session_factory is not None:
+            async with self.async_session_factory() as db:
+                return (await db.execute(stmt)).all()
+        return await asyncio.to_thread(self._db_rows_sync, stmt)
+
+    def _db_rows_sync(self, stmt) -> list:
+        with self.session_factory() as db:
+            return db.execute(stmt).all()
 
-    def _read_prices_from_db(
-        self, ticker: str, lookback_days: int
-    ) -> pd.DataFrame | None:
+    def _upsert_many(self, frames: dict[str, pd.DataFrame]) -> None:
+        for ticker in frames:
+            self._memory.discard(ticker)
+        total = sum(len(df) for df in frames.values())
+        if total >= BULK_UPSERT_MIN_ROWS:
+            self._copy_upsert_prices(frames)
+            return
+        for ticker, df in frames.items():
+            self._upsert_prices(ticker, df)
+
+    def _replace_prices(
+        self, frames: dict[str, pd.DataFrame], covered: set[str]
+    ) -> None:
+        """Upsert re-based series. For ``covered`` tickers, whose download
+        spans all stored rows, rows older than the download are deleted too
+        since they carry the previous adjustment basis."""
         with self.session_factory() as db:
-            stmt = (
-                select(
-                    PriceHistory.ts,
-                    PriceHistory.close,
-                    PriceHistory.adj_close,
-                    PriceHistory.volume,
+            for ticker, df in frames.items():
+                if ticker not in covered:
+                    continue
+                db.execute(
+                    delete(PriceHistory).where(
+                        PriceHistory.ticker == ticker,
+                        PriceHistory.ts < pd.to_datetime(df["ts"]).min().date(),
+                    )
                 )
-                .where(PriceHistory.ticker == ticker)
-                .order_by(PriceHistory.ts.desc())
-                .limit(lookback_days)
-            )
-            rows = db.execute(stmt).all()
-        if not rows:
-            return None
-        df = pd.DataFrame(rows, columns=["ts", "close", "adj_close", "volume"])
-        df["ts"] = pd.to_datetime(df["ts"])
-        df["close"] = df["close"].astype(float)
-        df["adj_close"] = df["adj_close"].astype(float)
-        return df.sort_values("ts").reset_index(drop=True)
+            db.commit()
+        self._upsert_many(frames)
+
+    def _copy_upsert_prices(
+        self, frames: dict[str, pd.DataFrame], chunk_rows: int = COPY_CHUNK_ROWS
+    ) -> int:
+        written = 0
+        with self.session_factory() as db:
+            raw = db.connection().connection
+            with raw.cursor() as cur:
+                cur.execute(_STAGE_CREATE_SQL)
+                for chunk in _price_csv_chunks(frames, chunk_rows):
+                    cur.copy_expert(_STAGE_COPY_SQL, chunk)
+                cur.execute(_STAGE_MERGE_SQL)
+                written = cur.rowcount
+            db.commit()
+        return written
 
     def _upsert_prices(self, ticker: str, df: pd.DataFrame) -> None:
         if df.empty:
             return
+        self._memory.discard(ticker)
         records = [
             {
                 "ticker": ticker,
@@ -135,53 +816,175 @@ class DataService:
     async def get_prices_detail(
         self, tickers: list[str], lookback_days: int = LOOKBACK_DEFAULT
     ) -> dict[str, pd.DataFrame]:
-        result: dict[str, pd.DataFrame] = {}
-        for ticker in tickers:
-            df = await self._get_one_ticker(ticker, lookback_days)
-            if df is not None and not df.empty:
-                result[ticker] = df.sort_values("ts").reset_index(drop=True)
-        return result
+        frames = await self._get_many_tickers(tickers, lookback_days)
+        return {
+            ticker: frames[ticker].sort_values("ts").reset_index(drop=True)
+            for ticker in tickers
+            if ticker in frames
+        }
 
     async def get_returns(
         self, tickers: list[str], lookback_days: int = LOOKBACK_DEFAULT
     ) -> pd.DataFrame:
-        prices = await self.get_prices(tickers, lookback_days)
-        if prices.empty:
-            return prices
-        return prices.pct_change().dropna()
+        return (await self.get_return_stats(tickers, lookback_days)).returns
+
+    async def get_return_stats(
+        self, tickers: list[str], lookback_days: int = LOOKBACK_DEFAULT
+    ) -> "ReturnStats":
+        frames = await self._get_many_tickers(tickers, lookback_days)
+        present = [t for t in dict.fromkeys(tickers) if t in frames]
+        if not present:
+            return ReturnStats.from_returns(pd.DataFrame())
+
+        universe = sorted(present)
+        key = (
+            tuple(universe),
+            lookback_days,
+            tuple(_last_date(frames[t]) for t in universe),
+        )
+        stats = self._matrices.get(key)
+        if stats is None:
+            prices = _align_prices(frames, universe)
+            stats = await asyncio.to_thread(
+                ReturnStats.from_returns, prices.pct_change().dropna()
+            )
+            self._matrices.set(key, stats)
+        return stats.subset(present)
 
     async def covariance_matrix(
         self, tickers: list[str], lookback_days: int = 252
     ) -> np.ndarray:
-        returns = await self.get_returns(tickers, lookback_days)
-        if returns.empty:
-            return np.empty((0, 0))
-        return returns.cov().values * 252
+        return (await self.get_return_stats(tickers, lookback_days)).cov
 
     get_covariance_matrix = covariance_matrix
 
     async def get_fundamentals(self, ticker: str) -> dict:
-        cached = await self.redis.get(_fundamentals_key(ticker))
-        if cached:
-            return json.loads(cached)
+        return (await self.get_fundamentals_many([ticker]))[ticker]
 
-        info = await asyncio.to_thread(_yf_info, ticker)
-        fundamentals = _extract_fundamentals(info)
+    async def get_fundamentals_many(self, tickers: list[str]) -> dict[str, dict]:
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return {}
+
+        blobs = await self.redis.mget([_fundamentals_key(t) for t in tickers])
+        result: dict[str, dict] = {}
+        missing: list[str] = []
+        now = time.time()
+        for ticker, blob in zip(tickers, blobs):
+            entry = _decode_fundamentals(blob)
+            if entry is None:
+                missing.append(ticker)
+                continue
+            result[ticker], fetched_at = entry
+            if fetched_at is not None and now - fetched_at > CACHE_TTL_FUNDAMENTALS:
+                self._refresh_fundamentals(ticker, result[ticker])
+
+        if missing:
+            loaded = await asyncio.gather(
+                *[
+                    self._flights.do(
+                        _fundamentals_key(t), lambda t=t: self._load_fundamentals(t)
+                    )
+                    for t in missing
+                ]
+            )
+            result.update(zip(missing, loaded))
+        return {t: result[t] for t in tickers}
+
+    def _refresh_fundamentals(self, ticker: str, stale: dict) -> None:
+        task = asyncio.create_task(
+            self._flights.do(
+                _fundamentals_key(ticker),
+                lambda: self._load_fundamentals(ticker, stale=stale),
+            )
+        )
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
+
+    async def _load_fundamentals(self, ticker: str, stale: dict | None = None) -> dict:
+        async with self._info_slots:
+            info = await asyncio.to_thread(self.provider.info, ticker)
+        now = time.time()
+        if info:
+            fundamentals = _extract_fundamentals(info)
+            envelope = {"v": fundamentals, "at": now}
+            ttl = CACHE_TTL_FUNDAMENTALS + FUNDAMENTALS_STALE_TTL
+        elif stale is not None:
+            # Keep serving the stale value, but back off re-fetching it for
+            # the negative TTL instead of retrying on every read.
+            fundamentals = stale
+            envelope = {
+                "v": stale,
+                "at": now - CACHE_TTL_FUNDAMENTALS + FUNDAMENTALS_NEGATIVE_TTL,
+            }
+            ttl = FUNDAMENTALS_NEGATIVE_TTL + FUNDAMENTALS_STALE_TTL
+        else:
+            fundamentals = _extract_fundamentals(info)
+            envelope = {"v": fundamentals, "at": None}
+            ttl = FUNDAMENTALS_NEGATIVE_TTL
         await self.redis.set(
-            _fundamentals_key(ticker),
-            json.dumps(fundamentals, default=str),
-            ex=CACHE_TTL_FUNDAMENTALS,
+            _fundamentals_key(ticker), json.dumps(envelope, default=str), ex=ttl
         )
         return fundamentals
 
     async def validate_tickers(self, tickers: list[str]) -> dict[str, list[str]]:
-        results = await asyncio.gather(
-            *[asyncio.to_thread(_yf_is_valid, t) for t in tickers]
-        )
-        valid = [t for t, ok in zip(tickers, results) if ok]
-        invalid = [t for t, ok in zip(tickers, results) if not ok]
+        unique = list(dict.fromkeys(tickers))
+        verdicts: dict[str, bool] = {}
+        if unique:
+            cached = await self.redis.mget([_validation_key(t) for t in unique])
+            verdicts = {t: v == "1" for t, v in zip(unique, cached) if v is not None}
+
+        unknown = [t for t in unique if t not in verdicts]
+        resolved: dict[str, bool] = {}
+        if unknown:
+            known = await self._known_tickers(unknown)
+            resolved.update((t, True) for t in unknown if t in known)
+            remaining = [t for t in unknown if t not in known]
+            if remaining:
+                results = await asyncio.gather(
+                    *[self._provider_is_valid(t) for t in remaining]
+                )
+                resolved.update(zip(remaining, results))
+
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for ticker, ok in resolved.items():
+                    pipe.set(
+                        _validation_key(ticker),
+                        "1" if ok else "0",
+                        ex=VALIDATION_TTL_VALID if ok else VALIDATION_TTL_INVALID,
+                    )
+                await pipe.execute()
+            verdicts.update(resolved)
+
+        valid = [t for t in tickers if verdicts[t]]
+        invalid = [t for t in tickers if not verdicts[t]]
         return {"valid": valid, "invalid": invalid}
 
+    async def _known_tickers(self, tickers: list[str]) -> set[str]:
+        # Semi-join against a VALUES list: one index probe per symbol rather
+        # than scanning every stored bar of the requested tickers.
+        requested = values(column("ticker", String), name="requested").data(
+            [(t,) for t in tickers]
+        )
+        stmt = select(requested.c.ticker).where(
+            exists().where(PriceHistory.ticker == requested.c.ticker)
+        )
+        known = {row[0] for row in await self._db_rows(stmt)}
+        rest = [t for t in tickers if t not in known]
+        if rest:
+            try:
+                raw = await self.redis.get(CIK_CACHE_KEY)
+                mapping = json.loads(raw) if raw else {}
+            except Exception:
+                logger.warning("EDGAR ticker map unreadable", exc_info=True)
+                mapping = {}
+            known.update(t for t in rest if t.upper() in mapping)
+        return known
+
+    async def _provider_is_valid(self, ticker: str) -> bool:
+        async with self._validate_slots:
+            return await asyncio.to_thread(self.provider.is_valid, ticker)
+
     async def get_risk_free_rate(self) -> float:
         cached = await self.redis.get("rf_rate")
         if cached:
@@ -189,8 +992,10 @@ class DataService:
                 return float(cached)
             except (TypeError, ValueError):
                 pass
+        return await self._flights.do("rf_rate", self._load_risk_free_rate)
 
-        df = await self._get_one_ticker("^TNX", lookback_days=5)
+    async def _load_risk_free_rate(self) -> float:
+        df = (await self._get_many_tickers(["^TNX"], lookback_days=5)).get("^TNX")
         rate = 0.04
         if df is not None and not df.empty:
             try:
@@ -202,6 +1007,27 @@ class DataService:
         return rate
 
 
+class YFinanceProvider:
+    """Default MarketDataProvider backed by the yfinance helpers below."""
+
+    def download(
+        self, tickers: list[str], lookback_days: int
+    ) -> dict[str, pd.DataFrame | None]:
+        return _yf_download_batch(tickers, lookback_days)
+
+    def download_since(self, tickers: list[str], start: date) -> dict[str, pd.DataFrame]:
+        return _yf_download_since(tickers, start)
+
+    def info(self, ticker: str) -> dict:
+        return _yf_info(ticker)
+
+    def is_valid(self, ticker: str) -> bool:
+        return _yf_is_valid(ticker)
+
+    def full_history(self, lookback_days: int) -> bool:
+        return _period_for_lookback(lookback_days) == "max"
+
+
 def _yf_download(ticker: str, lookback_days: int) -> pd.DataFrame | None:
     period = _period_for_lookback(lookback_days)
     try:
@@ -220,6 +1046,59 @@ def _yf_download(ticker: str, lookback_days: int) -> pd.DataFrame | None:
         return None
     if isinstance(df.columns, pd.MultiIndex):
         df.columns = df.columns.get_level_values(0)
+    return _normalize_yf_frame(df)
+
+
+def _yf_download_many(
+    tickers: list[str], lookback_days: int
+) -> dict[str, pd.DataFrame]:
+    return _yf_download_grouped(tickers, period=_period_for_lookback(lookback_days))
+
+
+def _yf_download_since(tickers: list[str], start: date) -> dict[str, pd.DataFrame]:
+    return _yf_download_grouped(tickers, start=start.isoformat())
+
+
+def _yf_download_grouped(tickers: list[str], **window) -> dict[str, pd.DataFrame]:
+    try:
+        df = yf.download(
+            tickers,
+            interval="1d",
+            auto_adjust=False,
+            progress=False,
+            threads=True,
+            group_by="ticker",
+            **window,
+        )
+    except Exception as exc:
+        logger.warning("yfinance batch download failed for %s: %s", tickers, exc)
+        return {}
+    if df is None or df.empty:
+        return {}
+    if not isinstance(df.columns, pd.MultiIndex):
+        if len(tickers) != 1:
+            return {}
+        df = pd.concat({tickers[0]: df}, axis=1)
+    out: dict[str, pd.DataFrame] = {}
+    present = set(df.columns.get_level_values(0))
+    for ticker in tickers:
+        if ticker not in present:
+            continue
+        sub = df[ticker].dropna(subset=["Close"])
+        if not sub.empty:
+            out[ticker] = _normalize_yf_frame(sub)
+    return out
+
+
+def _yf_download_batch(
+    tickers: list[str], lookback_days: int
+) -> dict[str, pd.DataFrame | None]:
+    if len(tickers) == 1:
+        return {tickers[0]: _yf_download(tickers[0], lookback_days)}
+    return _yf_download_many(tickers, lookback_days)
+
+
+def _normalize_yf_frame(df: pd.DataFrame) -> pd.DataFrame:
     df = df.reset_index().rename(
         columns={"Date": "ts", "Close": "close", "Adj Close": "adj_close", "Volume": "volume"}
     )
@@ -259,6 +1138,22 @@ def _extract_fundamentals(info: dict) -> dict:
     }
 
 
+def _decode_fundamentals(blob: str | None) -> tuple[dict, float | None] | None:
+    """Return (fundamentals, fetched_at). fetched_at is None for negative and
+    legacy entries, which are only bounded by their Redis TTL."""
+    if not blob:
+        return None
+    try:
+        payload = json.loads(blob)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(payload, dict):
+        return None
+    if "v" in payload and "at" in payload:
+        return payload["v"], payload["at"]
+    return payload, None
+
+
 def _format_earnings_date(value) -> str | None:
     if value is None:
         return None
@@ -281,33 +1176,139 @@ def _period_for_lookback(lookback_days: int) -> str:
     return "max"
 
 
-def _is_fresh(df: pd.DataFrame, max_age_days: int = 1) -> bool:
+def _last_date(df: pd.DataFrame) -> date:
     last_ts = df["ts"].max()
     if isinstance(last_ts, pd.Timestamp):
         last_ts = last_ts.date()
-    return (date.today() - last_ts) <= timedelta(days=max_age_days + 2)
-
-
-def _serialize_price_df(df: pd.DataFrame) -> str:
-    payload = []
-    for _, row in df.iterrows():
-        ts = row["ts"]
-        if isinstance(ts, pd.Timestamp):
-            ts = ts.date().isoformat()
-        elif isinstance(ts, (datetime, date)):
-            ts = ts.isoformat() if isinstance(ts, datetime) else ts.isoformat()
-        payload.append(
-            {
-                "ts": ts,
-                "close": float(row["close"]) if pd.notna(row["close"]) else None,
-                "adj_close": float(row["adj_close"]) if pd.notna(row["adj_close"]) else None,
-                "volume": int(row["volume"]) if pd.notna(row["volume"]) else None,
-            }
-        )
-    return json.dumps(payload)
+    return last_ts
+
+
+def _price_csv_chunks(
+    frames: dict[str, pd.DataFrame], chunk_rows: int
+) -> Iterable[io.StringIO]:
+    for ticker, df in frames.items():
+        # An empty close field would COPY as NULL into a NOT NULL column and
+        # abort the whole batch; yfinance returns such bars now and then.
+        df = df[pd.to_numeric(df["close"], errors="coerce").notna()]
+        if df.empty:
+            continue
+        for start in range(0, len(df), chunk_rows):
+            part = df.iloc[start:start + chunk_rows]
+            out = pd.DataFrame(
+                {
+                    "ticker": ticker,
+                    "ts": pd.to_datetime(part["ts"]).dt.strftime("%Y-%m-%d"),
+                    "close": part["close"].astype(float),
+                    "adj_close": part["adj_close"].astype(float),
+                    "volume": pd.to_numeric(part["volume"], errors="coerce")
+                    .round()
+                    .astype("Int64"),
+                }
+            )
+            buf = io.StringIO()
+            out.to_csv(buf, header=False, index=False)
+            buf.seek(0)
+            yield buf
+
+
+def _align_prices(frames: dict[str, pd.DataFrame], tickers: list[str]) -> pd.DataFrame:
+    series: dict[str, pd.Series] = {
+        ticker: frames[ticker].set_index("ts")["adj_close"].astype(float)
+        for ticker in tickers
+        if ticker in frames
+    }
+    if not series:
+        return pd.DataFrame()
+    return pd.concat(series, axis=1).sort_index().ffill().dropna(how="all")
+
+
+def _entry_nbytes(entry: tuple[pd.DataFrame, bool]) -> int:
+    return int(entry[0].memory_usage(index=True).sum())
+
+
+def _covers(df: pd.DataFrame, lookback_days: int) -> bool:
+    return len(df) >= int(lookback_days * 0.9)
+
+
+def _frames_from_rows(rows: list) -> dict[str, pd.DataFrame]:
+    if not rows:
+        return {}
+    df = pd.DataFrame(rows, columns=["ticker", "ts", "close", "adj_close", "volume"])
+    df["ts"] = pd.to_datetime(df["ts"])
+    df["close"] = df["close"].astype(float)
+    df["adj_close"] = df["adj_close"].astype(float)
+    return {
+        ticker: group.drop(columns="ticker").sort_values("ts").reset_index(drop=True)
+        for ticker, group in df.groupby("ticker", sort=False)
+    }
+
+
+def _merge_price_frames(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    merged = pd.concat([old, new], ignore_index=True)
+    merged = merged.drop_duplicates(subset="ts", keep="last")
+    return merged.sort_values("ts").reset_index(drop=True)
+
+
+def _serialize_price_df(
+    df: pd.DataFrame, compress: bool = True, full_history: bool = False
+) -> str:
+    df = df.sort_values("ts")
+    n = len(df)
+    ts = pd.to_datetime(df["ts"]).values.astype("datetime64[D]").astype(np.int32)
+    close = df["close"].to_numpy(dtype=np.float64, na_value=np.nan)
+    adj_close = df["adj_close"].to_numpy(dtype=np.float64, na_value=np.nan)
+    volume = (
+        pd.to_numeric(df["volume"], errors="coerce")
+        .fillna(_VOLUME_MISSING)
+        .to_numpy(dtype=np.int64)
+    )
+    body = ts.tobytes() + close.tobytes() + adj_close.tobytes() + volume.tobytes()
+    flags = _FLAG_FULL_HISTORY if full_history else 0
+    if compress:
+        packed = zlib.compress(body, 1)
+        if len(packed) < len(body):
+            body, flags = packed, flags | _FLAG_ZLIB
+    header = _PRICE_HEADER.pack(PRICE_BLOB_MAGIC, PRICE_BLOB_VERSION, flags, 0, n)
+    return base64.b64encode(header + body).decode("ascii")
+
+
+def _deserialize_price_df(blob: str | bytes) -> pd.DataFrame:
+    return _decode_price_entry(blob)[0]
+
+
+def _decode_price_entry(blob: str | bytes) -> tuple[pd.DataFrame, bool]:
+    if isinstance(blob, bytes) and not blob.startswith(PRICE_BLOB_MAGIC):
+        blob = blob.decode("ascii")
+    if isinstance(blob, str):
+        if blob.lstrip().startswith("["):
+            return _deserialize_price_json(blob), False
+        blob = base64.b64decode(blob)
+
+    magic, version, flags, _, n = _PRICE_HEADER.unpack_from(blob)
+    if magic != PRICE_BLOB_MAGIC or version != PRICE_BLOB_VERSION:
+        raise ValueError(f"unsupported price blob (magic={magic!r}, version={version})")
+    body = blob[_PRICE_HEADER.size:]
+    if flags & _FLAG_ZLIB:
+        body = zlib.decompress(body)
+
+    ts = np.frombuffer(body, dtype=np.int32, count=n)
+    offset = 4 * n
+    close = np.frombuffer(body, dtype=np.float64, count=n, offset=offset)
+    adj_close = np.frombuffer(body, dtype=np.float64, count=n, offset=offset + 8 * n)
+    volume = np.frombuffer(body, dtype=np.int64, count=n, offset=offset + 16 * n)
+    missing = volume == _VOLUME_MISSING
+    df = pd.DataFrame(
+        {
+            "ts": pd.to_datetime(ts.astype("datetime64[D]")),
+            "close": close,
+            "adj_close": adj_close,
+            "volume": np.where(missing, np.nan, volume) if missing.any() else volume,
+        }
+    )
+    return df, bool(flags & _FLAG_FULL_HISTORY)
 
 
-def _deserialize_price_df(blob: str) -> pd.DataFrame:
+def _deserialize_price_json(blob: str) -> pd.DataFrame:
     records = json.loads(blob)
     df = pd.DataFrame.from_records(records)
     if df.empty:
@@ -0,0 +1,293 @@
+"""Parametric mean-variance frontier under box and budget constraints.
+
+Every frontier point solves
+
+    min  w' Σ w   s.t.  1'w = 1,  mu'w = r,  lower <= w <= upper
+
+for a sweep of targets r. Neighbouring targets share almost the same set of
+assets pinned at a bound, so each solve is a primal-dual active-set iteration
+warm-started from the previous point's active set: usually one or two KKT
+solves on the free assets instead of a cold SLSQP run. When that iteration
+cycles (it can overshoot from a poor start), a classic primal active-set
+method takes over from a feasible blend of the min- and max-return
+vertices. Max-Sharpe is found by a golden-section search over r along the
+same path (the Sharpe ratio is unimodal along the efficient branch); when no
+portfolio beats the risk-free rate the maximiser is off the frontier and
+SLSQP solves it directly. A solve that does not settle falls back to SLSQP
+with analytic gradients.
+"""
+
+import numpy as np
+from scipy.optimize import minimize
+
+
+# Primal-dual active-set iterations before switching to the primal method;
+# the primal method gets PRIMAL_ITER_PER_ASSET * n before SLSQP takes over.
+MAX_ACTIVE_SET_ITER = 50
+PRIMAL_ITER_PER_ASSET = 4
+# Coarse grid and golden-section steps for the max-Sharpe search.
+SHARPE_GRID = 24
+SHARPE_REFINE_STEPS = 40
+# Relative slack on bound checks when accepting a solution.
+KKT_TOL = 1e-9
+# Targets are kept this fraction of the attainable range away from its ends,
+# where the feasible set collapses to a single vertex.
+RANGE_INSET = 1e-9
+_GOLDEN = (np.sqrt(5.0) - 1.0) / 2.0
+
+
+class FrontierEngine:
+    def __init__(
+        self,
+        mu: np.ndarray,
+        sigma: np.ndarray,
+        lower: np.ndarray,
+        upper: np.ndarray,
+    ):
+        self.mu = np.asarray(mu, dtype=float)
+        self.sigma = np.asarray(sigma, dtype=float)
+        self.lower = np.asarray(lower, dtype=float)
+        self.upper = np.asarray(upper, dtype=float)
+        self.n = len(self.mu)
+        self._ones = np.ones(self.n)
+        # Penalty weight in the active-set update; only its scale matters.
+        self._c = max(float(np.trace(self.sigma)) / max(self.n, 1), 1e-12)
+        # Warm-start active sets: -1 at lower bound, +1 at upper, 0 free.
+        self._state_target = np.zeros(self.n, dtype=np.int8)
+        self._state_min_var = np.zeros(self.n, dtype=np.int8)
+        self._min_var: np.ndarray | None = None
+        self._w_lo = self._vertex(np.argsort(self.mu))
+        self._w_hi = self._vertex(np.argsort(-self.mu))
+        self.iterations = 0
+        self.fallbacks = 0
+
+    def return_range(self) -> tuple[float, float]:
+        """Lowest and highest attainable ``mu'w`` under the constraints,
+        pulled in by RANGE_INSET."""
+        lo = float(self._w_lo @ self.mu)
+        hi = float(self._w_hi @ self.mu)
+        inset = (hi - lo) * RANGE_INSET
+        return lo + inset, hi - inset
+
+    def min_variance(self) -> np.ndarray:
+        if self._min_var is None:
+            A = self._ones[None, :]
+            w, self._state_min_var = self._solve(A, np.array([1.0]), self._state_min_var)
+            self._min_var = w
+        return self._min_var
+
+    def target_return(self, target: float) -> np.ndarray:
+        A = np.vstack([self._ones, self.mu])
+        w, self._state_target = self._solve(
+            A, np.array([1.0, target]), self._state_target
+        )
+        return w
+
+    def trace(self, targets: np.ndarray) -> list[np.ndarray]:
+        return [self.target_return(float(r)) for r in targets]
+
+    def max_sharpe(self, rf: float) -> np.ndarray:
+        w_mv = self.min_variance()
+        lo = float(w_mv @ self.mu)
+        hi = self.return_range()[1]
+        if hi - lo <= 1e-12 * max(1.0, abs(hi)):
+            return w_mv
+
+        grid = np.linspace(lo, hi, SHARPE_GRID)
+        sharpes = [self._sharpe(self.target_return(float(r)), rf) for r in grid]
+        best = int(np.argmax(sharpes))
+        if sharpes[best] <= 0:
+            return self._slsqp_sharpe(rf)
+        a = grid[max(best - 1, 0)]
+        b = grid[min(best + 1, len(grid) - 1)]
+
+        x1 = b - _GOLDEN * (b - a)
+        x2 = a + _GOLDEN * (b - a)
+        f1 = self._sharpe(self.target_return(x1), rf)
+        f2 = self._sharpe(self.target_return(x2), rf)
+        for _ in range(SHARPE_REFINE_STEPS):
+            if f1 < f2:
+                a, x1, f1 = x1, x2, f2
+                x2 = a + _GOLDEN * (b - a)
+                f2 = self._sharpe(self.target_return(x2), rf)
+            else:
+                b, x2, f2 = x2, x1, f1
+                x1 = b - _GOLDEN * (b - a)
+                f1 = self._sharpe(self.target_return(x1), rf)
+        w = self.target_return((a + b) / 2.0)
+        return w if self._sharpe(w, rf) >= sharpes[best] else self.target_return(grid[best])
+
+    def _sharpe(self, w: np.ndarray, rf: float) -> float:
+        vol = float(np.sqrt(max(w @ self.sigma @ w, 0.0)))
+        return (float(w @ self.mu) - rf) / vol if vol > 0 else -np.inf
+
+    def _vertex(self, order: np.ndarray) -> np.ndarray:
+        """Budget filled greedily in ``order``: the extreme-return corner."""
+        w = self.lower.copy()
+        budget = 1.0 - w.sum()
+        for i in order:
+            step = min(self.upper[i] - w[i], budget)
+            w[i] += step
+            budget -= step
+            if budget <= 0:
+                break
+        return w
+
+    def _solve(
+        self, A: np.ndarray, b: np.ndarray, state: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        solved = self._active_set(A, b, state)
+        if solved is None:
+            solved = self._primal_active_set(A, b, self._feasible_start(b))
+        if solved is not None:
+            return solved
+        self.fallbacks += 1
+        w = self._slsqp(A, b)
+        return w, _state_of(w, self.lower, self.upper)
+
+    def _active_set(
+        self, A: np.ndarray, b: np.ndarray, state: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray] | None:
+        sigma, lower, upper = self.sigma, self.lower, self.upper
+        m = A.shape[0]
+        for _ in range(MAX_ACTIVE_SET_ITER):
+            self.iterations += 1
+            free = state == 0
+            fixed = ~free
+            w = np.where(state < 0, lower, upper)
+            w[free] = 0.0
+            nf = int(free.sum())
+            kkt = np.zeros((nf + m, nf + m))
+            kkt[:nf, :nf] = sigma[np.ix_(free, free)]
+            kkt[:nf, nf:] = A[:, free].T
+            kkt[nf:, :nf] = A[:, free]
+            rhs = np.concatenate(
+                [
+                    -sigma[np.ix_(free, fixed)] @ w[fixed],
+                    b - A[:, fixed] @ w[fixed],
+                ]
+            )
+            try:
+                sol = np.linalg.solve(kkt, rhs)
+            except np.linalg.LinAlgError:
+                return None
+            w[free] = sol[:nf]
+            # Bound multipliers: y > 0 holds w at lower, y < 0 at upper.
+            y = sigma @ w + A.T @ sol[nf:]
+            y[free] = 0.0
+            new_state = np.zeros(self.n, dtype=np.int8)
+            new_state[y - self._c * (w - lower) > 0] = -1
+            new_state[y + self._c * (upper - w) < 0] = 1
+            if np.array_equal(new_state, state):
+                return (w, state) if self._is_kkt_point(w, A, b) else None
+            state = new_state
+        return None
+
+    def _feasible_start(self, b: np.ndarray) -> np.ndarray:
+        lo, hi = float(self._w_lo @ self.mu), float(self._w_hi @ self.mu)
+        if len(b) == 1 or hi - lo <= 0:
+            return self._w_lo.copy()
+        t = min(max((b[1] - lo) / (hi - lo), 0.0), 1.0)
+        return (1.0 - t) * self._w_lo + t * self._w_hi
+
+    def _primal_active_set(
+        self, A: np.ndarray, b: np.ndarray, w: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray] | None:
+        """Nocedal & Wright, Algorithm 16.3, with bounds as the inequalities."""
+        sigma, lower, upper = self.sigma, self.lower, self.upper
+        m = A.shape[0]
+        state = _state_of(w, lower, upper)
+        for _ in range(PRIMAL_ITER_PER_ASSET * self.n + 10):
+            self.iterations += 1
+            free = state == 0
+            nf = int(free.sum())
+            grad = sigma @ w
+            kkt = np.zeros((nf + m, nf + m))
+            kkt[:nf, :nf] = sigma[np.ix_(free, free)]
+            kkt[:nf, nf:] = A[:, free].T
+            kkt[nf:, :nf] = A[:, free]
+            rhs = np.concatenate([-grad[free], np.zeros(m)])
+            sol = np.linalg.lstsq(kkt, rhs, rcond=None)[0]
+            step = np.zeros(self.n)
+            step[free] = sol[:nf]
+
+            if np.abs(step).max() <= 1e-12:
+                y = grad + A.T @ sol[nf:]
+                wrong = np.where(state < 0, -y, np.where(state > 0, y, 0.0))
+                worst = int(np.argmax(wrong))
+                if wrong[worst] <= 1e-12 * self._c:
+                    return (w, state) if self._is_kkt_point(w, A, b) else None
+                state[worst] = 0
+                continue
+
+            alpha, blocking = 1.0, -1
+            for i in np.flatnonzero(free):
+                if step[i] < 0:
+                    ratio = (lower[i] - w[i]) / step[i]
+                elif step[i] > 0:
+                    ratio = (upper[i] - w[i]) / step[i]
+                else:
+                    continue
+                if ratio < alpha:
+                    alpha, blocking = ratio, i
+            w = w + alpha * step
+            if blocking >= 0:
+                state[blocking] = -1 if step[blocking] < 0 else 1
+                w[blocking] = lower[blocking] if step[blocking] < 0 else upper[blocking]
+        return None
+
+    def _is_kkt_point(self, w: np.ndarray, A: np.ndarray, b: np.ndarray) -> bool:
+        tol = KKT_TOL * max(1.0, float(np.abs(self.upper).max()))
+        return bool(
+            np.all(w >= self.lower - tol)
+            and np.all(w <= self.upper + tol)
+            and np.allclose(A @ w, b, rtol=1e-8, atol=1e-10)
+        )
+
+    def _slsqp(self, A: np.ndarray, b: np.ndarray) -> np.ndarray:
+        sigma = self.sigma
+        res = minimize(
+            lambda w: float(w @ sigma @ w),
+            np.clip(np.full(self.n, 1.0 / self.n), self.lower, self.upper),
+            jac=lambda w: 2.0 * sigma @ w,
+            method="SLSQP",
+            bounds=list(zip(self.lower, self.upper)),
+            constraints=[
+                {"type": "eq", "fun": lambda w: A @ w - b, "jac": lambda w: A}
+            ],
+            options={"maxiter": 500, "ftol": 1e-12},
+        )
+        return np.clip(res.x, self.lower, self.upper)
+
+    def _slsqp_sharpe(self, rf: float) -> np.ndarray:
+        mu, sigma = self.mu, self.sigma
+
+        def neg_sharpe(w):
+            vol = np.sqrt(w @ sigma @ w)
+            return -(w @ mu - rf) / vol
+
+        def neg_sharpe_grad(w):
+            var = w @ sigma @ w
+            vol = np.sqrt(var)
+            return -(mu * vol - (w @ mu - rf) * (sigma @ w) / vol) / var
+
+        ones = self._ones
+        res = minimize(
+            neg_sharpe,
+            np.clip(np.full(self.n, 1.0 / self.n), self.lower, self.upper),
+            jac=neg_sharpe_grad,
+            method="SLSQP",
+            bounds=list(zip(self.lower, self.upper)),
+            constraints=[
+                {"type": "eq", "fun": lambda w: w.sum() - 1.0, "jac": lambda w: ones}
+            ],
+            options={"maxiter": 500, "ftol": 1e-12},
+        )
+        return np.clip(res.x, self.lower, self.upper)
+
+
+def _state_of(w: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    state = np.zeros(len(w), dtype=np.int8)
+    state[w <= lower + 1e-10] = -1
+    state[w >= upper - 1e-10] = 1
+    return state
@@ -0,0 +1,158 @@
+"""NYSE trading calendar for price freshness and cache expiry.
+
+A daily bar for session D exists once D's close plus PUBLISH_DELAY has
+passed, so cached prices are current until the next session's bar is due and
+nothing needs refetching over weekends and holidays. Holidays follow the
+NYSE rules (weekend holidays observed on the adjacent weekday, except that a
+Saturday New Year's Day is not observed); early closes are the July 3rd,
+day-after-Thanksgiving and Christmas Eve half days.
+"""
+
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+
+EXCHANGE_TZ = ZoneInfo("America/New_York")
+REGULAR_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+# Time after the close before providers reliably serve the day's bar.
+PUBLISH_DELAY = timedelta(minutes=30)
+# One-off closures not covered by the holiday rules (national days of mourning).
+SPECIAL_CLOSURES = frozenset({date(2018, 12, 5), date(2025, 1, 9)})
+
+
+class ExchangeCalendar:
+    def __init__(
+        self,
+        tz: ZoneInfo = EXCHANGE_TZ,
+        publish_delay: timedelta = PUBLISH_DELAY,
+        special_closures: frozenset[date] = SPECIAL_CLOSURES,
+    ):
+        self.tz = tz
+        self.publish_delay = publish_delay
+        self.special_closures = special_closures
+        self._years: dict[int, tuple[frozenset[date], frozenset[date]]] = {}
+        self._lock = threading.Lock()
+
+    def is_trading_day(self, day: date) -> bool:
+        if day.weekday() >= 5 or day in self.special_closures:
+            return False
+        return day not in self._year(day.year)[0]
+
+    def previous_session(self, day: date) -> date:
+        day -= timedelta(days=1)
+        while not self.is_trading_day(day):
+            day -= timedelta(days=1)
+        return day
+
+    def next_session(self, day: date) -> date:
+        day += timedelta(days=1)
+        while not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return day
+
+    def session_close(self, day: date) -> datetime:
+        close = EARLY_CLOSE if day in self._year(day.year)[1] else REGULAR_CLOSE
+        return datetime.combine(day, close, tzinfo=self.tz)
+
+    def bar_available_at(self, day: date) -> datetime:
+        return self.session_close(day) + self.publish_delay
+
+    def last_complete_session(self, now: datetime | None = None) -> date:
+        """Most recent session whose daily bar should be published by ``now``."""
+        now = self._now(now)
+        today = now.astimezone(self.tz).date()
+        if self.is_trading_day(today) and now >= self.bar_available_at(today):
+            return today
+        return self.previous_session(today)
+
+    def next_bar_at(self, now: datetime | None = None) -> datetime:
+        return self.bar_available_at(self.next_session(self.last_complete_session(now)))
+
+    def seconds_until_next_bar(self, now: datetime | None = None) -> float:
+        now = self._now(now)
+        return (self.next_bar_at(now) - now).total_seconds()
+
+    def is_current(self, last_bar: date, now: datetime | None = None) -> bool:
+        """True when no bar newer than ``last_bar`` can exist yet."""
+        return last_bar >= self.last_complete_session(now)
+
+    def sessions_behind(self, last_bar: date, now: datetime | None = None) -> int:
+        target = self.last_complete_session(now)
+        behind = 0
+        day = last_bar
+        while day < target:
+            day = self.next_session(day)
+            behind += 1
+        return behind
+
+    def _year(self, year: int) -> tuple[frozenset[date], frozenset[date]]:
+        cached = self._years.get(year)
+        if cached is None:
+            with self._lock:
+                cached = self._years.setdefault(year, _nyse_year(year))
+        return cached
+
+    @staticmethod
+    def _now(now: datetime | None) -> datetime:
+        return now if now is not None else datetime.now(tz=timezone.utc)
+
+
+def _nyse_year(year: int) -> tuple[frozenset[date], frozenset[date]]:
+    """(holidays, early closes) for one calendar year."""
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _last_weekday(year, 5, 0),  # Memorial Day
+        _observed(date(year, 7, 4)),
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _observed(date(year, 12, 25)),
+    }
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(_observed(new_year))
+    if year >= 2022:
+        holidays.add(_observed(date(year, 6, 19)))
+
+    thanksgiving = _nth_weekday(year, 11, 3, 4)
+    early = {thanksgiving + timedelta(days=1)}
+    for candidate in (date(year, 7, 3), date(year, 12, 24)):
+        if candidate.weekday() < 5 and candidate not in holidays:
+            early.add(candidate)
+    return frozenset(holidays), frozenset(early)
+
+
+def _observed(day: date) -> date:
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    # Anonymous Gregorian algorithm.
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
@@ -0,0 +1,166 @@
+"""Market-data providers behind DataService.
+
+DataService only talks to a MarketDataProvider; the default yfinance
+implementation lives next to its helpers in data_service. LocalFileProvider
+serves bars from a directory of per-ticker Parquet/CSV files so load tests and
+benchmarks can run offline against long histories.
+
+All methods are blocking; DataService calls them through asyncio.to_thread.
+"""
+
+import json
+import logging
+from datetime import date
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+# Lookbacks beyond this are served from the first available bar, matching
+# yfinance's period="max" threshold.
+FULL_HISTORY_LOOKBACK = 1260
+# A stored bar re-downloaded with a close or adj_close further than this from
+# the stored value (beyond Numeric(18, 4) rounding) means the provider has
+# re-based the history for a dividend or split.
+REBASE_RTOL = 1e-4
+REBASE_ATOL = 1e-4
+
+_COLUMN_ALIASES = {
+    "date": "ts",
+    "Date": "ts",
+    "Datetime": "ts",
+    "Close": "close",
+    "Adj Close": "adj_close",
+    "adjclose": "adj_close",
+    "Volume": "volume",
+}
+
+
+class MarketDataProvider(Protocol):
+    def download(
+        self, tickers: list[str], lookback_days: int
+    ) -> dict[str, pd.DataFrame | None]:
+        """Bars covering at least ``lookback_days`` sessions, per ticker."""
+
+    def download_since(self, tickers: list[str], start: date) -> dict[str, pd.DataFrame]:
+        """Bars dated on or after ``start``, per ticker."""
+
+    def info(self, ticker: str) -> dict:
+        """yfinance-style ``.info`` mapping; empty when unavailable."""
+
+    def is_valid(self, ticker: str) -> bool:
+        ...
+
+    def full_history(self, lookback_days: int) -> bool:
+        """True when download() for this lookback starts at the first bar."""
+
+
+class LocalFileProvider:
+    """Reads ``<root>/<TICKER>.parquet`` or ``<root>/<TICKER>.csv`` with a
+    date column plus close and optional adj_close/volume columns.
+    Fundamentals come from an optional ``<root>/fundamentals.json`` keyed by
+    ticker. Parquet files need pyarrow installed."""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self._info: dict | None = None
+
+    def download(
+        self, tickers: list[str], lookback_days: int
+    ) -> dict[str, pd.DataFrame | None]:
+        out: dict[str, pd.DataFrame | None] = {}
+        for ticker in tickers:
+            df = self._read(ticker)
+            if df is not None and not self.full_history(lookback_days):
+                df = df.tail(lookback_days).reset_index(drop=True)
+            out[ticker] = df
+        return out
+
+    def download_since(self, tickers: list[str], start: date) -> dict[str, pd.DataFrame]:
+        out: dict[str, pd.DataFrame] = {}
+        for ticker in tickers:
+            df = self._read(ticker)
+            if df is None:
+                continue
+            newer = df[df["ts"].dt.date >= start].reset_index(drop=True)
+            if not newer.empty:
+                out[ticker] = newer
+        return out
+
+    def info(self, ticker: str) -> dict:
+        if self._info is None:
+            path = self.root / "fundamentals.json"
+            try:
+                self._info = json.loads(path.read_text()) if path.exists() else {}
+            except (OSError, ValueError):
+                logger.warning("unreadable fundamentals file %s", path, exc_info=True)
+                self._info = {}
+        return dict(self._info.get(ticker) or {})
+
+    def is_valid(self, ticker: str) -> bool:
+        return self._path(ticker) is not None
+
+    def full_history(self, lookback_days: int) -> bool:
+        return lookback_days > FULL_HISTORY_LOOKBACK
+
+    def _path(self, ticker: str) -> Path | None:
+        for suffix in (".parquet", ".csv"):
+            path = self.root / f"{ticker}{suffix}"
+            if path.is_file():
+                return path
+        return None
+
+    def _read(self, ticker: str) -> pd.DataFrame | None:
+        path = self._path(ticker)
+        if path is None:
+            return None
+        try:
+            if path.suffix == ".parquet":
+                df = pd.read_parquet(path)
+            else:
+                df = pd.read_csv(path)
+        except (OSError, ValueError) as exc:
+            logger.warning("failed to read %s: %s", path, exc)
+            return None
+        return _normalize_file_frame(df)
+
+
+def _normalize_file_frame(df: pd.DataFrame) -> pd.DataFrame | None:
+    if "ts" not in df.columns and df.index.name in _COLUMN_ALIASES:
+        df = df.reset_index()
+    df = df.rename(columns=_COLUMN_ALIASES)
+    if "ts" not in df.columns or "close" not in df.columns:
+        return None
+    df = df.dropna(subset=["close"]).copy()
+    if df.empty:
+        return None
+    df["ts"] = pd.to_datetime(df["ts"])
+    if "adj_close" not in df.columns:
+        df["adj_close"] = df["close"]
+    df["adj_close"] = df["adj_close"].fillna(df["close"])
+    if "volume" not in df.columns:
+        df["volume"] = None
+    return (
+        df[["ts", "close", "adj_close", "volume"]]
+        .sort_values("ts")
+        .reset_index(drop=True)
+    )
+
+
+def is_rebased(stored: pd.DataFrame, overlap: pd.DataFrame) -> bool:
+    """Whether a fresh copy of the last stored bar (``overlap``, possibly
+    empty) disagrees with it, i.e. the earlier history needs re-downloading."""
+    if overlap.empty:
+        return False
+    old = stored.loc[pd.to_datetime(stored["ts"]).idxmax()]
+    new = overlap.iloc[-1]
+    for col in ("close", "adj_close"):
+        a = float(old[col]) if pd.notna(old[col]) else np.nan
+        b = float(new[col]) if pd.notna(new[col]) else np.nan
+        if not np.isclose(a, b, rtol=REBASE_RTOL, atol=REBASE_ATOL, equal_nan=True):
+            return True
+    return False
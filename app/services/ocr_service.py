@@ -22,6 +22,8 @@ from html.parser import HTMLParser
 
 import httpx
 import openai
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
@@ -94,10 +96,48 @@ def _parse_signals_json(text: str) -> dict:
     return {}
 
 
+def _add_signal(
+    result: dict[str, EarningsSignal], ticker: str, row: EarningsDocument
+) -> None:
+    if not row.signals:
+        return
+    try:
+        result[ticker] = EarningsSignal(**row.signals)
+    except Exception:
+        logger.warning("failed to parse signals for %s", ticker, exc_info=True)
+
+
+def _events_from_rows(rows) -> list[EarningsEvent]:
+    events: list[EarningsEvent] = []
+    seen: set[tuple[str, str]] = set()
+    for row in rows:
+        key = (row.ticker, row.filing_date or "")
+        if key in seen:
+            continue
+        seen.add(key)
+        signals = row.signals or {}
+        events.append(
+            EarningsEvent(
+                date=row.filing_date or "",
+                ticker=row.ticker,
+                eps_beat=signals.get("eps_beat"),
+                sentiment=signals.get("sentiment", "neutral"),
+            )
+        )
+    return events
+
+
 class OCRService:
-    def __init__(self, llm_factory, session_factory: sessionmaker, redis=None):
+    def __init__(
+        self,
+        llm_factory,
+        session_factory: sessionmaker,
+        redis=None,
+        async_session_factory: async_sessionmaker | None = None,
+    ):
         self._llm_factory = llm_factory
         self.session_factory = session_factory
+        self.async_session_factory = async_session_factory
         self.redis = redis
 
     @property
@@ -172,12 +212,22 @@ class OCRService:
         if not tickers:
             return {}
         try:
+            if self.async_session_factory is not None:
+                return await self._get_latest_signals_async(tickers)
             return await asyncio.to_thread(self._get_latest_signals_sync, tickers)
         except Exception:
             logger.exception("get_latest_signals failed")
             return {}
 
     async def get_signals(self, ticker: str) -> list[EarningsDocument]:
+        if self.async_session_factory is not None:
+            stmt = (
+                select(EarningsDocument)
+                .where(EarningsDocument.ticker == ticker)
+                .order_by(EarningsDocument.uploaded_at.desc())
+            )
+            async with self.async_session_factory() as db:
+                return list((await db.execute(stmt)).scalars().all())
         return await asyncio.to_thread(self._get_signals_sync, ticker)
 
     async def get_events_for_period(
@@ -186,6 +236,8 @@ class OCRService:
         if not tickers:
             return []
         try:
+            if self.async_session_factory is not None:
+                return await self._get_events_async(tickers, since_date)
             return await asyncio.to_thread(
                 self._get_events_sync, tickers, since_date
             )
@@ -565,13 +617,30 @@ class OCRService:
                     )
                     .first()
                 )
-                if row is not None and row.signals:
-                    try:
-                        result[ticker] = EarningsSignal(**row.signals)
-                    except Exception:
-                        logger.warning(
-                            "failed to parse signals for %s", ticker, exc_info=True
-                        )
+                if row is not None:
+                    _add_signal(result, ticker, row)
+        return result
+
+    async def _get_latest_signals_async(
+        self, tickers: list[str]
+    ) -> dict[str, EarningsSignal]:
+        # One DISTINCT ON round-trip instead of a query per ticker; same
+        # filing_date-first ordering as the sync path.
+        stmt = (
+            select(EarningsDocument)
+            .where(EarningsDocument.ticker.in_(tickers))
+            .distinct(EarningsDocument.ticker)
+            .order_by(
+                EarningsDocument.ticker,
+                EarningsDocument.filing_date.desc().nullslast(),
+                EarningsDocument.uploaded_at.desc(),
+            )
+        )
+        async with self.async_session_factory() as db:
+            rows = (await db.execute(stmt)).scalars().all()
+        result: dict[str, EarningsSignal] = {}
+        for row in rows:
+            _add_signal(result, row.ticker, row)
         return result
 
     def _get_signals_sync(self, ticker: str) -> list[EarningsDocument]:
@@ -586,7 +655,6 @@ class OCRService:
     def _get_events_sync(
         self, tickers: list[str], since_date: date
     ) -> list[EarningsEvent]:
-        events: list[EarningsEvent] = []
         since_str = since_date.isoformat()
         with self.session_factory() as db:
             rows = (
@@ -601,19 +669,22 @@ class OCRService:
                 )
                 .all()
             )
-        seen: set[tuple[str, str]] = set()
-        for row in rows:
-            key = (row.ticker, row.filing_date or "")
-            if key in seen:
-                continue
-            seen.add(key)
-            signals = row.signals or {}
-            events.append(
-                EarningsEvent(
-                    date=row.filing_date or "",
-                    ticker=row.ticker,
-                    eps_beat=signals.get("eps_beat"),
-                    sentiment=signals.get("sentiment", "neutral"),
-                )
+        return _events_from_rows(rows)
+
+    async def _get_events_async(
+        self, tickers: list[str], since_date: date
+    ) -> list[EarningsEvent]:
+        stmt = (
+            select(EarningsDocument)
+            .where(
+                EarningsDocument.ticker.in_(tickers),
+                EarningsDocument.filing_date >= since_date.isoformat(),
+            )
+            .order_by(
+                EarningsDocument.filing_date.asc(),
+                EarningsDocument.uploaded_at.desc(),
             )
-        return events
+        )
+        async with self.async_session_factory() as db:
+            rows = (await db.execute(stmt)).scalars().all()
+        return _events_from_rows(rows)
@@ -1,6 +1,9 @@
 
 
+import hashlib
+import threading
 import time
+from collections import OrderedDict
 from typing import Any
 
 import numpy as np
@@ -8,6 +11,9 @@ import pandas as pd
 from scipy.optimize import minimize
 
 from app.schemas.optimization import FrontierPoint, OptimizationResult
+from app.services import convex
+from app.services.frontier import FrontierEngine
+from app.services.risk_budget import risk_contributions, solve_risk_budget
 
 
 TRADING_DAYS = 252
@@ -15,9 +21,27 @@ DEFAULT_MIN_WEIGHT = 0.01
 DEFAULT_MAX_WEIGHT = 0.60
 TAU = 0.05
 EARNINGS_TILT = 0.10
+# solver="auto" switches from SLSQP to cvxpy at this universe size; below it
+# SLSQP with analytic gradients is already a few milliseconds.
+CVXPY_MIN_ASSETS = 100
+# Solved mvo/risk_parity results kept per optimizer, keyed by a hash of the
+# problem data, so regime_blended, earnings_tilt and the analyzer reuse
+# each other's solves.
+MAX_CACHED_SOLVES = 256
+
+
+class OptimizerInputError(ValueError):
+    """Caller-supplied inputs that cannot be optimized as given."""
 
 
 class PortfolioOptimizer:
+    def __init__(self, cache_size: int = MAX_CACHED_SOLVES):
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._solved: OrderedDict[str, OptimizationResult] = OrderedDict()
+        self._solved_lock = threading.Lock()
+
     def mvo(
         self,
         returns: pd.DataFrame,
@@ -26,12 +50,12 @@ class PortfolioOptimizer:
         constraints: dict | None = None,
         rf: float = 0.04,
         expected_returns: np.ndarray | None = None,
+        solver: str = "auto",
     ) -> OptimizationResult:
         constraints = constraints or {}
-        min_w = constraints.get("min_weight", DEFAULT_MIN_WEIGHT)
-        max_w = constraints.get("max_weight", DEFAULT_MAX_WEIGHT)
         tickers = list(returns.columns)
         n = len(tickers)
+        lower, upper = _weight_bounds(constraints, n)
 
         mu = (
             np.asarray(expected_returns)
@@ -40,21 +64,47 @@ class PortfolioOptimizer:
         )
         sigma = np.asarray(cov)
 
-        bounds = [(min_w, max_w)] * n
+        tr = constraints.get("target_return")
+        if target == "target_return" and tr is None:
+            raise ValueError("target='target_return' requires constraints.target_return")
+
+        key = _problem_key(
+            "mvo", target, solver, tickers, mu, sigma, lower, upper, rf,
+            tr if target == "target_return" else None,
+        )
+        cached = self._recall(key)
+        if cached is not None:
+            return cached
+
+        start = time.perf_counter()
+        if solver == "cvxpy" or (solver == "auto" and n >= CVXPY_MIN_ASSETS):
+            w = convex.solve_mvo(target, mu, sigma, lower, upper, rf=rf, target_return=tr)
+            if w is not None:
+                elapsed_ms = int((time.perf_counter() - start) * 1000)
+                return self._remember(key, self._make_result(
+                    "mvo", target, tickers, w, mu, sigma, rf, elapsed_ms
+                ))
+
+        ones = np.ones(n)
+        bounds = list(zip(lower, upper))
         eq_constraints: list[dict] = [
-            {"type": "eq", "fun": lambda w: float(np.sum(w) - 1.0)}
+            {
+                "type": "eq",
+                "fun": lambda w: float(np.sum(w) - 1.0),
+                "jac": lambda w: ones,
+            }
         ]
 
         if target == "target_return":
-            tr = constraints.get("target_return")
-            if tr is None:
-                raise ValueError("target='target_return' requires constraints.target_return")
             eq_constraints.append(
-                {"type": "eq", "fun": lambda w, tr=tr: float(w @ mu - tr)}
+                {
+                    "type": "eq",
+                    "fun": lambda w, tr=tr: float(w @ mu - tr),
+                    "jac": lambda w: mu,
+                }
             )
 
         x0 = np.full(n, 1.0 / n)
-        start = time.perf_counter()
 
         if target == "max_sharpe":
             def neg_sharpe(w):
@@ -62,8 +112,15 @@ class PortfolioOptimizer:
                 vol = float(np.sqrt(w @ sigma @ w))
                 return -((ret - rf) / vol) if vol > 0 else 0.0
 
+            def neg_sharpe_grad(w):
+                sw = sigma @ w
+                vol = float(np.sqrt(w @ sw))
+                if vol == 0:
+                    return np.zeros(n)
+                return -(mu / vol - (float(w @ mu) - rf) * sw / vol**3)
+
             res = minimize(
-                neg_sharpe, x0, method="SLSQP",
+                neg_sharpe, x0, jac=neg_sharpe_grad, method="SLSQP",
                 bounds=bounds, constraints=eq_constraints,
                 options={"maxiter": 200, "ftol": 1e-9},
             )
@@ -71,17 +128,20 @@ class PortfolioOptimizer:
             def variance(w):
                 return float(w @ sigma @ w)
 
+            def variance_grad(w):
+                return 2.0 * (sigma @ w)
+
             res = minimize(
-                variance, x0, method="SLSQP",
+                variance, x0, jac=variance_grad, method="SLSQP",
                 bounds=bounds, constraints=eq_constraints,
                 options={"maxiter": 200, "ftol": 1e-9},
             )
 
         elapsed_ms = int((time.perf_counter() - start) * 1000)
         w = res.x / np.sum(res.x)
-        return self._make_result(
+        return self._remember(key, self._make_result(
             "mvo", target, tickers, w, mu, sigma, rf, elapsed_ms
-        )
+        ))
 
     def risk_parity(
         self,
@@ -89,10 +149,49 @@ class PortfolioOptimizer:
         tickers: list[str],
         returns: pd.DataFrame | None = None,
         rf: float = 0.04,
+        risk_budgets: dict[str, float] | None = None,
+        portfolio: list[str] | None = None,
     ) -> OptimizationResult:
+        """Equal risk contribution, or contributions proportional to
+        ``risk_budgets`` (relative, renormalised over ``tickers``; unlisted
+        tickers get the mean of the supplied budgets). Budgets for tickers
+        outside ``tickers`` or that are not positive raise
+        OptimizerInputError; ``portfolio``, the requested tickers, lets the
+        message tell a ticker without return data from an unknown one."""
         n = len(tickers)
         sigma = np.asarray(cov)
-        target_contrib = 1.0 / n
+        budgets = _risk_budgets(risk_budgets, tickers, portfolio)
+        if returns is not None:
+            mu = returns.mean().values * TRADING_DAYS
+        else:
+            mu = np.zeros(n)
+
+        key = _problem_key("risk_parity", tickers, mu, sigma, budgets, rf)
+        cached = self._recall(key)
+        if cached is not None:
+            return cached
+
+        start = time.perf_counter()
+        solved = solve_risk_budget(sigma, budgets)
+        if solved is not None:
+            w, iterations = solved
+        else:
+            w, iterations = self._risk_parity_slsqp(sigma, budgets)
+        elapsed_ms = int((time.perf_counter() - start) * 1000)
+
+        result = self._make_result(
+            "risk_parity", None, tickers, w, mu, sigma, rf, elapsed_ms
+        )
+        result.iterations = iterations
+        result.residual = float(
+            np.max(np.abs(risk_contributions(w, sigma) - budgets))
+        )
+        return self._remember(key, result)
+
+    def _risk_parity_slsqp(
+        self, sigma: np.ndarray, budgets: np.ndarray
+    ) -> tuple[np.ndarray, int]:
+        n = len(budgets)
 
         def objective(w):
             port_vol = float(np.sqrt(w @ sigma @ w))
@@ -101,27 +200,34 @@ class PortfolioOptimizer:
             mrc = (sigma @ w) / port_vol
             contrib = w * mrc
             normalized = contrib / np.sum(contrib)
-            return float(np.sum((normalized - target_contrib) ** 2))
+            return float(np.sum((normalized - budgets) ** 2))
+
+        def objective_grad(w):
+            # Normalized contributions are w_i (Σw)_i / w'Σw.
+            sw = sigma @ w
+            var = float(w @ sw)
+            if var == 0:
+                return np.zeros(n)
+            dev = w * sw / var - budgets
+            return (2.0 / var) * (
+                dev * sw + sigma @ (dev * w) - (2.0 / var) * float(dev @ (w * sw)) * sw
+            )
 
+        ones = np.ones(n)
         bounds = [(1e-6, 1.0)] * n
-        eq = [{"type": "eq", "fun": lambda w: float(np.sum(w) - 1.0)}]
+        eq = [
+            {
+                "type": "eq",
+                "fun": lambda w: float(np.sum(w) - 1.0),
+                "jac": lambda w: ones,
+            }
+        ]
         x0 = np.full(n, 1.0 / n)
-
-        start = time.perf_counter()
         res = minimize(
-            objective, x0, method="SLSQP", bounds=bounds, constraints=eq,
-            options={"maxiter": 500, "ftol": 1e-10},
-        )
-        elapsed_ms = int((time.perf_counter() - start) * 1000)
-
-        w = res.x / np.sum(res.x)
-        if returns is not None:
-            mu = returns.mean().values * TRADING_DAYS
-        else:
-            mu = np.zeros(n)
-        return self._make_result(
-            "risk_parity", None, tickers, w, mu, sigma, rf, elapsed_ms
+            objective, x0, jac=objective_grad, method="SLSQP", bounds=bounds,
+            constraints=eq, options={"maxiter": 500, "ftol": 1e-10},
         )
+        return res.x / np.sum(res.x), int(res.nit)
 
     _REGIME_STRATEGY = {
         "bull": "max_sharpe",
@@ -136,6 +242,7 @@ class PortfolioOptimizer:
         regime_probabilities: dict[str, float],
         rf: float = 0.04,
         constraints: dict | None = None,
+        solver: str = "auto",
     ) -> OptimizationResult:
         if not regime_probabilities:
             raise ValueError("regime_probabilities must be non-empty")
@@ -150,11 +257,11 @@ class PortfolioOptimizer:
 
         max_sharpe_res = self.mvo(
             returns, sigma, target="max_sharpe",
-            constraints=constraints, rf=rf,
+            constraints=constraints, rf=rf, solver=solver,
         )
         min_vol_res = self.mvo(
             returns, sigma, target="min_vol",
-            constraints=constraints, rf=rf,
+            constraints=constraints, rf=rf, solver=solver,
         )
         rp_res = self.risk_parity(sigma, tickers, returns=returns, rf=rf)
 
@@ -203,6 +310,7 @@ class PortfolioOptimizer:
         risk_aversion: float = 2.5,
         returns: pd.DataFrame | None = None,
         rf: float = 0.04,
+        solver: str = "auto",
     ) -> OptimizationResult:
         sigma = np.asarray(cov)
         n = len(tickers)
@@ -245,7 +353,7 @@ class PortfolioOptimizer:
         )
         result = self.mvo(
             synth, sigma, target="max_sharpe", rf=rf,
-            expected_returns=mu_bl,
+            expected_returns=mu_bl, solver=solver,
         )
         return OptimizationResult(
             method="black_litterman",
@@ -265,6 +373,7 @@ class PortfolioOptimizer:
         earnings: dict | None = None,
         rf: float = 0.04,
         constraints: dict | None = None,
+        solver: str = "auto",
     ) -> OptimizationResult:
         """Regime-blended weights tilted by per-ticker earnings sentiment.
 
@@ -273,7 +382,9 @@ class PortfolioOptimizer:
         Weights are re-normalised after tilting.  Falls back to regime_blended
         when no earnings signals are available.
         """
-        base = self.regime_blended(returns, cov, regime_probabilities, rf, constraints)
+        base = self.regime_blended(
+            returns, cov, regime_probabilities, rf, constraints, solver=solver
+        )
 
         if not earnings:
             result = OptimizationResult(
@@ -341,67 +452,56 @@ class PortfolioOptimizer:
         mu = returns.mean().values * TRADING_DAYS
         sigma = np.asarray(cov)
 
-        min_ret = float(np.min(mu))
-        max_ret = float(np.max(mu))
+        lower, upper = _weight_bounds(None, len(tickers))
+        engine = FrontierEngine(mu, sigma, lower, upper)
+        lo, hi = engine.return_range()
+        min_ret = max(float(np.min(mu)), lo)
+        max_ret = min(float(np.max(mu)), hi)
         if min_ret >= max_ret:
             return []
 
         targets = np.linspace(min_ret, max_ret, n)
-        points: list[FrontierPoint] = []
-        for tr in targets:
-            try:
-                res = self.mvo(
-                    returns, sigma, target="target_return",
-                    constraints={"target_return": float(tr)}, rf=rf,
-                )
-                points.append(
-                    FrontierPoint(
-                        weights=res.weights,
-                        expected_return=res.expected_return,
-                        volatility=res.volatility,
-                        sharpe=res.sharpe,
-                    )
-                )
-            except Exception:
-                continue
-
-        max_sharpe = self.mvo(returns, sigma, target="max_sharpe", rf=rf)
-        min_vol = self.mvo(returns, sigma, target="min_vol", rf=rf)
+        points = [
+            _frontier_point(tickers, w, mu, sigma, rf)
+            for w in engine.trace(targets)
+        ]
         points.append(
-            FrontierPoint(
-                weights=max_sharpe.weights,
-                expected_return=max_sharpe.expected_return,
-                volatility=max_sharpe.volatility,
-                sharpe=max_sharpe.sharpe,
-                kind="max_sharpe",
+            _frontier_point(
+                tickers, engine.max_sharpe(rf), mu, sigma, rf, kind="max_sharpe"
             )
         )
         points.append(
-            FrontierPoint(
-                weights=min_vol.weights,
-                expected_return=min_vol.expected_return,
-                volatility=min_vol.volatility,
-                sharpe=min_vol.sharpe,
-                kind="min_vol",
+            _frontier_point(
+                tickers, engine.min_variance(), mu, sigma, rf, kind="min_vol"
             )
         )
         if current_weights:
             cw = np.array([current_weights.get(t, 0.0) for t in tickers])
             cw = cw / cw.sum() if cw.sum() > 0 else cw
-            ret = float(cw @ mu)
-            vol = float(np.sqrt(cw @ sigma @ cw))
-            sharpe = (ret - rf) / vol if vol > 0 else 0.0
-            points.append(
-                FrontierPoint(
-                    weights={t: float(w) for t, w in zip(tickers, cw)},
-                    expected_return=ret,
-                    volatility=vol,
-                    sharpe=sharpe,
-                    kind="current",
-                )
-            )
+            points.append(_frontier_point(tickers, cw, mu, sigma, rf, kind="current"))
         return points
 
+    def _recall(self, key: str) -> OptimizationResult | None:
+        with self._solved_lock:
+            hit = self._solved.get(key)
+            if hit is None:
+                self.cache_misses += 1
+                return None
+            self._solved.move_to_end(key)
+            self.cache_hits += 1
+        # Callers decorate results (regime_weights, components), so every
+        # hit is a private copy.
+        return hit.model_copy(deep=True)
+
+    def _remember(self, key: str, result: OptimizationResult) -> OptimizationResult:
+        if self.cache_size > 0:
+            with self._solved_lock:
+                self._solved[key] = result.model_copy(deep=True)
+                self._solved.move_to_end(key)
+                while len(self._solved) > self.cache_size:
+                    self._solved.popitem(last=False)
+        return result
+
     def _make_result(
         self,
         method: str,
@@ -425,3 +525,93 @@ class PortfolioOptimizer:
             sharpe=sharpe,
             solve_ms=solve_ms,
         )
+
+
+def _weight_bounds(
+    constraints: dict | None, n: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Per-asset bounds. The default floor or cap is dropped when it cannot
+    sum to one with n assets (a 1% floor over more than 100 tickers); bounds
+    the caller set explicitly raise OptimizerInputError instead."""
+    constraints = constraints or {}
+    min_w = constraints.get("min_weight")
+    max_w = constraints.get("max_weight")
+    if min_w is None:
+        min_w = DEFAULT_MIN_WEIGHT if DEFAULT_MIN_WEIGHT * n <= 1.0 else 0.0
+    if max_w is None:
+        max_w = DEFAULT_MAX_WEIGHT if DEFAULT_MAX_WEIGHT * n >= 1.0 else 1.0
+    if min_w > max_w:
+        raise OptimizerInputError(
+            f"min_weight {min_w:g} is above max_weight {max_w:g}"
+        )
+    if min_w * n > 1.0:
+        raise OptimizerInputError(
+            f"min_weight {min_w:g} x {n} assets exceeds 100% invested"
+        )
+    if max_w * n < 1.0:
+        raise OptimizerInputError(
+            f"max_weight {max_w:g} x {n} assets cannot reach 100% invested"
+        )
+    return np.full(n, float(min_w)), np.full(n, float(max_w))
+
+
+def _problem_key(*parts: Any) -> str:
+    """Digest of a problem's inputs; arrays hash by shape and float64 bytes."""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, np.generic):
+            part = part.item()
+        if isinstance(part, np.ndarray):
+            arr = np.ascontiguousarray(part, dtype=float)
+            h.update(repr(arr.shape).encode())
+            h.update(arr.tobytes())
+        else:
+            h.update(repr(part).encode())
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def _risk_budgets(
+    budgets: dict[str, float] | None,
+    tickers: list[str],
+    portfolio: list[str] | None = None,
+) -> np.ndarray:
+    n = len(tickers)
+    if not budgets:
+        return np.full(n, 1.0 / n)
+    missing = sorted(set(budgets) - set(tickers))
+    if missing:
+        held = set(portfolio or ())
+        no_data = [t for t in missing if t in held]
+        unknown = [t for t in missing if t not in held]
+        problems = []
+        if unknown:
+            problems.append(f"tickers not in the portfolio: {', '.join(unknown)}")
+        if no_data:
+            problems.append(f"tickers without return data: {', '.join(no_data)}")
+        raise OptimizerInputError(f"risk_budgets for {'; '.join(problems)}")
+    given = np.array([float(v) for v in budgets.values()])
+    if not np.all(np.isfinite(given)) or np.any(given <= 0):
+        raise OptimizerInputError("risk_budgets must be positive")
+    default = float(given.mean())
+    b = np.array([float(budgets.get(t, default)) for t in tickers])
+    return b / b.sum()
+
+
+def _frontier_point(
+    tickers: list[str],
+    w: np.ndarray,
+    mu: np.ndarray,
+    sigma: np.ndarray,
+    rf: float,
+    kind: str | None = None,
+) -> FrontierPoint:
+    ret = float(w @ mu)
+    vol = float(np.sqrt(w @ sigma @ w))
+    return FrontierPoint(
+        weights={t: float(wi) for t, wi in zip(tickers, w)},
+        expected_return=ret,
+        volatility=vol,
+        sharpe=(ret - rf) / vol if vol > 0 else 0.0,
+        kind=kind,
+    )
@@ -0,0 +1,247 @@
+"""Partitioned Parquet archive of daily bars for long-lookback reads.
+
+Layout: ``<root>/ticker=<TICKER>/year=<YYYY>.parquet``. Reads open only the
+newest partitions needed to cover a lookback, memory-mapped and pruned to the
+price columns; writes rewrite just the years they touch, so appending a tail
+costs one small file. A ``_FULL_HISTORY`` marker records that the archive
+starts at the provider's first bar.
+
+All methods are blocking; DataService calls them through asyncio.to_thread.
+"""
+
+import os
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Iterable
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.services.market_data import is_rebased
+
+ARCHIVE_COLUMNS = ["ts", "close", "adj_close", "volume"]
+ARCHIVE_SCHEMA = pa.schema(
+    [
+        ("ts", pa.date32()),
+        ("close", pa.float64()),
+        ("adj_close", pa.float64()),
+        ("volume", pa.int64()),
+    ]
+)
+_FULL_HISTORY_MARKER = "_FULL_HISTORY"
+
+
+class PriceArchive:
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    def read(
+        self, ticker: str, lookback_days: int
+    ) -> tuple[pd.DataFrame, bool] | None:
+        """Return the newest ``lookback_days`` bars and whether they reach
+        back to the first archived bar of a full-history series."""
+        years = self._years(ticker)
+        if not years:
+            return None
+        # Footer row counts pick the partitions before any column is read.
+        files: list[pq.ParquetFile] = []
+        rows = 0
+        for year in reversed(years):
+            pf = pq.ParquetFile(self._partition_path(ticker, year), memory_map=True)
+            files.append(pf)
+            rows += pf.metadata.num_rows
+            if rows >= lookback_days:
+                break
+        df = _read_files(files[::-1])
+        if df.empty:
+            return None
+        reached_start = rows < lookback_days
+        complete = reached_start and self.is_full_history(ticker)
+        return df.tail(lookback_days).reset_index(drop=True), complete
+
+    def read_many(
+        self, tickers: list[str], lookback_days: int
+    ) -> dict[str, tuple[pd.DataFrame, bool]]:
+        out: dict[str, tuple[pd.DataFrame, bool]] = {}
+        for ticker in tickers:
+            entry = self.read(ticker, lookback_days)
+            if entry is not None:
+                out[ticker] = entry
+        return out
+
+    def read_since(self, ticker: str, start: date) -> pd.DataFrame | None:
+        years = [y for y in self._years(ticker) if y >= start.year]
+        if not years:
+            return None
+        df = _read_files(
+            [
+                pq.ParquetFile(self._partition_path(ticker, y), memory_map=True)
+                for y in years
+            ]
+        )
+        df = df[df["ts"].dt.date >= start].reset_index(drop=True)
+        return None if df.empty else df
+
+    def write(
+        self,
+        ticker: str,
+        df: pd.DataFrame,
+        full_history: bool = False,
+        replace: bool = False,
+    ) -> int:
+        """Merge ``df`` into the ticker's partitions; newer rows win. With
+        ``replace`` the ticker's archive becomes exactly ``df`` (a re-based
+        history must not keep bars on the old adjustment basis)."""
+        if df is None or df.empty:
+            return 0
+        df = df[ARCHIVE_COLUMNS].copy()
+        df["ts"] = pd.to_datetime(df["ts"])
+        ticker_dir = self.root / f"ticker={ticker}"
+        with self._lock:
+            ticker_dir.mkdir(parents=True, exist_ok=True)
+            existing = set(self._years(ticker))
+            written = set()
+            for year, part in df.groupby(df["ts"].dt.year, sort=True):
+                year = int(year)
+                if year in existing and not replace:
+                    old = _read_files(
+                        [pq.ParquetFile(self._partition_path(ticker, year))]
+                    )
+                    part = _concat([old, part]).drop_duplicates("ts", keep="last")
+                self._write_partition(ticker, year, part)
+                written.add(year)
+            if replace:
+                # New partitions are in place before the old ones go, so
+                # readers never see an empty archive.
+                for year in existing - written:
+                    self._partition_path(ticker, year).unlink(missing_ok=True)
+                if not full_history:
+                    (ticker_dir / _FULL_HISTORY_MARKER).unlink(missing_ok=True)
+            if full_history:
+                (ticker_dir / _FULL_HISTORY_MARKER).touch()
+        return len(df)
+
+    def write_many(
+        self,
+        frames: dict[str, tuple[pd.DataFrame, bool]],
+        replace: Iterable[str] = (),
+    ) -> int:
+        replace = set(replace)
+        return sum(
+            self.write(ticker, df, full_history=complete, replace=ticker in replace)
+            for ticker, (df, complete) in frames.items()
+        )
+
+    def first_date(self, ticker: str) -> date | None:
+        years = self._years(ticker)
+        if not years:
+            return None
+        pf = pq.ParquetFile(self._partition_path(ticker, years[0]), memory_map=True)
+        ts = pf.read(columns=["ts"]).column("ts").to_pylist()
+        return min(ts) if ts else None
+
+    def _years(self, ticker: str) -> list[int]:
+        ticker_dir = self.root / f"ticker={ticker}"
+        if not ticker_dir.is_dir():
+            return []
+        years = []
+        for path in ticker_dir.glob("year=*.parquet"):
+            try:
+                years.append(int(path.stem.split("=", 1)[1]))
+            except ValueError:
+                continue
+        return sorted(years)
+
+    def is_full_history(self, ticker: str) -> bool:
+        return (self.root / f"ticker={ticker}" / _FULL_HISTORY_MARKER).exists()
+
+    def _partition_path(self, ticker: str, year: int) -> Path:
+        return self.root / f"ticker={ticker}" / f"year={year}.parquet"
+
+    def _write_partition(self, ticker: str, year: int, df: pd.DataFrame) -> None:
+        df = df.sort_values("ts")
+        volume = pd.to_numeric(df["volume"], errors="coerce")
+        table = pa.Table.from_arrays(
+            [
+                pa.array(df["ts"].values.astype("datetime64[D]")),
+                pa.array(df["close"].to_numpy(dtype=np.float64)),
+                pa.array(df["adj_close"].to_numpy(dtype=np.float64)),
+                pa.array(volume.astype("Int64"), type=pa.int64()),
+            ],
+            schema=ARCHIVE_SCHEMA,
+        )
+        path = self._partition_path(ticker, year)
+        tmp = path.with_suffix(".parquet.tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+
+
+def read_or_fetch(
+    archive: PriceArchive,
+    ticker: str,
+    start: date,
+    fetch_since: Callable[[str, date], pd.DataFrame | None],
+) -> pd.DataFrame | None:
+    """Bars from ``start`` onward, downloading only what the archive lacks:
+    everything on first use, the tail after that. The tail download starts
+    at the last archived bar; if the provider's copy of that bar differs
+    (a dividend or split re-based the series) the ticker's whole archive is
+    downloaded again and rewritten."""
+    df = archive.read_since(ticker, start)
+    backfill = df is None or (
+        df["ts"].iloc[0].date() > start + timedelta(days=7)
+        and not archive.is_full_history(ticker)
+    )
+    if backfill:
+        fetched = fetch_since(ticker, start)
+        if fetched is None or fetched.empty:
+            return df
+        archive.write(ticker, fetched, full_history=True)
+        return archive.read_since(ticker, start)
+
+    last = df["ts"].iloc[-1].date()
+    if last + timedelta(days=1) > date.today():
+        return df
+    fetched = fetch_since(ticker, last)
+    if fetched is None or fetched.empty:
+        return df
+    days = pd.to_datetime(fetched["ts"]).dt.date
+    if is_rebased(df, fetched[days == last]):
+        first = min(archive.first_date(ticker) or start, start)
+        fetched = fetch_since(ticker, first)
+        if fetched is None or fetched.empty:
+            return df
+        archive.write(
+            ticker, fetched,
+            full_history=archive.is_full_history(ticker), replace=True,
+        )
+    else:
+        archive.write(ticker, fetched[days > last])
+    return archive.read_since(ticker, start)
+
+
+def _read_files(files: list[pq.ParquetFile]) -> pd.DataFrame:
+    if not files:
+        return pd.DataFrame(columns=ARCHIVE_COLUMNS)
+    table = pa.concat_tables([pf.read(columns=ARCHIVE_COLUMNS) for pf in files])
+    df = table.to_pandas(date_as_object=False)
+    # int64 with nulls arrives as float64; hand back ints/None like the
+    # Postgres reads do.
+    volume = df["volume"]
+    if volume.isna().any():
+        df["volume"] = volume.astype("Int64").astype(object).where(volume.notna(), None)
+    df["ts"] = df["ts"].astype("datetime64[ns]")
+    return df.sort_values("ts", kind="stable").reset_index(drop=True)
+
+
+def _concat(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=ARCHIVE_COLUMNS)
+    df = pd.concat(frames, ignore_index=True)
+    df["ts"] = pd.to_datetime(df["ts"])
+    return df.sort_values("ts", kind="stable").reset_index(drop=True)
@@ -73,6 +73,19 @@ class RegimeService:
     def __init__(self, data_service, session_factory: sessionmaker):
         self.data = data_service
         self.session_factory = session_factory
+        # Last prediction keyed by (last bar, model file mtime); a new bar or a
+        # retrained model invalidates it.
+        self._current: tuple[tuple, RegimeSnapshotResponse] | None = None
+        # Unpickled model keyed by file mtime so retraining is picked up.
+        self._model: tuple[int, tuple] | None = None
+
+    @property
+    def model_loaded(self) -> bool:
+        try:
+            mtime = MODEL_PATH.stat().st_mtime_ns
+        except OSError:
+            return False
+        return self._model is not None and self._model[0] == mtime
 
     async def train(self, lookback_days: int = 5040) -> None:
         series = await self._fetch_series(lookback_days)
@@ -91,7 +104,13 @@ class RegimeService:
             if not MODEL_PATH.exists():
                 return None
 
-        return await asyncio.to_thread(self._predict_sync, *series)
+        key = (series[0].index[-1], MODEL_PATH.stat().st_mtime_ns)
+        if self._current is not None and self._current[0] == key:
+            return self._current[1]
+        snapshot = await asyncio.to_thread(self._predict_sync, *series)
+        if snapshot is not None:
+            self._current = (key, snapshot)
+        return snapshot
 
     def regime_to_strategy(self, regime: str) -> str:
         return STRATEGY_MAP.get(regime, "max_sharpe")
@@ -177,7 +196,7 @@ class RegimeService:
         tnx: pd.Series | None = None,
         irx: pd.Series | None = None,
     ) -> RegimeSnapshotResponse | None:
-        loaded = joblib.load(MODEL_PATH)
+        loaded = self._load_model()
         if len(loaded) == 4:
             model, scaler, label_map, _ = loaded
         else:
@@ -231,6 +250,12 @@ class RegimeService:
             probabilities=probabilities,
         )
 
+    def _load_model(self) -> tuple:
+        mtime = MODEL_PATH.stat().st_mtime_ns
+        if self._model is None or self._model[0] != mtime:
+            self._model = (mtime, joblib.load(MODEL_PATH))
+        return self._model[1]
+
     @staticmethod
     def _build_features(
         spy: pd.Series,
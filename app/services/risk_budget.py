@@ -0,0 +1,77 @@
+"""Risk-budgeting (equal risk contribution) portfolios.
+
+A long-only portfolio whose risk contributions ``w_i (Σw)_i / w'Σw`` equal
+budgets ``b`` is, up to scale, the unique minimiser of the strictly convex
+
+    f(y) = ½ y'Σy - Σ b_i log y_i,   y > 0
+
+whose first-order condition ``y_i (Σy)_i = b_i`` is exactly the budget
+condition; ``w = y / 1'y``. Newton's method on f with a fraction-to-boundary
+backtracking line search converges quadratically, typically in five to ten
+steps from the inverse-volatility start.
+"""
+
+import numpy as np
+
+
+MAX_NEWTON_ITER = 50
+# Stop once every risk contribution is within this of its budget.
+BUDGET_TOL = 1e-10
+# Armijo slope fraction and step shrink for the line search.
+ARMIJO = 1e-4
+BACKTRACK = 0.5
+# Never step further than this fraction of the way to y_i = 0.
+TO_BOUNDARY = 0.99
+# A line search that needs a shorter step than this has run into rounding
+# in f (near-singular Σ); the current iterate is returned as is.
+MIN_STEP = 1e-8
+
+
+def solve_risk_budget(
+    sigma: np.ndarray, budgets: np.ndarray
+) -> tuple[np.ndarray, int] | None:
+    """Weights whose risk contributions match ``budgets`` (summing to one)
+    and the Newton steps taken, or None when Newton does not converge
+    (e.g. an asset with zero variance)."""
+    sigma = np.asarray(sigma, dtype=float)
+    b = np.asarray(budgets, dtype=float)
+    vols = np.sqrt(np.clip(np.diag(sigma), 0.0, None))
+    if np.any(vols <= 0):
+        return None
+
+    y = b / vols
+    y *= np.sqrt(b.sum() / float(y @ sigma @ y))
+    for iteration in range(MAX_NEWTON_ITER):
+        sy = sigma @ y
+        if np.max(np.abs(y * sy / float(y @ sy) - b)) <= BUDGET_TOL:
+            return y / y.sum(), iteration
+        grad = sy - b / y
+        hess = sigma + np.diag(b / y**2)
+        try:
+            step = -np.linalg.solve(hess, grad)
+        except np.linalg.LinAlgError:
+            return None
+
+        t = 1.0
+        shrinking = step < 0
+        if shrinking.any():
+            t = min(1.0, TO_BOUNDARY * float(np.min(-y[shrinking] / step[shrinking])))
+        f0 = _objective(y, sigma, b)
+        slope = float(grad @ step)
+        while _objective(y + t * step, sigma, b) > f0 + ARMIJO * t * slope:
+            t *= BACKTRACK
+            if t < MIN_STEP:
+                return y / y.sum(), iteration
+        y = y + t * step
+    return None
+
+
+def risk_contributions(w: np.ndarray, sigma: np.ndarray) -> np.ndarray:
+    """Fractions of portfolio variance attributable to each asset."""
+    contrib = w * (sigma @ w)
+    total = contrib.sum()
+    return contrib / total if total > 0 else np.zeros_like(w)
+
+
+def _objective(y: np.ndarray, sigma: np.ndarray, b: np.ndarray) -> float:
+    return 0.5 * float(y @ sigma @ y) - float(b @ np.log(y))
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta, timezone
 
 from sqlalchemy import delete, select
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 
 from app.models import PortfolioSnapshot
@@ -19,9 +20,35 @@ TOKEN_BYTES = 6  # → 8 base64-url chars
 MAX_RETRIES = 3
 
 
+def _snapshot_stmt(token: str):
+    return select(PortfolioSnapshot).where(PortfolioSnapshot.token == token)
+
+
+def _to_response(row: PortfolioSnapshot | None) -> SnapshotResponse | None:
+    if row is None:
+        return None
+    if row.expires_at is not None and row.expires_at < datetime.now(tz=timezone.utc):
+        return None
+
+    holdings = [HoldingInput.model_validate(h) for h in row.holdings]
+    report = AnalysisReport.model_validate(row.report)
+    return SnapshotResponse(
+        token=row.token,
+        holdings=holdings,
+        report=report,
+        created_at=row.created_at,
+        expires_at=row.expires_at,
+    )
+
+
 class SnapshotService:
-    def __init__(self, session_factory: sessionmaker) -> None:
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        async_session_factory: async_sessionmaker | None = None,
+    ) -> None:
         self.session_factory = session_factory
+        self.async_session_factory = async_session_factory
 
     async def save(
         self,
@@ -34,6 +61,12 @@ class SnapshotService:
         )
 
     async def fetch(self, token: str) -> SnapshotResponse | None:
+        if self.async_session_factory is not None:
+            async with self.async_session_factory() as db:
+                row = (
+                    await db.execute(_snapshot_stmt(token))
+                ).scalar_one_or_none()
+            return _to_response(row)
         return await asyncio.to_thread(self._fetch_sync, token)
 
     async def cleanup_expired(self) -> int:
@@ -80,24 +113,8 @@ class SnapshotService:
 
     def _fetch_sync(self, token: str) -> SnapshotResponse | None:
         with self.session_factory() as db:
-            row = db.execute(
-                select(PortfolioSnapshot).where(PortfolioSnapshot.token == token)
-            ).scalar_one_or_none()
-
-        if row is None:
-            return None
-        if row.expires_at is not None and row.expires_at < datetime.now(tz=timezone.utc):
-            return None
-
-        holdings = [HoldingInput.model_validate(h) for h in row.holdings]
-        report = AnalysisReport.model_validate(row.report)
-        return SnapshotResponse(
-            token=row.token,
-            holdings=holdings,
-            report=report,
-            created_at=row.created_at,
-            expires_at=row.expires_at,
-        )
+            row = db.execute(_snapshot_stmt(token)).scalar_one_or_none()
+        return _to_response(row)
 
     def _cleanup_sync(self) -> int:
         with self.session_factory() as db:
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Holding, Portfolio
+from app.services.data_service import DataService, LOOKBACK_DEFAULT
+from app.services.regime_service import MODEL_PATH, RegimeService
+from app.services.risk_service import BENCHMARK
+from app.tasks.price_sync import DEMO_TICKERS, sync_prices
+
+
+logger = logging.getLogger(__name__)
+
+# Most-held tickers across all portfolios preloaded on top of the demo set.
+WARMUP_TOP_HELD = 50
+# Readiness flips once warmup finishes or this many seconds pass, whichever
+# is first, so a slow provider cannot keep every replica out of rotation.
+WARMUP_TIMEOUT = 120.0
+
+
+@dataclass
+class WarmupState:
+    ready: bool = False
+    started_at: str | None = None
+    finished_at: str | None = None
+    duration_s: float | None = None
+    tickers: int = 0
+    matrices: int = 0
+    regime: str | None = None
+    errors: list[str] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+async def warm_caches(
+    data_service: DataService,
+    regime_service: RegimeService | None,
+    session_factory: sessionmaker | None,
+    state: WarmupState | None = None,
+) -> WarmupState:
+    state = state or WarmupState()
+    state.started_at = datetime.now(tz=timezone.utc).isoformat()
+    state.errors = []
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(
+            _warm(data_service, regime_service, session_factory, state),
+            timeout=WARMUP_TIMEOUT,
+        )
+    except asyncio.TimeoutError:
+        state.errors.append(f"timed out after {WARMUP_TIMEOUT:.0f}s")
+    except Exception as exc:
+        logger.exception("cache warmup failed")
+        state.errors.append(repr(exc))
+    state.duration_s = round(time.perf_counter() - started, 3)
+    state.finished_at = datetime.now(tz=timezone.utc).isoformat()
+    state.ready = True
+    logger.info(
+        "cache warmup finished tickers=%d matrices=%d regime=%s errors=%d in %.1fs",
+        state.tickers, state.matrices, state.regime, len(state.errors), state.duration_s,
+    )
+    return state
+
+
+async def sync_and_warm(
+    data_service: DataService,
+    regime_service: RegimeService | None,
+    session_factory: sessionmaker | None,
+    state: WarmupState | None = None,
+) -> None:
+    """Scheduled price sync followed by a re-warm of the derived caches, which
+    are keyed by last bar and go cold as soon as a new bar lands."""
+    await sync_prices(data_service, session_factory)
+    await warm_caches(data_service, regime_service, session_factory, state)
+
+
+async def _warm(
+    data_service: DataService,
+    regime_service: RegimeService | None,
+    session_factory: sessionmaker | None,
+    state: WarmupState,
+) -> None:
+    demo = [t for t in DEMO_TICKERS if not t.startswith("^")]
+    held: list[str] = []
+    if session_factory is not None:
+        try:
+            db_demo, held = await asyncio.to_thread(_hot_tickers, session_factory)
+            demo = db_demo or demo
+        except Exception as exc:
+            logger.warning("cache warmup could not read holdings", exc_info=True)
+            state.errors.append(f"holdings: {exc!r}")
+
+    universe = list(dict.fromkeys([*DEMO_TICKERS, *demo, *held, BENCHMARK]))
+    state.tickers = await data_service.warm(universe, lookback_days=LOOKBACK_DEFAULT)
+
+    # The analyzer and risk endpoints ask for holdings + benchmark, the
+    # optimizer for holdings alone; both land in DataService's matrix cache.
+    state.matrices = 0
+    for tickers in ([*demo, BENCHMARK], demo):
+        stats = await data_service.get_return_stats(tickers, LOOKBACK_DEFAULT)
+        if not stats.returns.empty:
+            state.matrices += 1
+
+    if regime_service is not None and MODEL_PATH.exists():
+        snapshot = await regime_service.predict_current()
+        state.regime = snapshot.regime if snapshot is not None else None
+
+
+def _hot_tickers(session_factory: sessionmaker) -> tuple[list[str], list[str]]:
+    with session_factory() as db:
+        demo = db.execute(
+            select(Holding.ticker)
+            .join(Portfolio, Portfolio.id == Holding.portfolio_id)
+            .where(Portfolio.is_demo.is_(True))
+            .distinct()
+        ).scalars().all()
+        held = db.execute(
+            select(Holding.ticker)
+            .group_by(Holding.ticker)
+            .order_by(func.count().desc(), Holding.ticker)
+            .limit(WARMUP_TOP_HELD)
+        ).scalars().all()
+    return sorted(demo), list(held)
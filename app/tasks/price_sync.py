@@ -1,19 +1,122 @@
-
-
+import asyncio
+import json
 import logging
+import time
+from datetime import datetime, timedelta, timezone
 
+from sqlalchemy import distinct, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Holding
 from app.services.data_service import DataService, LOOKBACK_DEFAULT
 
 
 logger = logging.getLogger(__name__)
 
+# Always kept warm: the demo portfolio plus the regime / risk-free inputs.
 DEMO_TICKERS = ["JEPI", "JEPQ", "VOO", "QQQ", "SPY", "^VIX", "^TNX", "^IRX"]
 
+SNAPSHOT_WINDOW_DAYS = 30
+REQUESTED_WINDOW_SECONDS = 7 * 86400
+# Provider-friendly waves: SYNC_CONCURRENCY batches of SYNC_BATCH_SIZE run at
+# once, with a pause between waves.
+SYNC_BATCH_SIZE = 50
+SYNC_CONCURRENCY = 2
+SYNC_WAVE_PAUSE = 2.0
+# A ticker more than this many sessions behind after a run is reported as
+# lagging (one session of slack for bars the provider has not published yet).
+LAG_REPORT_SESSIONS = 1
+LAST_RUN_KEY = "price_sync:last_run"
+
+_SNAPSHOT_TICKERS = text(
+    "SELECT DISTINCT elem->>'ticker' FROM portfolio_snapshots, "
+    "jsonb_array_elements(holdings) AS elem "
+    "WHERE created_at >= :since "
+    "AND (expires_at IS NULL OR expires_at > NOW())"
+)
 
-async def sync_prices(data_service: DataService) -> None:
-    logger.info("price_sync starting for %s", DEMO_TICKERS)
+
+async def sync_prices(
+    data_service: DataService, session_factory: sessionmaker | None = None
+) -> dict | None:
+    started = time.perf_counter()
     try:
-        df = await data_service.get_prices(DEMO_TICKERS, lookback_days=LOOKBACK_DEFAULT)
-        logger.info("price_sync finished - %d rows in frame", len(df))
+        universe = await _universe(data_service, session_factory)
+        logger.info("price_sync starting for %d tickers", len(universe))
+
+        batches = [
+            universe[i : i + SYNC_BATCH_SIZE]
+            for i in range(0, len(universe), SYNC_BATCH_SIZE)
+        ]
+        rows = 0
+        failed: list[str] = []
+        for w in range(0, len(batches), SYNC_CONCURRENCY):
+            if w:
+                await asyncio.sleep(SYNC_WAVE_PAUSE)
+            wave = batches[w : w + SYNC_CONCURRENCY]
+            results = await asyncio.gather(
+                *[_sync_batch(data_service, batch) for batch in wave],
+                return_exceptions=True,
+            )
+            for batch, result in zip(wave, results):
+                if isinstance(result, BaseException):
+                    logger.warning("price_sync batch failed: %s", result)
+                    failed.extend(batch)
+                else:
+                    rows += result
+
+        latest = await data_service.latest_dates(universe)
+        calendar = data_service.calendar
+        lag = {
+            t: calendar.sessions_behind(latest[t]) if t in latest else None
+            for t in universe
+        }
+        run = {
+            "finished_at": datetime.now(tz=timezone.utc).isoformat(),
+            "duration_s": round(time.perf_counter() - started, 3),
+            "tickers": len(universe),
+            "rows_written": rows,
+            "failed": failed,
+            "lagging": {
+                t: behind
+                for t, behind in lag.items()
+                if behind is None or behind > LAG_REPORT_SESSIONS
+            },
+        }
+        await data_service.redis.set(LAST_RUN_KEY, json.dumps(run))
+        logger.info(
+            "price_sync finished tickers=%d rows=%d failed=%d lagging=%d in %.1fs",
+            run["tickers"], rows, len(failed), len(run["lagging"]), run["duration_s"],
+        )
+        return run
     except Exception:
         logger.exception("price_sync failed")
+        return None
+
+
+async def _sync_batch(data_service: DataService, batch: list[str]) -> int:
+    rows = await data_service.sync(batch, lookback_days=LOOKBACK_DEFAULT)
+    # Warm Redis and the in-process tier now that Postgres is current.
+    await data_service.warm(batch, lookback_days=LOOKBACK_DEFAULT)
+    return rows
+
+
+async def _universe(
+    data_service: DataService, session_factory: sessionmaker | None
+) -> list[str]:
+    tickers = list(DEMO_TICKERS)
+    if session_factory is not None:
+        tickers.extend(await asyncio.to_thread(_db_universe, session_factory))
+    try:
+        tickers.extend(await data_service.recently_requested(REQUESTED_WINDOW_SECONDS))
+    except Exception:
+        logger.warning("price_sync could not read requested tickers", exc_info=True)
+    return list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+
+
+def _db_universe(session_factory: sessionmaker) -> list[str]:
+    since = datetime.now(tz=timezone.utc) - timedelta(days=SNAPSHOT_WINDOW_DAYS)
+    with session_factory() as db:
+        held = db.execute(select(distinct(Holding.ticker))).scalars().all()
+        shared = db.execute(_SNAPSHOT_TICKERS, {"since": since}).scalars().all()
+    return [*held, *shared]
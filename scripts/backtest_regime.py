@@ -3,18 +3,22 @@
 import argparse
 import sys
 from collections import Counter
+from datetime import date
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
 from hmmlearn.hmm import GaussianHMM
 from sklearn.preprocessing import StandardScaler
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from app.config import settings
+from app.services.data_service import YFinanceProvider
+from app.services.price_archive import PriceArchive, read_or_fetch
 from app.services.regime_service import (
     FEATURE_NAMES,
+    MODEL_DIR,
     LABEL_BEAR,
     LABEL_BULL,
     LABEL_SIDEWAYS,
@@ -41,16 +45,21 @@ EXPECTED_WINDOWS: dict[str, tuple[str, str, str]] = {
 }
 
 
+ARCHIVE = PriceArchive(settings.PRICE_ARCHIVE_DIR or MODEL_DIR / "price_archive")
+
+
 def _fetch(ticker: str, start: str = "1995-01-01") -> pd.Series:
-    df = yf.download(
-        ticker, start=start, interval="1d", auto_adjust=False,
-        progress=False, threads=False,
+    # Served from the local Parquet archive; only the missing tail is
+    # downloaded after the first run.
+    df = read_or_fetch(
+        ARCHIVE,
+        ticker,
+        date.fromisoformat(start),
+        lambda t, since: YFinanceProvider().download_since([t], since).get(t),
     )
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = df.columns.get_level_values(0)
-    s = df["Adj Close"].fillna(df["Close"])
-    s.index = pd.to_datetime(s.index)
-    return s
+    if df is None:
+        return pd.Series(dtype=float)
+    return df.set_index("ts")["adj_close"]
 
 
 def _train_fold(features: pd.DataFrame) -> tuple[GaussianHMM, StandardScaler, dict[int, str]]:
@@ -178,7 +187,7 @@ def main() -> int:
     print(f"  Features:        {FEATURE_NAMES}")
     print()
 
-    print("Fetching SPY + VIX from yfinance ...")
+    print("Loading SPY + VIX (local archive, yfinance for the tail) ...")
     spy = _fetch("SPY", start="1993-01-01")
     vix = _fetch("^VIX", start="1993-01-01")
     full_features = RegimeService._build_features(spy, vix)
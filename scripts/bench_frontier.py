@@ -0,0 +1,90 @@
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.optimizer import (
+    TRADING_DAYS,
+    PortfolioOptimizer,
+    _weight_bounds,
+)
+
+
+ASSETS = [5, 20, 50, 200]
+POINTS = 150
+DAYS = 756
+REPEATS = 3
+
+
+def _synth_returns(n_assets: int, seed: int = 11) -> pd.DataFrame:
+    # A few common factors so the covariance looks like a real equity book.
+    rng = np.random.default_rng(seed + n_assets)
+    factors = rng.normal(0.0, 0.009, (DAYS, 3))
+    loadings = rng.normal(1.0, 0.4, (3, n_assets))
+    idio = rng.normal(0.0004, 0.012, (DAYS, n_assets))
+    return pd.DataFrame(
+        factors @ loadings + idio, columns=[f"A{i:03d}" for i in range(n_assets)]
+    )
+
+
+def _legacy_frontier(
+    opt: PortfolioOptimizer, returns: pd.DataFrame, cov: np.ndarray, rf: float
+) -> list:
+    """The previous implementation: one cold SLSQP solve per target plus
+    separate max-Sharpe and min-vol solves."""
+    mu = returns.mean().values * TRADING_DAYS
+    lower, upper = _weight_bounds(None, len(mu))
+    bounds = {"min_weight": float(lower[0]), "max_weight": float(upper[0])}
+    points = []
+    for tr in np.linspace(float(mu.min()), float(mu.max()), POINTS):
+        try:
+            points.append(
+                opt.mvo(
+                    returns, cov, target="target_return",
+                    constraints={**bounds, "target_return": float(tr)}, rf=rf,
+                )
+            )
+        except Exception:
+            continue
+    points.append(opt.mvo(returns, cov, target="max_sharpe", constraints=bounds, rf=rf))
+    points.append(opt.mvo(returns, cov, target="min_vol", constraints=bounds, rf=rf))
+    return points
+
+
+def _time_ms(fn, repeats: int) -> tuple[float, object]:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        out = fn()
+    return (time.perf_counter() - start) * 1000 / repeats, out
+
+
+def main() -> None:
+    opt = PortfolioOptimizer()
+    rf = 0.04
+    print(
+        f"{'assets':>6} {'legacy ms':>10} {'engine ms':>10} {'speedup':>8} "
+        f"{'sharpe legacy':>14} {'sharpe engine':>14}"
+    )
+    for n_assets in ASSETS:
+        returns = _synth_returns(n_assets)
+        cov = returns.cov().values * TRADING_DAYS
+        legacy_ms, legacy = _time_ms(
+            lambda: _legacy_frontier(opt, returns, cov, rf), repeats=1
+        )
+        engine_ms, points = _time_ms(
+            lambda: opt.efficient_frontier(returns, cov, n=POINTS, rf=rf), REPEATS
+        )
+        legacy_sharpe = legacy[-2].sharpe
+        engine_sharpe = next(p.sharpe for p in points if p.kind == "max_sharpe")
+        print(
+            f"{n_assets:>6} {legacy_ms:>10.1f} {engine_ms:>10.1f} "
+            f"{legacy_ms / engine_ms:>7.1f}x {legacy_sharpe:>14.6f} {engine_sharpe:>14.6f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
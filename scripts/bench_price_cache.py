@@ -0,0 +1,73 @@
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.data_service import _deserialize_price_df, _serialize_price_df
+
+
+SIZES = [252, 756, 2520, 5040]
+REPEATS = 20
+
+
+def _synth_prices(days: int, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.01, days)))
+    return pd.DataFrame(
+        {
+            "ts": idx,
+            "close": close.round(4),
+            "adj_close": (close * 0.98).round(4),
+            "volume": rng.integers(1_000_000, 50_000_000, days),
+        }
+    )
+
+
+def _serialize_json(df: pd.DataFrame) -> str:
+    payload = []
+    for _, row in df.iterrows():
+        payload.append(
+            {
+                "ts": row["ts"].date().isoformat(),
+                "close": float(row["close"]),
+                "adj_close": float(row["adj_close"]),
+                "volume": int(row["volume"]),
+            }
+        )
+    return json.dumps(payload)
+
+
+def _time_ms(fn, *args) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fn(*args)
+    return (time.perf_counter() - start) * 1000 / REPEATS
+
+
+def main() -> None:
+    print(f"{'rows':>6} {'format':>10} {'bytes':>9} {'B/row':>6} {'enc ms':>8} {'dec ms':>8}")
+    for days in SIZES:
+        df = _synth_prices(days)
+        legacy = _serialize_json(df)
+        columnar = _serialize_price_df(df)
+        rows = [
+            ("json", legacy, _serialize_json),
+            ("columnar", columnar, _serialize_price_df),
+        ]
+        for name, blob, encode in rows:
+            enc = _time_ms(encode, df)
+            dec = _time_ms(_deserialize_price_df, blob)
+            print(
+                f"{days:>6} {name:>10} {len(blob):>9} {len(blob) / days:>6.1f} "
+                f"{enc:>8.2f} {dec:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
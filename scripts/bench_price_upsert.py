@@ -0,0 +1,72 @@
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import SessionLocal
+from app.models import PriceHistory
+from app.services.data_service import DataService
+
+
+TICKER_PREFIX = "BENCH"
+SCENARIOS = [(10, 2520), (50, 5040), (200, 5040)]
+
+
+def _synth_frames(n_tickers: int, days: int, seed: int = 5) -> dict[str, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days)
+    frames: dict[str, pd.DataFrame] = {}
+    for i in range(n_tickers):
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.01, days)))
+        frames[f"{TICKER_PREFIX}{i:03d}"] = pd.DataFrame(
+            {
+                "ts": idx,
+                "close": close.round(4),
+                "adj_close": (close * 0.98).round(4),
+                "volume": rng.integers(1_000_000, 50_000_000, days),
+            }
+        )
+    return frames
+
+
+def _cleanup(tickers: list[str]) -> None:
+    with SessionLocal() as db:
+        db.execute(delete(PriceHistory).where(PriceHistory.ticker.in_(tickers)))
+        db.commit()
+
+
+def _run(label: str, fn, frames: dict[str, pd.DataFrame]) -> None:
+    rows = sum(len(df) for df in frames.values())
+    _cleanup(list(frames))
+    start = time.perf_counter()
+    fn(frames)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<12} {elapsed:>8.2f}s {rows / elapsed:>12,.0f} rows/s")
+
+
+def main() -> None:
+    service = DataService(redis=None, session_factory=SessionLocal)
+
+    def insert_path(frames):
+        for ticker, df in frames.items():
+            service._upsert_prices(ticker, df)
+
+    try:
+        for n_tickers, days in SCENARIOS:
+            frames = _synth_frames(n_tickers, days)
+            rows = sum(len(df) for df in frames.values())
+            print(f"{n_tickers} tickers x {days} days = {rows:,} rows")
+            _run("insert", insert_path, frames)
+            _run("copy", service._copy_upsert_prices, frames)
+            _cleanup(list(frames))
+    finally:
+        _cleanup(list(_synth_frames(max(n for n, _ in SCENARIOS), 1)))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,22 @@
 
 import sys
 from collections import Counter
+from datetime import date
 from itertools import groupby
 from pathlib import Path
 
 import joblib
 import numpy as np
 import pandas as pd
-import yfinance as yf
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from app.config import settings
+from app.services.data_service import YFinanceProvider
+from app.services.price_archive import PriceArchive, read_or_fetch
 from app.services.regime_service import (
     FEATURE_NAMES,
+    MODEL_DIR,
     MODEL_PATH,
     SMOOTH_CONF_THRESHOLD,
     SMOOTH_WINDOW,
@@ -38,16 +42,21 @@ WINDOWS: dict[str, tuple[str, str, str]] = {
 }
 
 
+ARCHIVE = PriceArchive(settings.PRICE_ARCHIVE_DIR or MODEL_DIR / "price_archive")
+
+
 def _fetch(ticker: str, start: str = "1995-01-01") -> pd.Series:
-    df = yf.download(
-        ticker, start=start, interval="1d", auto_adjust=False,
-        progress=False, threads=False,
+    # Served from the local Parquet archive; only the missing tail is
+    # downloaded after the first run.
+    df = read_or_fetch(
+        ARCHIVE,
+        ticker,
+        date.fromisoformat(start),
+        lambda t, since: YFinanceProvider().download_since([t], since).get(t),
     )
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = df.columns.get_level_values(0)
-    s = df["Adj Close"].fillna(df["Close"])
-    s.index = pd.to_datetime(s.index)
-    return s
+    if df is None:
+        return pd.Series(dtype=float)
+    return df.set_index("ts")["adj_close"]
 
 
 def _section(title: str) -> None:
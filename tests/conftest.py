@@ -1,20 +1,63 @@
-
-
 import pytest
 
 
 @pytest.fixture
 def fake_redis():
+    class FakePipeline:
+        def __init__(self, redis):
+            self.redis = redis
+            self.ops: list[tuple] = []
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *_):
+            return False
+
+        def set(self, key, value, ex=None):
+            self.ops.append((key, value, ex))
+            return self
+
+        async def execute(self):
+            ops, self.ops = self.ops, []
+            for key, value, ex in ops:
+                await self.redis.set(key, value, ex=ex)
+            return [True] * len(ops)
+
     class FakeRedis:
         def __init__(self):
             self.store: dict[str, str] = {}
 
+        async def ping(self):
+            return True
+
         async def get(self, key):
             return self.store.get(key)
 
+        async def mget(self, keys):
+            return [self.store.get(k) for k in keys]
+
         async def set(self, key, value, ex=None):
             self.store[key] = value
 
+        async def zadd(self, key, mapping):
+            self.store.setdefault(key, {}).update(mapping)
+
+        async def zrangebyscore(self, key, lo, hi):
+            lo, hi = float(lo), float(hi)
+            members = self.store.get(key, {})
+            return [m for m, score in sorted(members.items(), key=lambda kv: kv[1])
+                    if lo <= score <= hi]
+
+        async def zremrangebyscore(self, key, lo, hi):
+            lo, hi = float(lo), float(hi)
+            members = self.store.get(key, {})
+            for m in [m for m, score in members.items() if lo <= score <= hi]:
+                del members[m]
+
+        def pipeline(self, transaction=True):
+            return FakePipeline(self)
+
         async def delete(self, *keys):
             for k in keys:
                 self.store.pop(k, None)
@@ -8,6 +8,7 @@ from app.schemas.common import HoldingInput
 from app.schemas.regime import RegimeSnapshotResponse
 from app.services.analyzer_service import AnalyzerService
 from app.services.backtester import VectorizedBacktester
+from app.services.data_service import ReturnStats
 from app.services.optimizer import PortfolioOptimizer
 from app.services.risk_service import RiskService
 
@@ -33,6 +34,9 @@ class _StubData:
         cols = [t for t in tickers if t in self._returns.columns]
         return self._returns[cols]
 
+    async def get_return_stats(self, tickers, lookback_days=756):
+        return ReturnStats.from_returns(await self.get_returns(tickers, lookback_days))
+
     async def get_fundamentals(self, ticker):
         return {
             "dividend_yield": 0.01,
@@ -43,6 +47,9 @@ class _StubData:
             "sector": "Tech",
         }
 
+    async def get_fundamentals_many(self, tickers):
+        return {t: await self.get_fundamentals(t) for t in tickers}
+
     async def get_risk_free_rate(self):
         return 0.04
 
@@ -83,3 +83,24 @@ def test_empty_returns_returns_empty_result():
     result = _run_sync(weights, returns, 10_000.0, "monthly", 10.0, None)
     assert result.equity_curve == []
     assert result.metrics.total_return == 0.0
+
+
+def test_equity_curve_arrow_payload_round_trips():
+    import json
+
+    import pyarrow as pa
+
+    from app.columnar import ARROW_STREAM, columnar_response
+    from app.routers.backtest import _equity_columns, _result_meta
+
+    result = _run_sync(
+        {"A": 0.5, "B": 0.5}, _synth_returns(), 10_000.0, "monthly", 10.0, _benchmark()
+    )
+    resp = columnar_response(ARROW_STREAM, _equity_columns([result]), _result_meta(result))
+
+    table = pa.ipc.open_stream(resp.body).read_all()
+    assert table.num_rows == len(result.equity_curve)
+    assert table.column("value").to_pylist()[-1] == result.equity_curve[-1].value
+    meta = json.loads(table.schema.metadata[b"meta"])
+    assert meta["metrics"]["sharpe"] == pytest.approx(result.metrics.sharpe)
+    assert "equity_curve" not in meta
@@ -0,0 +1,38 @@
+import time
+
+from app.cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used_by_size():
+    cache = LRUCache(max_bytes=30, ttl=60, sizeof=len)
+    cache.set("a", "x" * 10)
+    cache.set("b", "x" * 10)
+    cache.set("c", "x" * 10)
+    assert cache.get("a") is not None
+
+    cache.set("d", "x" * 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.nbytes == 30
+    assert cache.evictions == 1
+
+
+def test_lru_cache_expires_entries_and_skips_oversized_values():
+    cache = LRUCache(max_bytes=30, ttl=0.01, sizeof=len)
+    cache.set("a", "x" * 10)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.nbytes == 0
+
+    cache.set("big", "x" * 31)
+    assert cache.get("big") is None
+
+
+def test_lru_cache_discard_where_drops_matching_keys():
+    cache = LRUCache(max_bytes=100, ttl=60, sizeof=len)
+    for key in (("A", "B"), ("B", "C"), ("C",)):
+        cache.set(key, "x" * 10)
+
+    assert cache.discard_where(lambda key: "B" in key) == 2
+    assert len(cache) == 1 and cache.nbytes == 10
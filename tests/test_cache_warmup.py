@@ -0,0 +1,69 @@
+import asyncio
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from app.services.data_service import ReturnStats
+from app.tasks import cache_warmup
+from app.tasks.cache_warmup import WarmupState, warm_caches
+
+
+class _FakeDataService:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.warmed: list[str] = []
+        self.matrices: list[list[str]] = []
+
+    async def warm(self, tickers, lookback_days):
+        await asyncio.sleep(self.delay)
+        self.warmed = list(tickers)
+        return len(tickers)
+
+    async def get_return_stats(self, tickers, lookback_days):
+        self.matrices.append(list(tickers))
+        returns = pd.DataFrame({t: [0.01, -0.01, 0.02] for t in tickers})
+        return ReturnStats.from_returns(returns)
+
+
+@pytest.mark.asyncio
+async def test_warmup_preloads_hot_universe_and_matrices():
+    service = _FakeDataService()
+    with patch.object(
+        cache_warmup, "_hot_tickers", lambda _: (["AAPL", "MSFT"], ["NVDA", "AAPL"])
+    ):
+        state = await warm_caches(service, None, session_factory=object())
+
+    assert state.ready and state.errors == []
+    assert {"AAPL", "MSFT", "NVDA", "SPY", "^VIX", "^TNX"} <= set(service.warmed)
+    assert state.tickers == len(service.warmed)
+    assert service.matrices == [["AAPL", "MSFT", "SPY"], ["AAPL", "MSFT"]]
+    assert state.matrices == 2
+
+
+@pytest.mark.asyncio
+async def test_warmup_marks_ready_after_timeout():
+    state = WarmupState()
+    with patch.object(cache_warmup, "WARMUP_TIMEOUT", 0.05):
+        await warm_caches(_FakeDataService(delay=1.0), None, None, state)
+
+    assert state.ready
+    assert state.errors and "timed out" in state.errors[0]
+
+
+@pytest.mark.asyncio
+async def test_sync_and_warm_syncs_first_then_updates_shared_state():
+    calls: list[str] = []
+    service = _FakeDataService()
+    state = WarmupState()
+
+    async def fake_sync(data_service, session_factory):
+        calls.append("sync")
+
+    with patch.object(cache_warmup, "sync_prices", fake_sync), patch.object(
+        cache_warmup, "_hot_tickers", lambda _: (["AAPL"], [])
+    ):
+        await cache_warmup.sync_and_warm(service, None, object(), state)
+
+    assert calls == ["sync"]
+    assert state.ready and state.tickers == len(service.warmed)
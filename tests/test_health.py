@@ -11,3 +11,108 @@ async def test_health():
         resp = await client.get("/api/health")
     assert resp.status_code == 200
     assert resp.json() == {"status": "ok"}
+
+
+@pytest.mark.asyncio
+async def test_db_pool_stats_shape():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get("/api/health/db-pool")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert set(body) == {"sync", "async"}
+    assert {"size", "checked_out", "checkouts", "timeouts", "wait_ms_max"} <= set(body["sync"])
+
+
+@pytest.mark.asyncio
+async def test_ready_unavailable_until_warm():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get("/api/ready")
+    assert resp.status_code == 503
+    body = resp.json()
+    assert body["status"] == "unavailable"
+    assert body["checks"]["cache"]["status"] == "unavailable"
+
+
+def _ready_state(redis):
+    from types import SimpleNamespace
+
+    from app.tasks.cache_warmup import WarmupState
+
+    return SimpleNamespace(
+        redis=redis,
+        warmup=WarmupState(ready=True),
+        regime_service=SimpleNamespace(model_loaded=True),
+    )
+
+
+@pytest.mark.asyncio
+async def test_readiness_grades_latency_and_failures(fake_redis):
+    from types import SimpleNamespace
+    from unittest.mock import AsyncMock, patch
+
+    from app import readiness
+    from app.config import settings
+
+    state = _ready_state(fake_redis)
+    with patch.object(readiness, "_db_ping", AsyncMock()):
+        code, body = await readiness.check_readiness(state, None, None)
+        assert body["checks"]["redis"]["latency_ms"] >= 0
+        assert body["checks"]["scheduler"]["status"] == "degraded"
+
+        scheduler = SimpleNamespace(running=True, get_jobs=lambda: [])
+        code, body = await readiness.check_readiness(state, None, scheduler)
+        assert (code, body["status"]) == (200, "ready")
+
+        with patch.object(settings, "READY_REDIS_MAX_MS", -1.0):
+            code, body = await readiness.check_readiness(state, None, scheduler)
+        assert (code, body["status"]) == (settings.READY_DEGRADED_STATUS_CODE, "degraded")
+        assert body["checks"]["redis"]["status"] == "degraded"
+
+    with patch.object(readiness, "_db_ping", AsyncMock(side_effect=OSError("down"))):
+        code, body = await readiness.check_readiness(state, None, scheduler)
+    assert (code, body["status"]) == (503, "unavailable")
+    assert "down" in body["checks"]["postgres"]["error"]
+
+
+def test_timed_pool_records_checkout_wait_and_timeouts():
+    from sqlalchemy import create_engine, exc
+    from sqlalchemy.pool import QueuePool
+
+    from app.database import PoolMetrics, timed_pool
+
+    metrics = PoolMetrics()
+    engine = create_engine(
+        "sqlite://",
+        poolclass=timed_pool(QueuePool, metrics),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    held = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    held.close()
+    with engine.connect():
+        pass
+
+    stats = metrics.snapshot(engine.pool)
+    assert stats["checkouts"] == 2
+    assert stats["timeouts"] == 1
+    assert stats["wait_ms_max"] >= 40
+    engine.dispose()
+
+
+def test_async_url_translates_psycopg2_only_parameters():
+    from app.database import _async_url
+
+    url = _async_url(
+        "postgresql://u:p@db:5432/app?sslmode=require&connect_timeout=5"
+        "&prepared_statement_cache_size=0"
+    )
+    assert url.drivername == "postgresql+asyncpg"
+    assert dict(url.query) == {"ssl": "require", "prepared_statement_cache_size": "0"}
+    assert url.render_as_string(hide_password=False).startswith(
+        "postgresql+asyncpg://u:p@db:5432/app?"
+    )
@@ -1,14 +1,21 @@
 
 
+import asyncio
+import json
+import threading
+import time
 from datetime import date, timedelta
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
+import numpy as np
 import pandas as pd
 import pytest
 from httpx import ASGITransport, AsyncClient
 
 from app.services import data_service as ds_mod
 from app.services.data_service import DataService, _prices_key
+from app.services.market_data import LocalFileProvider
+from app.services.price_archive import PriceArchive
 
 
 def _fake_price_df(days: int = 10) -> pd.DataFrame:
@@ -56,7 +63,7 @@ class _StubSession:
 async def test_get_prices_cache_hit_skips_yfinance(fake_redis):
     df = _fake_price_df(5)
     service = DataService(fake_redis, _StubSessionFactory())
-    fake_redis.store[_prices_key("AAPL", 756)] = ds_mod._serialize_price_df(df)
+    fake_redis.store[_prices_key("AAPL")] = ds_mod._serialize_price_df(df, full_history=True)
 
     with patch.object(ds_mod, "_yf_download") as mock_dl:
         result = await service.get_prices(["AAPL"], lookback_days=756)
@@ -77,11 +84,406 @@ async def test_get_prices_yfinance_fallback_writes_cache(fake_redis):
 
     mock_dl.assert_called_once_with("AAPL", 756)
     mock_upsert.assert_called_once()
-    assert _prices_key("AAPL", 756) in fake_redis.store
+    assert _prices_key("AAPL") in fake_redis.store
     assert "AAPL" in result.columns
     assert len(result) == 8
 
 
+@pytest.mark.asyncio
+async def test_get_prices_batches_stale_tickers_into_one_download(fake_redis):
+    service = DataService(fake_redis, _StubSessionFactory())
+    fake_redis.store[_prices_key("SPY")] = ds_mod._serialize_price_df(
+        _fake_price_df(5), full_history=True
+    )
+    fetched = {"AAPL": _fake_price_df(8), "MSFT": _fake_price_df(8)}
+
+    with patch.object(ds_mod, "_yf_download_many", return_value=fetched) as mock_many, \
+         patch.object(ds_mod, "_yf_download") as mock_one, \
+         patch.object(DataService, "_upsert_prices", return_value=None):
+        result = await service.get_prices(["SPY", "AAPL", "MSFT"], lookback_days=756)
+
+    mock_one.assert_not_called()
+    mock_many.assert_called_once_with(["AAPL", "MSFT"], 756)
+    assert list(result.columns) == ["SPY", "AAPL", "MSFT"]
+    assert _prices_key("MSFT") in fake_redis.store
+    assert service.fetch_stats.redis_hits == 1
+    assert service.fetch_stats.provider_hits == 2
+    assert service.fetch_stats.misses == 0
+
+
+@pytest.mark.asyncio
+async def test_get_prices_slices_canonical_entry_for_shorter_lookback(fake_redis):
+    service = DataService(fake_redis, _StubSessionFactory())
+    fake_redis.store[_prices_key("SPY")] = ds_mod._serialize_price_df(_fake_price_df(300))
+
+    with patch.object(ds_mod, "_yf_download") as mock_dl:
+        detail = await service.get_prices_detail(["SPY"], lookback_days=252)
+
+    mock_dl.assert_not_called()
+    assert len(detail["SPY"]) == 252
+    assert detail["SPY"]["close"].iloc[-1] == 100.0 + 299
+
+
+@pytest.mark.asyncio
+async def test_get_prices_extends_short_canonical_entry(fake_redis):
+    service = DataService(fake_redis, _StubSessionFactory())
+    short = _fake_price_df(300).tail(5).reset_index(drop=True)
+    fake_redis.store[_prices_key("SPY")] = ds_mod._serialize_price_df(short)
+    fetched = _fake_price_df(300)
+
+    with patch.object(ds_mod, "_yf_download", return_value=fetched) as mock_dl, \
+         patch.object(DataService, "_upsert_prices", return_value=None):
+        detail = await service.get_prices_detail(["SPY"], lookback_days=252)
+
+    mock_dl.assert_called_once_with("SPY", 252)
+    assert len(detail["SPY"]) == 252
+    cached = ds_mod._deserialize_price_df(fake_redis.store[_prices_key("SPY")])
+    assert len(cached) == 300
+
+
+@pytest.mark.asyncio
+async def test_young_ticker_short_history_is_served_from_cache(fake_redis):
+    service = DataService(fake_redis, _StubSessionFactory())
+    listed = _fake_price_df(100)
+
+    with patch.object(ds_mod, "_yf_download", return_value=listed) as mock_dl, \
+         patch.object(DataService, "_upsert_prices", return_value=None):
+        for _ in range(3):
+            prices = await service.get_prices(["NEWCO"], lookback_days=2000)
+        service._memory.discard("NEWCO")
+        await service.get_prices(["NEWCO"], lookback_days=2000)
+
+    mock_dl.assert_called_once_with("NEWCO", 2000)
+    assert len(prices) == 100
+    assert ds_mod._decode_price_entry(fake_redis.store[_prices_key("NEWCO")])[1]
+
+
+@pytest.mark.asyncio
+async def test_short_windowed_download_is_not_marked_complete(fake_redis):
+    service = DataService(fake_redis, _StubSessionFactory())
+
+    with patch.object(ds_mod, "_yf_download", return_value=_fake_price_df(100)), \
+         patch.object(DataService, "_upsert_prices", return_value=None):
+        await service.get_prices(["NEWCO"], lookback_days=756)
+
+    # A "3y" download that came back short may just be missing bars.
+    assert not ds_mod._decode_price_entry(fake_redis.store[_prices_key("NEWCO")])[1]
+
+
+@pytest.mark.asyncio
+async def test_get_prices_fetches_only_missing_tail_for_stale_db_rows(fake_redis):
+    service = DataService(fake_redis, _StubSessionFactory())
+    history = _fake_price_df(300)
+    db_df = history.iloc[:-10].tail(260).reset_index(drop=True)
+    tail = history.tail(11).reset_index(drop=True)  # overlaps the last stored bar
+    last_db = db_df["ts"].iloc[-1].date()
+
+    with patch.object(
+        DataService, "_read_prices_from_db_many", return_value={"SPY": db_df}
+    ), patch.object(ds_mod, "_yf_download") as mock_full, \
+         patch.object(ds_mod, "_yf_download_since", return_value={"SPY": tail}) as mock_since, \
+         patch.object(DataService, "_upsert_prices", return_value=None) as mock_upsert:
+        detail = await service.get_prices_detail(["SPY"], lookback_days=252)
+
+    mock_full.assert_not_called()
+    mock_since.assert_called_once_with(["SPY"], last_db)
+    written = mock_upsert.call_args.args[1]
+    assert len(written) == 10
+    assert len(detail["SPY"]) == 252
+    assert detail["SPY"]["ts"].iloc[-1] == history["ts"].iloc[-1]
+
+
+@pytest.mark.asyncio
+async def test_rebased_overlap_bar_refetches_full_history(fake_redis):
+    service = DataService(fake_redis, _StubSessionFactory())
+    history = _fake_price_df(300)
+    db_df = history.iloc[:-10].tail(260).reset_index(drop=True)
+    fake_redis.store[_prices_key("SPY")] = ds_mod._serialize_price_df(
+        db_df.tail(5), full_history=False
+    )
+    # An ex-dividend day scales every earlier adj_close by the same factor.
+    rebased = history.copy()
+    rebased.loc[rebased.index[:-5], "adj_close"] *= 0.99
+    tail = rebased.tail(11).reset_index(drop=True)
+
+    with patch.object(
+        DataService, "_read_prices_from_db_many", return_value={"SPY": db_df}
+    ), patch.object(ds_mod, "_yf_download", return_value=rebased) as mock_full, \
+         patch.object(ds_mod, "_yf_download_since", return_value={"SPY": tail}), \
+         patch.object(DataService, "_upsert_prices", return_value=None) as mock_upsert:
+        detail = await service.get_prices_detail(["SPY"], lookback_days=252)
+
+    mock_full.assert_called_once_with("SPY", 252)
+    assert mock_upsert.call_args.args[1] is rebased
+    expected = rebased.tail(252)["adj_close"].tolist()
+    assert detail["SPY"]["adj_close"].tolist() == expected
+    cached = ds_mod._deserialize_price_df(fake_redis.store[_prices_key("SPY")])
+    assert cached["adj_close"].tolist() == rebased["adj_close"].tolist()
+
+
+@pytest.mark.asyncio
+async def test_sync_replaces_rebased_history_and_drops_cache_entry(fake_redis):
+    service = DataService(fake_redis, _StubSessionFactory())
+    history = _fake_price_df(300)
+    stored = history.iloc[:-10].reset_index(drop=True)
+    fake_redis.store[_prices_key("JEPI")] = ds_mod._serialize_price_df(stored)
+    split = history.copy()
+    split[["close", "adj_close"]] /= 2.0
+
+    with patch.object(
+        DataService, "_latest_ts_many",
+        return_value={"JEPI": stored["ts"].iloc[-1].date()},
+    ), patch.object(
+        DataService, "_read_prices_from_db_many", return_value={"JEPI": stored.tail(1)}
+    ), patch.object(ds_mod, "_yf_download", return_value=split) as mock_full, \
+         patch.object(ds_mod, "_yf_download_since", return_value={"JEPI": split.tail(11)}), \
+         patch.object(DataService, "_replace_prices") as mock_replace:
+        rows = await service.sync(["JEPI"], lookback_days=756)
+
+    mock_full.assert_called_once_with("JEPI", 756)
+    mock_replace.assert_called_once_with({"JEPI": split}, {"JEPI"})
+    assert rows == 300
+    assert _prices_key("JEPI") not in fake_redis.store
+
+
+@pytest.mark.asyncio
+async def test_short_lookback_rebase_keeps_older_stored_history(fake_redis):
+    executed: list = []
+
+    class _RecordingSession(_StubSession):
+        def execute(self, stmt, *args, **kwargs):
+            executed.append(stmt)
+            return super().execute(stmt, *args, **kwargs)
+
+    service = DataService(fake_redis, lambda: _RecordingSession())
+    history = _fake_price_df(300)
+    stored = history.iloc[:-10].reset_index(drop=True)
+    split = history.copy()
+    split[["close", "adj_close"]] /= 2.0
+    first_stored = date.today() - timedelta(days=1999)
+
+    with patch.object(
+        DataService, "_latest_ts_many",
+        return_value={"JEPI": stored["ts"].iloc[-1].date()},
+    ), patch.object(
+        DataService, "_first_ts_many", return_value={"JEPI": first_stored}
+    ), patch.object(
+        DataService, "_read_prices_from_db_many", return_value={"JEPI": stored.tail(1)}
+    ), patch.object(ds_mod, "_yf_download", return_value=split) as mock_full, \
+         patch.object(ds_mod, "_yf_download_since", return_value={"JEPI": split.tail(11)}), \
+         patch.object(DataService, "_upsert_many") as mock_upsert:
+        await service.sync(["JEPI"], lookback_days=60)
+
+    # The whole stored span is requested, not just the 60-day lookback...
+    mock_full.assert_called_once_with("JEPI", 2000)
+    # ...and since the provider only had 300 bars, nothing older is deleted.
+    assert not any(getattr(stmt, "is_delete", False) for stmt in executed)
+    assert any(call.args[0] == {"JEPI": split} for call in mock_upsert.call_args_list)
+
+
+def test_copy_upsert_streams_chunks_then_merges_once():
+    statements: list[str] = []
+    copied: list[str] = []
+
+    class _Cursor:
+        rowcount = 25
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *_):
+            return False
+
+        def execute(self, sql):
+            statements.append(sql)
+
+        def copy_expert(self, sql, buf):
+            copied.append(buf.read())
+
+    class _Session(_StubSession):
+        def connection(self):
+            class _Conn:
+                connection = type("_Raw", (), {"cursor": lambda self: _Cursor()})()
+
+            return _Conn()
+
+    class _Factory:
+        def __call__(self):
+            return _Session()
+
+    service = DataService(None, _Factory())
+    frame = _fake_price_df(15)
+    frame.loc[2, "volume"] = None
+    written = service._copy_upsert_prices({"AAPL": frame, "MSFT": _fake_price_df(10)}, chunk_rows=10)
+
+    assert written == 25
+    assert len(copied) == 3
+    assert sum(chunk.count("\n") for chunk in copied) == 25
+    first_rows = copied[0].splitlines()
+    assert first_rows[0].startswith("AAPL,")
+    assert first_rows[2].endswith(",")
+    assert "CREATE TEMP TABLE" in statements[0]
+    assert statements[-1].lstrip().startswith("INSERT INTO price_history")
+
+
+def test_price_csv_chunks_skip_bars_without_close():
+    frame = _fake_price_df(6)
+    frame.loc[[1, 4], "close"] = np.nan
+
+    rows = "".join(
+        buf.read() for buf in ds_mod._price_csv_chunks({"SPY": frame}, chunk_rows=3)
+    ).splitlines()
+
+    assert len(rows) == 4
+    assert all(row.split(",")[2] for row in rows)
+
+
+def test_price_blob_roundtrip_is_columnar():
+    df = _fake_price_df(30)
+    df.loc[3, "volume"] = None
+    blob = ds_mod._serialize_price_df(df)
+    assert not blob.startswith("[")
+
+    decoded = ds_mod._deserialize_price_df(blob)
+    assert list(decoded.columns) == ["ts", "close", "adj_close", "volume"]
+    assert (decoded["ts"] == df["ts"]).all()
+    assert decoded["close"].tolist() == df["close"].tolist()
+    assert pd.isna(decoded.loc[3, "volume"])
+    assert decoded.loc[4, "volume"] == df.loc[4, "volume"]
+
+
+def test_price_blob_reads_legacy_json():
+    legacy = '[{"ts": "2024-01-03", "close": 10.0, "adj_close": 9.5, "volume": 100}, ' \
+        '{"ts": "2024-01-02", "close": 9.0, "adj_close": 8.5, "volume": null}]'
+    decoded = ds_mod._deserialize_price_df(legacy)
+    assert decoded["ts"].dt.day.tolist() == [2, 3]
+    assert decoded["adj_close"].tolist() == [8.5, 9.5]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_cold_requests_share_one_fetch(fake_redis):
+    service = DataService(fake_redis, _StubSessionFactory())
+    calls = []
+
+    def slow_download(ticker, lookback_days):
+        calls.append(ticker)
+        time.sleep(0.05)
+        return _fake_price_df(8)
+
+    with patch.object(ds_mod, "_yf_download", side_effect=slow_download), \
+         patch.object(DataService, "_upsert_prices", return_value=None):
+        results = await asyncio.gather(
+            *[service.get_prices(["AAPL"], lookback_days=756) for _ in range(10)]
+        )
+
+    assert calls == ["AAPL"]
+    assert all(len(r) == 8 for r in results)
+    assert service.fetch_stats.coalesced == 9
+
+
+@pytest.mark.asyncio
+async def test_provider_locks_wait_concurrently_under_one_deadline(fake_redis):
+    waits: list[str] = []
+    released: list[str] = []
+
+    class _Lock:
+        def __init__(self, name):
+            self.name = name
+
+        async def acquire(self):
+            waits.append(self.name)
+            await asyncio.sleep(0.05)
+            return not self.name.endswith("T3")  # held elsewhere until timeout
+
+        async def release(self):
+            released.append(self.name)
+
+    fake_redis.lock = lambda name, **_: _Lock(name)
+    service = DataService(fake_redis, _StubSessionFactory(), distributed_locks=True)
+    tickers = [f"T{i}" for i in range(10)]
+
+    started = time.perf_counter()
+    async with service._provider_locks(tickers):
+        elapsed = time.perf_counter() - started
+
+    assert len(waits) == 10
+    assert elapsed < 0.25  # one wait, not ten back to back
+    assert len(released) == 9
+
+
+@pytest.mark.asyncio
+async def test_concurrent_fundamentals_share_one_lookup(fake_redis):
+    service = DataService(fake_redis, _StubSessionFactory())
+
+    def slow_info(ticker):
+        time.sleep(0.05)
+        return {"sector": "Tech"}
+
+    with patch.object(ds_mod, "_yf_info", side_effect=slow_info) as mock_info:
+        results = await asyncio.gather(
+            *[service.get_fundamentals("AAPL") for _ in range(5)]
+        )
+
+    mock_info.assert_called_once()
+    assert all(r["sector"] == "Tech" for r in results)
+
+
+@pytest.mark.asyncio
+async def test_hot_series_served_from_memory_until_upsert(fake_redis):
+    service = DataService(fake_redis, _StubSessionFactory())
+    fake_redis.store[_prices_key("SPY")] = ds_mod._serialize_price_df(_fake_price_df(300))
+
+    await service.get_prices(["SPY"], lookback_days=252)
+    fake_redis.store.clear()
+    again = await service.get_prices(["SPY"], lookback_days=252)
+
+    assert len(again) == 252
+    assert service.fetch_stats.memory_hits == 1
+
+    with patch.object(ds_mod, "pg_insert"):
+        service._upsert_prices("SPY", _fake_price_df(1))
+    assert service._memory.get("SPY") is None
+
+
+@pytest.mark.asyncio
+async def test_return_stats_cached_per_universe_and_reordered(fake_redis):
+    service = DataService(fake_redis, _StubSessionFactory())
+    a, b = _fake_price_df(60), _fake_price_df(60)
+    b["adj_close"] = b["adj_close"] * (1 + 0.01 * np.sin(np.arange(60)))
+    fake_redis.store[_prices_key("AAA")] = ds_mod._serialize_price_df(a, full_history=True)
+    fake_redis.store[_prices_key("BBB")] = ds_mod._serialize_price_df(b, full_history=True)
+
+    with patch.object(
+        ds_mod.ReturnStats, "from_returns", wraps=ds_mod.ReturnStats.from_returns
+    ) as build:
+        first = await service.get_return_stats(["AAA", "BBB"], lookback_days=60)
+        second = await service.get_return_stats(["BBB", "AAA"], lookback_days=60)
+
+    build.assert_called_once()
+    assert list(second.returns.columns) == ["BBB", "AAA"]
+    assert second.cov[0, 0] == pytest.approx(first.cov[1, 1])
+    assert second.cov[0, 1] == pytest.approx(first.cov[1, 0])
+    expected = first.returns.cov().values * 252
+    assert np.allclose(first.cov, expected)
+
+
+@pytest.mark.asyncio
+async def test_invalidating_rebased_ticker_evicts_its_return_stats(fake_redis):
+    service = DataService(fake_redis, _StubSessionFactory())
+    for ticker in ("AAA", "BBB", "CCC"):
+        fake_redis.store[_prices_key(ticker)] = ds_mod._serialize_price_df(
+            _fake_price_df(60), full_history=True
+        )
+    await service.get_return_stats(["AAA", "BBB"], lookback_days=60)
+    await service.get_return_stats(["CCC", "BBB"], lookback_days=60)
+    await service.get_return_stats(["CCC"], lookback_days=60)
+
+    await service._invalidate(["AAA"])
+    assert len(service._matrices) == 2
+    await service._invalidate(["BBB"])
+    assert len(service._matrices) == 1
+
+
 @pytest.mark.asyncio
 async def test_validate_tickers_splits_valid_invalid(fake_redis):
     service = DataService(fake_redis, _StubSessionFactory())
@@ -96,6 +498,23 @@ async def test_validate_tickers_splits_valid_invalid(fake_redis):
     assert result["invalid"] == ["ZZZZ", "QQQQQQ"]
 
 
+@pytest.mark.asyncio
+async def test_validate_tickers_resolves_locally_then_caches(fake_redis):
+    service = DataService(fake_redis, _StubSessionFactory())
+    fake_redis.store["edgar:tickers"] = json.dumps({"AAPL": 320193})
+
+    with patch.object(
+        ds_mod, "_yf_is_valid", side_effect=lambda t: t == "SPY"
+    ) as mock_valid:
+        first = await service.validate_tickers(["AAPL", "SPY", "ZZZZ"])
+        second = await service.validate_tickers(["ZZZZ", "AAPL", "SPY"])
+
+    assert first == {"valid": ["AAPL", "SPY"], "invalid": ["ZZZZ"]}
+    assert second == {"valid": ["AAPL", "SPY"], "invalid": ["ZZZZ"]}
+    assert sorted(c.args[0] for c in mock_valid.call_args_list) == ["SPY", "ZZZZ"]
+    assert fake_redis.store["validate:ZZZZ"] == "0"
+
+
 @pytest.mark.asyncio
 async def test_get_fundamentals_caches(fake_redis):
     service = DataService(fake_redis, _StubSessionFactory())
@@ -117,6 +536,137 @@ async def test_get_fundamentals_caches(fake_redis):
     assert second["beta"] == 1.05
 
 
+@pytest.mark.asyncio
+async def test_fundamentals_many_batches_reads_and_bounds_fetches(fake_redis):
+    fake_redis.store["fundamentals:AAPL"] = json.dumps({"sector": "Tech"})  # legacy
+    fake_redis.mget = AsyncMock(wraps=fake_redis.mget)
+    active = peak = 0
+    lock = threading.Lock()
+
+    def slow_info(ticker):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+        return {"sector": ticker}
+
+    tickers = ["AAPL"] + [f"T{i}" for i in range(20)]
+    with patch.object(ds_mod, "FUNDAMENTALS_CONCURRENCY", 3):
+        service = DataService(fake_redis, _StubSessionFactory())
+    with patch.object(ds_mod, "_yf_info", side_effect=slow_info) as mock_info:
+        result = await service.get_fundamentals_many(tickers)
+
+    fake_redis.mget.assert_awaited_once()
+    assert list(result) == tickers
+    assert result["AAPL"] == {"sector": "Tech"}
+    assert result["T7"]["sector"] == "T7"
+    assert mock_info.call_count == 20
+    assert peak <= 3
+
+
+@pytest.mark.asyncio
+async def test_failed_fundamentals_cached_briefly(fake_redis):
+    service = DataService(fake_redis, _StubSessionFactory())
+    fake_redis.set = AsyncMock(wraps=fake_redis.set)
+
+    with patch.object(ds_mod, "_yf_info", return_value={}) as mock_info:
+        first = await service.get_fundamentals("ZZZZ")
+        second = await service.get_fundamentals("ZZZZ")
+
+    mock_info.assert_called_once()
+    assert first == second and first["market_cap"] is None
+    assert fake_redis.set.await_args.kwargs["ex"] == ds_mod.FUNDAMENTALS_NEGATIVE_TTL
+
+
+@pytest.mark.asyncio
+async def test_stale_fundamentals_served_while_refreshing(fake_redis):
+    service = DataService(fake_redis, _StubSessionFactory())
+    expired_at = time.time() - ds_mod.CACHE_TTL_FUNDAMENTALS - 60
+    fake_redis.store["fundamentals:AAPL"] = json.dumps(
+        {"v": {"sector": "Old"}, "at": expired_at}
+    )
+
+    with patch.object(ds_mod, "_yf_info", return_value={"sector": "New"}) as mock_info:
+        stale = await service.get_fundamentals("AAPL")
+        assert stale == {"sector": "Old"}
+        await asyncio.gather(*service._refreshes)
+
+    mock_info.assert_called_once()
+    fresh = await service.get_fundamentals("AAPL")
+    assert fresh["sector"] == "New"
+
+
+@pytest.mark.asyncio
+async def test_local_file_provider_serves_prices_offline(fake_redis, tmp_path):
+    days = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=3000)
+    pd.DataFrame(
+        {"Date": days, "Close": np.linspace(10, 200, len(days))}
+    ).to_csv(tmp_path / "SPY.csv", index=False)
+    (tmp_path / "fundamentals.json").write_text(json.dumps({"SPY": {"beta": 1.0}}))
+    provider = LocalFileProvider(tmp_path)
+    service = DataService(fake_redis, _StubSessionFactory(), provider=provider)
+
+    with patch.object(ds_mod, "_yf_download_batch") as mock_yf, \
+         patch.object(service, "_upsert_many"):
+        prices = await service.get_prices(["SPY"], lookback_days=252)
+        longest = await service.get_prices(["SPY"], lookback_days=2000)
+        fundamentals = await service.get_fundamentals("SPY")
+        validity = await service.validate_tickers(["SPY", "NOPE"])
+
+    mock_yf.assert_not_called()
+    assert len(prices) == 252
+    assert len(longest) == 2000
+    assert fundamentals["beta"] == 1.0
+    assert validity == {"valid": ["SPY"], "invalid": ["NOPE"]}
+    assert ds_mod._decode_price_entry(fake_redis.store[_prices_key("SPY")])[1]
+
+
+@pytest.mark.asyncio
+async def test_long_lookback_served_from_archive_with_db_tail(fake_redis, tmp_path):
+    archive = PriceArchive(tmp_path)
+    history = _fake_price_df(2000)
+    archive.write("SPY", history.iloc[:-10])
+    service = DataService(fake_redis, _StubSessionFactory(), archive=archive)
+
+    with patch.object(
+        service, "_read_prices_from_db_many"
+    ) as mock_window, patch.object(
+        service, "_read_prices_from_db_since", return_value={"SPY": history.iloc[-11:]}
+    ) as mock_since, patch.object(ds_mod, "_yf_download_batch") as mock_yf:
+        prices = await service.get_prices(["SPY"], lookback_days=1800)
+
+    mock_window.assert_not_called()
+    mock_yf.assert_not_called()
+    mock_since.assert_awaited_once()
+    assert len(prices) == 1800
+    assert service.fetch_stats.archive_hits == 1
+    assert archive.read("SPY", 1)[0]["ts"].iloc[-1] == history["ts"].iloc[-1]
+
+
+@pytest.mark.asyncio
+async def test_archive_rebased_under_db_is_refetched_and_rewritten(fake_redis, tmp_path):
+    archive = PriceArchive(tmp_path)
+    history = _fake_price_df(2000)
+    archive.write("SPY", history.iloc[:-10], full_history=True)
+    split = history.copy()
+    split[["close", "adj_close"]] /= 2.0
+    service = DataService(fake_redis, _StubSessionFactory(), archive=archive)
+
+    with patch.object(
+        service, "_read_prices_from_db_since", return_value={"SPY": split.iloc[-11:]}
+    ), patch.object(ds_mod, "_yf_download", return_value=split) as mock_full, \
+         patch.object(DataService, "_upsert_prices", return_value=None):
+        prices = await service.get_prices(["SPY"], lookback_days=1800)
+
+    mock_full.assert_called_once_with("SPY", 1800)
+    assert prices["SPY"].tolist() == split["adj_close"].tail(1800).tolist()
+    archived = archive.read_since("SPY", history["ts"].iloc[0].date())
+    assert archived["close"].tolist() == split["close"].tolist()
+
+
 @pytest.mark.asyncio
 async def test_market_prices_endpoint_uses_data_service(fake_redis):
     from app.main import app
@@ -124,7 +674,7 @@ async def test_market_prices_endpoint_uses_data_service(fake_redis):
 
     df = _fake_price_df(6)
     service = RealDS(fake_redis, _StubSessionFactory())
-    fake_redis.store[_prices_key("AAPL", 756)] = ds_mod._serialize_price_df(df)
+    fake_redis.store[_prices_key("AAPL")] = ds_mod._serialize_price_df(df, full_history=True)
 
     app.state.redis = fake_redis
     app.state.data_service = service
@@ -138,3 +688,74 @@ async def test_market_prices_endpoint_uses_data_service(fake_redis):
     assert len(data) == 1
     assert data[0]["ticker"] == "AAPL"
     assert len(data[0]["prices"]) == 6
+
+
+@pytest.mark.asyncio
+async def test_market_prices_columnar_and_ndjson_shapes(fake_redis):
+    from app.main import app
+
+    service = DataService(fake_redis, _StubSessionFactory())
+    for ticker in ("AAPL", "MSFT"):
+        fake_redis.store[_prices_key(ticker)] = ds_mod._serialize_price_df(
+            _fake_price_df(6), full_history=True
+        )
+    app.state.redis = fake_redis
+    app.state.data_service = service
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        columnar = await client.get(
+            "/api/market/prices", params={"tickers": "AAPL,MSFT", "format": "columnar"}
+        )
+        with patch("app.routers.market.STREAM_BATCH_TICKERS", 1):
+            streamed = await client.get(
+                "/api/market/prices", params={"tickers": "AAPL,MSFT", "format": "ndjson"}
+            )
+
+    body = columnar.json()
+    assert [s["ticker"] for s in body] == ["AAPL", "MSFT"]
+    assert len(body[0]["ts"]) == len(body[0]["close"]) == 6
+    assert body[0]["volume"][0] == 1_000_000
+    assert body[0]["ts"][-1] == date.today().isoformat()
+
+    assert streamed.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in streamed.text.splitlines()]
+    assert lines == body
+
+
+@pytest.mark.asyncio
+async def test_market_prices_negotiates_arrow_and_msgpack(fake_redis):
+    import msgpack
+    import pyarrow as pa
+
+    from app.main import app
+
+    service = DataService(fake_redis, _StubSessionFactory())
+    fake_redis.store[_prices_key("AAPL")] = ds_mod._serialize_price_df(
+        _fake_price_df(6), full_history=True
+    )
+    app.state.redis = fake_redis
+    app.state.data_service = service
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        arrow = await client.get(
+            "/api/market/prices",
+            params={"tickers": "AAPL"},
+            headers={"Accept": "application/vnd.apache.arrow.stream"},
+        )
+        packed = await client.get(
+            "/api/market/prices",
+            params={"tickers": "AAPL"},
+            headers={"Accept": "application/msgpack, application/json;q=0.5"},
+        )
+
+    assert arrow.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(arrow.content).read_all()
+    assert table.column_names == ["ticker", "ts", "close", "adj_close", "volume"]
+    assert table.num_rows == 6
+    assert table.schema.field("ts").type == pa.date32()
+
+    body = msgpack.unpackb(packed.content)
+    assert body["columns"]["ts"][-1] == date.today().isoformat()
+    assert body["columns"]["volume"][0] == 1_000_000
@@ -0,0 +1,49 @@
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from app.services.data_service import PRICE_RETRY_TTL, DataService
+from app.services.market_calendar import EXCHANGE_TZ, ExchangeCalendar
+
+
+def _ny(*args) -> datetime:
+    return datetime(*args, tzinfo=EXCHANGE_TZ)
+
+
+def test_holidays_and_early_closes():
+    cal = ExchangeCalendar()
+    assert not cal.is_trading_day(date(2025, 4, 18))  # Good Friday
+    assert not cal.is_trading_day(date(2026, 7, 3))  # July 4th observed
+    assert not cal.is_trading_day(date(2025, 1, 9))  # special closure
+    assert cal.is_trading_day(date(2022, 12, 30))  # Saturday New Year not observed
+    assert cal.session_close(date(2025, 11, 28)).hour == 13
+    assert cal.session_close(date(2025, 11, 26)).hour == 16
+
+
+def test_last_complete_session_tracks_close_and_publish_delay():
+    cal = ExchangeCalendar()
+    # Friday before the close: Thursday's bar is the latest.
+    assert cal.last_complete_session(_ny(2025, 6, 13, 15, 0)) == date(2025, 6, 12)
+    assert cal.last_complete_session(_ny(2025, 6, 13, 16, 10)) == date(2025, 6, 12)
+    assert cal.last_complete_session(_ny(2025, 6, 13, 16, 31)) == date(2025, 6, 13)
+    # Over the weekend Friday stays current until Monday's bar is due.
+    sunday = _ny(2025, 6, 15, 12, 0)
+    assert cal.is_current(date(2025, 6, 13), sunday)
+    assert cal.next_bar_at(sunday) == _ny(2025, 6, 16, 16, 30)
+    # Juneteenth: Wednesday's bar is current until Friday's close.
+    assert cal.next_bar_at(_ny(2025, 6, 18, 20, 0)) == _ny(2025, 6, 20, 16, 30)
+    assert cal.sessions_behind(date(2025, 6, 13), _ny(2025, 6, 20, 17, 0)) == 4
+
+
+def test_price_ttl_expires_at_next_bar():
+    cal = ExchangeCalendar()
+    service = DataService(None, None, calendar=cal)
+    last = cal.last_complete_session()
+    current = pd.DataFrame({"ts": [pd.Timestamp(last)], "close": [1.0]})
+    behind = pd.DataFrame({"ts": [pd.Timestamp(cal.previous_session(last))], "close": [1.0]})
+
+    expected = cal.seconds_until_next_bar()
+    assert service._price_ttl(current) == pytest.approx(max(60, expected), abs=5)
+    assert service._price_ttl(behind) == PRICE_RETRY_TTL
+    assert service._memory_ttl(current) <= 300
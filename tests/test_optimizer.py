@@ -60,6 +60,210 @@ def test_risk_parity_marginal_contribs_close_to_equal():
     assert max(contribs) - min(contribs) < 0.05
 
 
+def test_risk_parity_matches_custom_budgets_and_reports_diagnostics():
+    from app.services.risk_budget import risk_contributions
+
+    opt = PortfolioOptimizer()
+    returns = _synth_returns()
+    cov = _cov(returns)
+    budgets = {"A": 0.4, "B": 0.3, "C": 0.2, "D": 0.1}
+    res = opt.risk_parity(
+        cov, list(returns.columns), returns=returns, rf=0.04, risk_budgets=budgets
+    )
+    w = np.array([res.weights[t] for t in returns.columns])
+    np.testing.assert_allclose(
+        risk_contributions(w, cov), list(budgets.values()), atol=1e-8
+    )
+    assert res.iterations is not None and res.iterations <= 10
+    assert res.residual < 1e-8
+
+    with pytest.raises(ValueError):
+        opt.risk_parity(cov, list(returns.columns), risk_budgets={"A": 0.0})
+
+
+def test_risk_parity_unlisted_tickers_get_mean_budget():
+    from app.services.risk_budget import risk_contributions
+
+    returns = _synth_returns()
+    cov = _cov(returns)
+    res = PortfolioOptimizer().risk_parity(
+        cov, list(returns.columns), risk_budgets={"A": 0.4, "B": 0.2}
+    )
+    w = np.array([res.weights[t] for t in returns.columns])
+    # C and D default to mean(0.4, 0.2) = 0.3; the total renormalises to 1.2.
+    np.testing.assert_allclose(
+        risk_contributions(w, cov), np.array([0.4, 0.2, 0.3, 0.3]) / 1.2, atol=1e-8
+    )
+
+
+@pytest.mark.parametrize(
+    "budgets", [{"A": 0.5, "ZZZ": 0.5}, {"A": 0.5, "B": -0.1}]
+)
+def test_risk_parity_rejects_unknown_or_non_positive_budgets(budgets):
+    from app.services.optimizer import OptimizerInputError
+
+    returns = _synth_returns()
+    with pytest.raises(OptimizerInputError):
+        PortfolioOptimizer().risk_parity(
+            _cov(returns), list(returns.columns), risk_budgets=budgets
+        )
+
+
+def test_risk_budget_error_separates_unknown_tickers_from_missing_data():
+    from app.services.optimizer import OptimizerInputError
+
+    returns = _synth_returns()
+    with pytest.raises(OptimizerInputError) as exc:
+        PortfolioOptimizer().risk_parity(
+            _cov(returns), list(returns.columns),
+            risk_budgets={"A": 1.0, "NEWCO": 1.0, "ZZZ": 1.0},
+            portfolio=[*returns.columns, "NEWCO"],
+        )
+    message = str(exc.value)
+    assert "not in the portfolio: ZZZ" in message
+    assert "without return data: NEWCO" in message
+
+
+@pytest.mark.asyncio
+async def test_optimize_router_maps_bad_risk_budgets_to_400():
+    from types import SimpleNamespace
+
+    from fastapi import HTTPException
+
+    from app.routers.optimize import _run_optimization
+
+    returns = _synth_returns()
+
+    class _Data:
+        async def get_return_stats(self, tickers, lookback_days):
+            return SimpleNamespace(returns=returns, cov=_cov(returns))
+
+        async def get_risk_free_rate(self):
+            return 0.04
+
+    with pytest.raises(HTTPException) as exc:
+        await _run_optimization(
+            "risk_parity", list(returns.columns), _Data(),
+            constraints_dict={"risk_budgets": {"ZZZ": 1.0}},
+        )
+    assert exc.value.status_code == 400
+    assert "ZZZ" in exc.value.detail
+
+
+@pytest.mark.asyncio
+async def test_optimize_router_does_not_mask_internal_value_errors(monkeypatch):
+    from types import SimpleNamespace
+
+    from app.routers import optimize
+
+    returns = _synth_returns()
+
+    class _Data:
+        async def get_return_stats(self, tickers, lookback_days):
+            return SimpleNamespace(returns=returns, cov=_cov(returns))
+
+        async def get_risk_free_rate(self):
+            return 0.04
+
+    def broken(*args, **kwargs):
+        raise ValueError("array must not contain infs or NaNs")
+
+    monkeypatch.setattr(optimize.optimizer, "risk_parity", broken)
+    with pytest.raises(ValueError, match="infs or NaNs"):
+        await optimize._run_optimization("risk_parity", list(returns.columns), _Data())
+
+
+def test_risk_parity_converges_on_ill_conditioned_covariance():
+    rng = np.random.default_rng(3)
+    factors = rng.normal(size=(60, 2))
+    cov = factors @ factors.T + 1e-8 * np.eye(60)
+    res = PortfolioOptimizer().risk_parity(cov, [f"T{i}" for i in range(60)])
+    assert res.residual < 1e-6
+    assert sum(res.weights.values()) == pytest.approx(1.0, abs=1e-9)
+
+
+def test_slsqp_objectives_have_exact_gradients():
+    from unittest.mock import patch
+
+    from scipy.optimize import approx_fprime, minimize
+
+    from app.services import optimizer as opt_mod
+
+    captured = []
+
+    def spy(fun, x0, jac=None, **kwargs):
+        captured.append((fun, jac, kwargs["constraints"]))
+        return minimize(fun, x0, jac=jac, **kwargs)
+
+    opt = PortfolioOptimizer()
+    returns = _synth_returns()
+    cov = _cov(returns)
+    with patch.object(opt_mod, "minimize", spy):
+        opt.mvo(returns, cov, target="max_sharpe", rf=0.04)
+        opt.mvo(
+            returns, cov, target="target_return",
+            constraints={"target_return": 0.15}, rf=0.04,
+        )
+        opt._risk_parity_slsqp(cov, np.full(4, 0.25))
+
+    w = np.array([0.1, 0.2, 0.3, 0.4])
+    for fun, jac, constraints in captured:
+        assert jac is not None
+        np.testing.assert_allclose(jac(w), approx_fprime(w, fun, 1e-8), atol=1e-5)
+        for con in constraints:
+            np.testing.assert_allclose(
+                con["jac"](w), approx_fprime(w, con["fun"], 1e-8), atol=1e-5
+            )
+
+
+def test_mvo_relaxes_min_weight_for_large_universes():
+    rng = np.random.default_rng(7)
+    returns = pd.DataFrame(
+        rng.normal(0.0005, 0.01, (252, 120)),
+        columns=[f"T{i}" for i in range(120)],
+    )
+    res = PortfolioOptimizer().mvo(returns, _cov(returns), target="min_vol")
+    assert sum(res.weights.values()) == pytest.approx(1.0, abs=1e-6)
+    assert min(res.weights.values()) >= -1e-9
+
+
+@pytest.mark.parametrize(
+    "constraints",
+    [{"min_weight": 0.3}, {"max_weight": 0.2}, {"min_weight": 0.2, "max_weight": 0.1}],
+)
+def test_mvo_rejects_infeasible_explicit_bounds(constraints):
+    from app.services.optimizer import OptimizerInputError
+
+    returns = _synth_returns()
+    with pytest.raises(OptimizerInputError):
+        PortfolioOptimizer().mvo(returns, _cov(returns), constraints=constraints)
+
+
+@pytest.mark.parametrize("target", ["max_sharpe", "min_vol", "target_return"])
+def test_cvxpy_backend_matches_slsqp(target):
+    opt = PortfolioOptimizer(cache_size=0)
+    returns = _synth_returns()
+    cov = _cov(returns)
+    constraints = {"target_return": 0.15} if target == "target_return" else None
+    ref = opt.mvo(returns, cov, target=target, constraints=constraints, solver="slsqp")
+    for _ in range(2):  # second solve re-binds the compiled problem
+        res = opt.mvo(returns, cov, target=target, constraints=constraints, solver="cvxpy")
+        assert sum(res.weights.values()) == pytest.approx(1.0, abs=1e-9)
+        assert res.volatility == pytest.approx(ref.volatility, abs=1e-5)
+        for t in returns.columns:
+            assert res.weights[t] == pytest.approx(ref.weights[t], abs=1e-3)
+
+
+def test_cvxpy_failure_falls_back_to_slsqp(monkeypatch):
+    from app.services import convex
+
+    monkeypatch.setattr(convex, "solve_mvo", lambda *a, **k: None)
+    returns = _synth_returns()
+    res = PortfolioOptimizer().mvo(returns, _cov(returns), solver="cvxpy")
+    assert sum(res.weights.values()) == pytest.approx(1.0, abs=1e-6)
+    assert math.isfinite(res.sharpe)
+
+
 def test_black_litterman_no_views_uses_equilibrium():
     opt = PortfolioOptimizer()
     returns = _synth_returns()
@@ -100,6 +304,31 @@ def test_efficient_frontier_returns_grid_and_specials():
     assert kinds.issuperset({"max_sharpe", "min_vol"})
 
 
+def test_frontier_engine_matches_slsqp_solves():
+    opt = PortfolioOptimizer()
+    returns = _synth_returns()
+    cov = _cov(returns)
+    points = opt.efficient_frontier(returns, cov, n=30, rf=0.04)
+    grid = [p for p in points if p.kind is None]
+    specials = {p.kind: p for p in points if p.kind}
+
+    mid = grid[15]
+    ref = opt.mvo(
+        returns, cov, target="target_return",
+        constraints={"target_return": mid.expected_return}, rf=0.04,
+    )
+    assert mid.volatility <= ref.volatility + 1e-7
+    assert specials["max_sharpe"].sharpe >= opt.mvo(returns, cov, rf=0.04).sharpe - 1e-6
+    assert specials["min_vol"].volatility <= (
+        opt.mvo(returns, cov, target="min_vol", rf=0.04).volatility + 1e-7
+    )
+    vols = [p.volatility for p in grid if p.expected_return >= specials["min_vol"].expected_return]
+    assert vols == sorted(vols)
+    for p in points:
+        assert sum(p.weights.values()) == pytest.approx(1.0, abs=1e-9)
+        assert all(0.01 - 1e-9 <= w <= 0.60 + 1e-9 for w in p.weights.values())
+
+
 def test_regime_blended_pure_bull_matches_max_sharpe():
     opt = PortfolioOptimizer()
     returns = _synth_returns()
@@ -203,3 +432,27 @@ def test_regime_blended_rejects_zero_probabilities():
             regime_probabilities={"bull": 0.0, "sideways": 0.0, "bear": 0.0},
             rf=0.04,
         )
+
+
+def test_shared_solves_are_memoized_across_methods():
+    opt = PortfolioOptimizer()
+    returns = _synth_returns()
+    cov = _cov(returns)
+    probs = {"bull": 0.4, "sideways": 0.4, "bear": 0.2}
+    # The analyzer's sequence: max-Sharpe and risk parity, then the blend.
+    mvo = opt.mvo(returns, cov, "max_sharpe", None, 0.04)
+    rp = opt.risk_parity(cov, list(returns.columns), returns, 0.04)
+    blended = opt.regime_blended(returns, cov, probs, 0.04, None)
+    assert (opt.cache_misses, opt.cache_hits) == (3, 2)
+    assert blended.components["max_sharpe"] == mvo.weights
+    assert blended.components["risk_parity"] == rp.weights
+
+    tilted = opt.earnings_tilt(returns, cov, probs, earnings=None, rf=0.04)
+    assert (opt.cache_misses, opt.cache_hits) == (3, 5)
+    assert tilted.weights == blended.weights
+
+    # A hit is a copy, and a different problem is a miss.
+    mvo.weights["A"] = -1.0
+    assert opt.mvo(returns, cov, "max_sharpe", None, 0.04).weights["A"] >= 0.0
+    opt.mvo(returns, cov, "max_sharpe", None, 0.05)
+    assert opt.cache_misses == 4
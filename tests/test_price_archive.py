@@ -0,0 +1,91 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from app.services.price_archive import PriceArchive, read_or_fetch
+
+
+def _bars(start: str, periods: int) -> pd.DataFrame:
+    ts = pd.bdate_range(start, periods=periods)
+    close = np.linspace(100.0, 200.0, periods)
+    return pd.DataFrame(
+        {"ts": ts, "close": close, "adj_close": close, "volume": [1_000] * periods}
+    )
+
+
+def test_archive_partitions_by_year_and_reads_newest_first(tmp_path):
+    archive = PriceArchive(tmp_path)
+    archive.write("SPY", _bars("2015-01-01", 1500), full_history=True)
+
+    years = sorted(p.name for p in (tmp_path / "ticker=SPY").glob("year=*.parquet"))
+    assert years[0] == "year=2015.parquet" and len(years) == 6
+
+    df, complete = archive.read("SPY", 300)
+    assert len(df) == 300 and not complete
+    assert df["ts"].is_monotonic_increasing
+    assert df["volume"].iloc[-1] == 1_000
+
+    full, complete = archive.read("SPY", 5000)
+    assert len(full) == 1500 and complete
+
+
+def test_archive_write_merges_overlapping_tail(tmp_path):
+    archive = PriceArchive(tmp_path)
+    archive.write("SPY", _bars("2020-01-01", 100))
+    tail = _bars("2020-05-01", 30)
+    tail["close"] = -1.0
+    archive.write("SPY", tail)
+
+    df = archive.read_since("SPY", date(2020, 1, 1))
+    assert df["ts"].is_unique
+    assert (df[df["ts"] >= "2020-05-01"]["close"] == -1.0).all()
+
+
+def test_read_or_fetch_only_downloads_missing_tail(tmp_path):
+    archive = PriceArchive(tmp_path)
+    history = _bars("1995-01-02", 300)
+    calls: list[date] = []
+
+    def fetch_since(ticker, since):
+        calls.append(since)
+        return history[history["ts"].dt.date >= since]
+
+    first = read_or_fetch(archive, "SPY", date(1995, 1, 1), fetch_since)
+    second = read_or_fetch(archive, "SPY", date(1995, 1, 1), fetch_since)
+
+    assert len(first) == len(second) == 300
+    assert calls[0] == date(1995, 1, 1)
+    assert calls[1] == history["ts"].iloc[-1].date()
+
+
+def test_read_or_fetch_rewrites_archive_when_overlap_bar_is_rebased(tmp_path):
+    archive = PriceArchive(tmp_path)
+    archive.write("SPY", _bars("1995-01-02", 300), full_history=True)
+    # A 2:1 split re-bases every bar, the last archived one included.
+    history = _bars("1995-01-02", 320)
+    history[["close", "adj_close"]] /= 2.0
+    calls: list[date] = []
+
+    def fetch_since(ticker, since):
+        calls.append(since)
+        return history[history["ts"].dt.date >= since]
+
+    df = read_or_fetch(archive, "SPY", date(1995, 6, 1), fetch_since)
+
+    assert calls == [date(1996, 2, 23), date(1995, 1, 2)]
+    full = archive.read_since("SPY", date(1995, 1, 1))
+    assert full["close"].tolist() == history["close"].tolist()
+    assert archive.is_full_history("SPY")
+    assert df["ts"].iloc[0].date() >= date(1995, 6, 1)
+
+
+def test_archive_write_replace_drops_stale_partitions(tmp_path):
+    archive = PriceArchive(tmp_path)
+    archive.write("SPY", _bars("2015-01-01", 1500), full_history=True)
+    archive.write("SPY", _bars("2018-01-01", 300), replace=True)
+
+    years = sorted(p.name for p in (tmp_path / "ticker=SPY").glob("year=*.parquet"))
+    assert years == ["year=2018.parquet", "year=2019.parquet"]
+    assert not archive.is_full_history("SPY")
+    assert len(archive.read_since("SPY", date(2015, 1, 1))) == 300
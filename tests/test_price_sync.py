@@ -0,0 +1,82 @@
+import json
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from app.services.data_service import REQUESTED_TICKERS_KEY, DataService
+from app.services.market_calendar import ExchangeCalendar
+from app.tasks import price_sync
+from app.tasks.price_sync import LAST_RUN_KEY, sync_prices
+
+
+class _FakeDataService:
+    def __init__(self, redis, requested=(), fail=()):
+        self.redis = redis
+        self.calendar = ExchangeCalendar()
+        self.requested = list(requested)
+        self.fail = set(fail)
+        self.synced: list[list[str]] = []
+        self.warmed: list[list[str]] = []
+
+    async def sync(self, tickers, lookback_days):
+        if self.fail & set(tickers):
+            raise RuntimeError("provider down")
+        self.synced.append(list(tickers))
+        return len(tickers)
+
+    async def warm(self, tickers, lookback_days):
+        self.warmed.append(list(tickers))
+        return len(tickers)
+
+    async def latest_dates(self, tickers):
+        return {t: date.today() for t in tickers if t != "STALE"}
+
+    async def recently_requested(self, within_seconds):
+        return self.requested
+
+
+@pytest.mark.asyncio
+async def test_sync_covers_held_and_requested_tickers_in_batches(fake_redis):
+    held = [f"T{i:03d}" for i in range(120)]
+    service = _FakeDataService(fake_redis, requested=["nvda", "T000", "STALE"])
+    with (
+        patch.object(price_sync, "_db_universe", lambda _: held),
+        patch.object(price_sync, "SYNC_WAVE_PAUSE", 0),
+    ):
+        run = await sync_prices(service, session_factory=object())
+
+    universe = [t for batch in service.synced for t in batch]
+    assert len(universe) == len(set(universe))
+    assert set(universe) == set(price_sync.DEMO_TICKERS) | set(held) | {"NVDA", "STALE"}
+    assert max(len(b) for b in service.synced) <= price_sync.SYNC_BATCH_SIZE
+    assert service.warmed == service.synced
+
+    assert run["tickers"] == len(universe)
+    assert run["rows_written"] == len(universe)
+    assert run["failed"] == []
+    assert run["lagging"] == {"STALE": None}
+    assert json.loads(await fake_redis.get(LAST_RUN_KEY)) == run
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_reported_and_others_still_sync(fake_redis):
+    service = _FakeDataService(fake_redis, fail={"SPY"})
+    with patch.object(price_sync, "SYNC_BATCH_SIZE", 3), patch.object(
+        price_sync, "SYNC_WAVE_PAUSE", 0
+    ):
+        run = await sync_prices(service)
+
+    assert "SPY" in run["failed"]
+    assert len(run["failed"]) == 3
+    assert run["rows_written"] == len(price_sync.DEMO_TICKERS) - 3
+
+
+@pytest.mark.asyncio
+async def test_requested_tickers_tracked_in_sorted_set(fake_redis):
+    service = DataService(fake_redis, None)
+    await service._note_requested(["AAPL", "MSFT"])
+    assert set(await service.recently_requested(3600)) == {"AAPL", "MSFT"}
+
+    fake_redis.store[REQUESTED_TICKERS_KEY]["AAPL"] -= 7200
+    assert await service.recently_requested(3600) == ["MSFT"]
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta, timezone
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
 
@@ -101,6 +101,22 @@ class _FakeSession:
         self._pending.clear()
 
 
+class _AsyncFakeSession:
+    """Async-session facade over the same store for the asyncpg read path."""
+
+    def __init__(self, store: dict[str, PortfolioSnapshot]):
+        self._sync = _FakeSession(store)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        return False
+
+    async def execute(self, stmt):
+        return self._sync.execute(stmt)
+
+
 class _ScalarResult:
     def __init__(self, row):
         self._row = row
@@ -134,6 +150,23 @@ async def test_save_and_fetch_round_trip(session_factory):
     assert fetched.report.holdings == holdings
 
 
+@pytest.mark.asyncio
+async def test_fetch_uses_async_session_when_configured(session_factory):
+    factory, store = session_factory
+    svc = SnapshotService(factory, async_session_factory=lambda: _AsyncFakeSession(store))
+    saved = await svc.save(
+        [HoldingInput(ticker="AAPL", weight=1.0)],
+        _sample_report(),
+        expires_in_days=30,
+    )
+
+    with patch.object(svc, "_fetch_sync", side_effect=AssertionError("sync path used")):
+        fetched = await svc.fetch(saved.token)
+        assert fetched is not None
+        assert fetched.token == saved.token
+        assert await svc.fetch("does-not-exist") is None
+
+
 @pytest.mark.asyncio
 async def test_save_with_zero_days_means_never_expires(session_factory):
     factory, _ = session_factory